@@ -0,0 +1,690 @@
+"""接口基准：按生产量级生成数据，用 Django 测试客户端逐个压测主要接口
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_endpoints.py [--db sqlite|mysql] [--sqlite-path /tmp/wxcloudrun-bench.sqlite3]
+        [--scale 1.0] [--users 200000] [--merchants 10000] [--points-records 1000000] [--orders 50000]
+        [--access-logs 300000] [--notifications 100] [--read-notifications 10] [--read-ratio 0.5] [--reseed]
+        [--iterations 50] [--actors 20] [--warmup 1] [--only user_login,admin_orders]
+        [--openapi-latency fixed:0] [--output bench-result.json] [--baseline benchmarks/baseline.json]
+        [--max-regression 0.2]
+
+- 数据量：各参数为生产量级默认值，--scale 按比例缩放（如 --scale 0.01 做快速冒烟）。
+  SQLite 按模型直接建表；MySQL 使用 BENCH_MYSQL_* 环境变量指定的本机专用库并执行迁移（见 bench_settings.py）
+- 首次运行在空库中生成数据并记录生成参数，参数不变时直接复用；库中已有数据但参数不同（或不是基准生成的数据）时
+  拒绝运行，只有显式加 --reseed 才会清空并重建
+- 微信开放接口：进程内启动 wx_openapi_stub，WX_OPENAPI_BASE 指向它，临时 URL、删除等调用不出网；
+  --openapi-latency 模拟线上接口延迟（规格同 wx_openapi_stub --latency，默认不加延迟）
+- 每个接口轮流以 --actors 个不同用户请求：先每人预热 --warmup 轮，再计时 --iterations 次，
+  记录 p50/p95/p99 延迟、平均 SQL 条数与耗时、开放接口调用次数；另用 tracemalloc 单独跑一次，
+  记录单个请求的 Python 内存分配峰值（不计入延迟）
+- 结果以 JSON 输出（--output）；--baseline 与之前保存的结果对比，p95 超过基线 (1 + --max-regression) 倍
+  或平均 SQL 条数增加时列出并以退出码 1 结束
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from wx_openapi_stub import LatencyModel, StubConfig, WxOpenApiStub  # noqa: E402
+
+
+DEFAULT_COUNTS = {
+    'users': 200_000,
+    'merchants': 10_000,
+    'properties': 50,
+    'categories': 20,
+    'points_records': 1_000_000,
+    'orders': 50_000,
+    'access_logs': 300_000,
+    'notifications': 100,
+    'read_notifications': 10,
+}
+BATCH_SIZE = 5000
+SEED_MARKER = 'bench_seed'
+CLOUD_ENV = 'bench-env'
+
+
+def _progress(message: str):
+    print(f'[{time.strftime("%H:%M:%S")}] {message}', file=sys.stderr, flush=True)
+
+
+def _batched(iterable, size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scaled_counts(args) -> dict:
+    counts = {}
+    for key, default in DEFAULT_COUNTS.items():
+        value = getattr(args, key, None)
+        counts[key] = value if value is not None else max(1, int(default * args.scale))
+    counts['properties'] = min(counts['properties'], counts['users'])
+    counts['merchants'] = min(counts['merchants'], counts['users'] - counts['properties'] - 1)
+    counts['read_notifications'] = min(counts['read_notifications'], counts['notifications'])
+    return counts
+
+
+# ---------------------------------------------------------------- 数据生成
+
+class Seeder:
+    """批量生成基准数据（显式主键，绕过 save()，派生字段在此手动计算）"""
+
+    def __init__(self, counts: dict, read_ratio: float, seed: int = 20240601):
+        self.counts = counts
+        self.read_ratio = read_ratio
+        self.rnd = random.Random(seed)
+        self.now = datetime.now().replace(microsecond=0)
+        self.today = self.now.date()
+        n_props, n_merchants = counts['properties'], counts['merchants']
+        self.property_user_ids = range(1, n_props + 1)
+        self.merchant_user_ids = range(n_props + 1, n_props + n_merchants + 1)
+        self.owner_user_ids = range(n_props + n_merchants + 1, counts['users'] + 1)
+
+    @staticmethod
+    def owner_phone(user_id: int) -> str:
+        return f'139{user_id:08d}'
+
+    def run(self):
+        from django.db import transaction
+
+        steps = [
+            ('分类', self.seed_categories),
+            ('用户', self.seed_users),
+            ('积分记录', self.seed_points),
+            ('订单', self.seed_orders),
+            ('访问日志', self.seed_access_logs),
+            ('通知', self.seed_notifications),
+            ('搜索索引', self.rebuild_search),
+        ]
+        for name, step in steps:
+            started = time.perf_counter()
+            with transaction.atomic():
+                step()
+            _progress(f'生成{name}完成，用时 {time.perf_counter() - started:.1f}s')
+
+    def seed_categories(self):
+        from wxcloudrun.models import Category
+
+        Category.objects.bulk_create([
+            Category(id=i, name=f'分类{i}', icon_file_id=f'cloud://{CLOUD_ENV}.stub/category/{i}.png')
+            for i in range(1, self.counts['categories'] + 1)
+        ])
+
+    def _user(self, user_id, openid, identity, nickname, phone='', avatar='', **extra):
+        from wxcloudrun.models import UserInfo
+        from wxcloudrun.utils.phone import normalize_phone
+
+        phone_normalized = normalize_phone(phone)
+        return UserInfo(
+            id=user_id,
+            system_id=f'{identity}_{user_id:06d}',
+            openid=openid,
+            nickname=nickname,
+            nickname_lower=nickname.lower(),
+            avatar_url=avatar,
+            phone_number=phone,
+            phone_normalized=phone_normalized,
+            phone_reversed=phone_normalized[::-1],
+            identity_type=identity,
+            active_identity=identity,
+            daily_points_date=self.today,
+            created_at=self.now - timedelta(days=self.rnd.randint(0, 730)),
+            **extra,
+        )
+
+    def seed_users(self):
+        from wxcloudrun.models import (
+            Community, MerchantProfile, PointsShareSetting, PropertyProfile, UserAssignedIdentity, UserInfo,
+        )
+        from wxcloudrun.utils import geohash
+
+        n_props = self.counts['properties']
+        UserInfo.objects.bulk_create(
+            [self._user(uid, f'bench-property-{uid}', 'PROPERTY', f'物业{uid}') for uid in self.property_user_ids],
+        )
+        PropertyProfile.objects.bulk_create([
+            PropertyProfile(id=i, user_id=uid, property_id=f'PROPERTY_{i:03d}', property_name=f'物业公司{i}',
+                            community_name=f'社区{i}')
+            for i, uid in enumerate(self.property_user_ids, start=1)
+        ])
+        Community.objects.bulk_create([
+            Community(id=i, property_id=(i - 1) // 2 + 1, community_id=f'COMMUNITY_{i:03d}', community_name=f'小区{i}')
+            for i in range(1, n_props * 2 + 1)
+        ])
+
+        for batch in _batched(self.merchant_user_ids):
+            UserInfo.objects.bulk_create([
+                self._user(uid, f'bench-merchant-{uid}', 'MERCHANT', f'商户{uid}', phone=f'137{uid:08d}')
+                for uid in batch
+            ])
+            profiles = []
+            for uid in batch:
+                lat = Decimal(f'{31.23 + self.rnd.uniform(-0.3, 0.3):.6f}')
+                lng = Decimal(f'{121.47 + self.rnd.uniform(-0.3, 0.3):.6f}')
+                profiles.append(MerchantProfile(
+                    id=uid,
+                    user_id=uid,
+                    merchant_id=f'MERCHANT_{uid:06d}',
+                    merchant_name=f'商户{uid}号店',
+                    merchant_type='DISCOUNT_STORE' if uid % 20 == 0 else 'NORMAL',
+                    title=f'商户{uid}',
+                    description='社区便民商户，' * 10,
+                    banner_url=f'cloud://{CLOUD_ENV}.stub/banner/{uid}.jpg',
+                    gallery=[f'cloud://{CLOUD_ENV}.stub/gallery/{uid}-{n}.jpg' for n in range(2)],
+                    category_id=uid % self.counts['categories'] + 1,
+                    contact_phone=f'137{uid:08d}',
+                    address=f'测试路{uid}号',
+                    latitude=lat,
+                    longitude=lng,
+                    geo_hash=geohash.encode(float(lat), float(lng)),
+                    positive_rating_percent=self.rnd.randint(80, 100),
+                    rating_count=self.rnd.randint(0, 200),
+                    avg_score=Decimal(f'{self.rnd.uniform(3.5, 5):.1f}'),
+                    created_at=self.now - timedelta(days=self.rnd.randint(0, 730)),
+                ))
+            MerchantProfile.objects.bulk_create(profiles)
+
+        for batch in _batched(self.owner_user_ids):
+            users = []
+            for uid in batch:
+                community = self.rnd.randint(1, n_props * 2)
+                users.append(self._user(
+                    uid, f'bench-owner-{uid}', 'OWNER', f'业主{uid}',
+                    phone=self.owner_phone(uid),
+                    avatar=f'cloud://{CLOUD_ENV}.stub/avatar/{uid}.jpg' if uid % 2 else '',
+                    owner_property_id=(community - 1) // 2 + 1,
+                    owner_community_id=community,
+                ))
+            UserInfo.objects.bulk_create(users)
+
+        for batch in _batched(range(1, self.counts['users'] + 1)):
+            UserAssignedIdentity.objects.bulk_create([
+                UserAssignedIdentity(user_id=uid, identity_type=self.identity_of(uid)) for uid in batch
+            ])
+        PointsShareSetting.get_solo()
+
+    def identity_of(self, user_id: int) -> str:
+        if user_id in self.property_user_ids:
+            return 'PROPERTY'
+        if user_id in self.merchant_user_ids:
+            return 'MERCHANT'
+        return 'OWNER'
+
+    def seed_points(self):
+        """积分流水按时间顺序生成，逐账户累计余额，保证流水合计与账户余额一致且余额不为负"""
+        from wxcloudrun.models import PointsRecord, UserPointsAccount
+
+        n = self.counts['points_records']
+        start = self.now - timedelta(days=365)
+        step = timedelta(days=365) / max(n, 1)
+        balances: dict[tuple[int, str], list] = {}  # (user_id, identity) -> [total, daily, daily_date]
+        owners = self.owner_user_ids
+        merchants = self.merchant_user_ids or owners
+        properties = self.property_user_ids
+
+        def pick():
+            roll = self.rnd.random()
+            if roll < 0.8:
+                return owners[self.rnd.randrange(len(owners))], 'OWNER'
+            if roll < 0.95:
+                return merchants[self.rnd.randrange(len(merchants))], 'MERCHANT'
+            return properties[self.rnd.randrange(len(properties))], 'PROPERTY'
+
+        def records():
+            for k in range(n):
+                created_at = start + step * k
+                user_id, identity = pick()
+                state = balances.setdefault((user_id, identity), [0, 0, None])
+                change = self.rnd.randint(1, 500)
+                if state[0] >= change and self.rnd.random() < 0.3:
+                    change, source = -change, 'PROPERTY_FEE_PAY'
+                else:
+                    source = 'MERCHANT_SETTLEMENT'
+                day = created_at.date()
+                if state[2] != day:
+                    state[1], state[2] = 0, day
+                state[0] += change
+                state[1] += change
+                yield PointsRecord(
+                    user_id=user_id,
+                    identity_type=identity,
+                    change=change,
+                    daily_points=state[1],
+                    total_points=state[0],
+                    source_type=source,
+                    source_meta={'action': 'bench_seed', 'points': abs(change)},
+                    created_at=created_at,
+                )
+
+        for batch in _batched(records()):
+            PointsRecord.objects.bulk_create(batch)
+
+        accounts = (
+            UserPointsAccount(
+                user_id=user_id,
+                identity_type=identity,
+                total_points=total,
+                daily_points=daily,
+                daily_points_date=day,
+                created_at=start,
+            )
+            for (user_id, identity), (total, daily, day) in balances.items()
+        )
+        for batch in _batched(accounts):
+            UserPointsAccount.objects.bulk_create(batch)
+
+    def seed_orders(self):
+        from wxcloudrun.models import MerchantReview, SettlementOrder
+
+        n = self.counts['orders']
+        normal_merchants = [uid for uid in self.merchant_user_ids if uid % 20] or list(self.merchant_user_ids)
+        if not normal_merchants:
+            return
+        start = self.now - timedelta(days=365)
+        step = timedelta(days=365) / max(n, 1)
+        for batch in _batched(range(1, n + 1)):
+            orders, reviews = [], []
+            for i in batch:
+                merchant_id = normal_merchants[self.rnd.randrange(len(normal_merchants))]
+                owner_id = self.owner_user_ids[self.rnd.randrange(len(self.owner_user_ids))]
+                amount = self.rnd.randint(10, 2000)
+                created_at = start + step * i
+                reviewed = self.rnd.random() < 0.3
+                orders.append(SettlementOrder(
+                    id=i,
+                    order_id=f'ORDER_{i:06d}',
+                    merchant_id=merchant_id,
+                    owner_id=owner_id,
+                    amount=Decimal(amount),
+                    amount_int=amount,
+                    merchant_points=amount,
+                    owner_points=amount * 5 // 100,
+                    owner_rate=5,
+                    status='REVIEWED' if reviewed else 'PENDING_REVIEW',
+                    reviewed_at=created_at + timedelta(hours=2) if reviewed else None,
+                    created_at=created_at,
+                ))
+                if reviewed:
+                    reviews.append(MerchantReview(
+                        order_id=i, merchant_id=merchant_id, owner_id=owner_id,
+                        rating=self.rnd.randint(3, 5), content='服务不错', created_at=created_at + timedelta(hours=2),
+                    ))
+            SettlementOrder.objects.bulk_create(orders)
+            MerchantReview.objects.bulk_create(reviews)
+
+    def seed_access_logs(self):
+        """每个 (用户, 日期) 一行：第 k 行为最近 365 天中的第 k % 365 天"""
+        from wxcloudrun.models import AccessLog
+
+        owners = self.owner_user_ids
+        n = min(self.counts['access_logs'], 365 * len(owners))
+        for batch in _batched(range(n)):
+            logs = []
+            for k in batch:
+                day = self.today - timedelta(days=k % 365)
+                visited = datetime.combine(day, datetime.min.time()) + timedelta(hours=8)
+                logs.append(AccessLog(
+                    openid=f'bench-owner-{owners[(k // 365) % len(owners)]}',
+                    access_date=day,
+                    access_count=self.rnd.randint(1, 6),
+                    first_access_at=visited,
+                    last_access_at=visited + timedelta(hours=1),
+                ))
+            AccessLog.objects.bulk_create(logs)
+
+    def seed_notifications(self):
+        """通知：大部分面向全部用户，其余按物业投放；最新的若干条全员通知按 --read-ratio 生成已读记录"""
+        from wxcloudrun.models import Notification, NotificationAudience
+        from wxcloudrun.services.notification_read_store import get_read_store
+        from wxcloudrun.utils.notification_content import build_summary, content_digest, html_to_text
+
+        n = self.counts['notifications']
+        notices, audiences, global_ids = [], [], []
+        for i in range(1, n + 1):
+            content = ''.join(
+                f'<p>第{p}段：社区通知正文，请各位业主知悉。</p>'
+                + (f'<img src="cloud://{CLOUD_ENV}.stub/notice/{i}-{p}.png">' if p % 3 == 0 else '')
+                for p in range(12)
+            )
+            plain = html_to_text(content)
+            created_at = self.now - timedelta(hours=(n - i) * 6)
+            notices.append(Notification(
+                id=i, title=f'通知{i}', content=content, plain_text=plain, summary=build_summary(plain),
+                content_hash=content_digest(content), created_at=created_at,
+            ))
+            if i % 4:
+                audiences.append(NotificationAudience(
+                    notification_id=i, segment_type='ALL', segment_value='', created_at=created_at,
+                ))
+                global_ids.append(i)
+            else:
+                property_no = self.rnd.randint(1, self.counts['properties'])
+                audiences.append(NotificationAudience(
+                    notification_id=i, segment_type='PROPERTY', segment_value=f'PROPERTY_{property_no:03d}',
+                    created_at=created_at,
+                ))
+        Notification.objects.bulk_create(notices)
+        NotificationAudience.objects.bulk_create(audiences)
+
+        store = get_read_store()
+        owners = self.owner_user_ids
+        readers = [uid for uid in owners if self.rnd.random() < self.read_ratio]
+        read_ids = global_ids[-self.counts['read_notifications']:] if self.counts['read_notifications'] else []
+        for notification_id in read_ids:
+            for batch in _batched(readers):
+                store.mark_many(notification_id, batch)
+
+    def rebuild_search(self):
+        from wxcloudrun.services.merchant_search_service import rebuild_index
+        from wxcloudrun.services.order_search_service import rebuild_order_search
+
+        rebuild_index()
+        rebuild_order_search()
+
+
+def _load_marker():
+    from wxcloudrun.models import BackgroundJob
+
+    job = BackgroundJob.objects.filter(job_type=SEED_MARKER).first()
+    return job.payload if job else None
+
+
+def prepare_database(args, counts: dict):
+    """建表并按需生成数据，返回 (是否新生成, 生成用时)"""
+    from django.core.management import call_command
+    from django.db import connection
+
+    from wxcloudrun.models import BackgroundJob, UserInfo
+
+    expected = {'counts': counts, 'read_ratio': args.read_ratio}
+    if args.db == 'sqlite' and args.reseed and os.path.exists(args.sqlite_path):
+        connection.close()
+        os.remove(args.sqlite_path)
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    if args.reseed:
+        call_command('flush', interactive=False, verbosity=0)
+    else:
+        marker = _load_marker()
+        if marker == expected:
+            return False, 0.0
+        if marker is not None:
+            raise SystemExit('已有数据的生成参数与本次不同；确认该库只用于基准后加 --reseed 清空重建')
+        if UserInfo.objects.exists():
+            raise SystemExit('数据库中已有非基准生成的数据，拒绝清空；确认该库只用于基准后加 --reseed')
+
+    started = time.perf_counter()
+    Seeder(counts, args.read_ratio).run()
+    BackgroundJob.objects.create(job_type=SEED_MARKER, payload=expected, status='SUCCEEDED')
+    return True, time.perf_counter() - started
+
+
+# ---------------------------------------------------------------- 请求场景
+
+class Context:
+    """场景所需的用户与参数（按 Seeder 的主键布局推算）"""
+
+    def __init__(self, counts: dict, actors: int):
+        from django.contrib.auth.models import User
+        from rest_framework.authtoken.models import Token
+
+        from wxcloudrun.models import UserPointsAccount
+
+        n_props, n_merchants = counts['properties'], counts['merchants']
+        first_owner = n_props + n_merchants + 1
+        rich = list(
+            UserPointsAccount.objects.filter(identity_type='OWNER', total_points__gte=1000, user_id__gte=first_owner)
+            .order_by('user_id').values_list('user_id', flat=True)[:actors]
+        )
+        self.owners = [f'bench-owner-{uid}' for uid in range(first_owner, first_owner + actors)]
+        self.payers = [f'bench-owner-{uid}' for uid in rich] or self.owners
+        self.owner_phones = [Seeder.owner_phone(uid) for uid in range(first_owner, first_owner + actors)]
+        merchant_ids = [uid for uid in range(n_props + 1, n_props + n_merchants + 1) if uid % 20][:actors]
+        self.merchants = [f'bench-merchant-{uid}' for uid in merchant_ids]
+
+        admin, _ = User.objects.get_or_create(username='bench-admin', defaults={'is_superuser': True, 'is_staff': True})
+        self.admin_token = Token.objects.get_or_create(user=admin)[0].key
+
+        today = date.today()
+        last_month = today.replace(day=1) - timedelta(days=1)
+        self.last_month = {'type': 'month', 'year': last_month.year, 'month': last_month.month}
+        self.last_30_days = {'start_date': str(today - timedelta(days=30)), 'end_date': str(today)}
+
+
+# (名称, 方法, 路径, 身份, 参数生成函数)；身份决定请求头，参数函数接收 (ctx, 序号)
+SCENARIOS = [
+    ('user_login', 'GET', '/api/user/login', 'owner', None),
+    ('merchants_list', 'GET', '/api/merchants', 'owner', None),
+    ('merchants_list_category', 'GET', '/api/merchants', 'owner', lambda ctx, i: {'categoryId': i % 5 + 1}),
+    ('notifications_list', 'GET', '/api/notifications', 'owner', None),
+    ('notifications_unread_count', 'GET', '/api/notifications/unread-count', 'owner', None),
+    ('orders_list', 'GET', '/api/orders', 'owner', None),
+    ('merchant_orders_list', 'GET', '/api/orders', 'merchant', None),
+    ('merchant_points_add', 'POST', '/api/points/merchant/add', 'merchant',
+     lambda ctx, i: {'user_phone_number': ctx.owner_phones[i % len(ctx.owner_phones)], 'amount': '88.50'}),
+    ('owner_property_fee_pay', 'POST', '/api/points/property/pay', 'payer', lambda ctx, i: {'points': 1}),
+    ('admin_points_records', 'GET', '/api/admin/points-records', 'admin', None),
+    ('admin_points_records_filtered', 'GET', '/api/admin/points-records', 'admin',
+     lambda ctx, i: {'identity_type': 'OWNER', **ctx.last_30_days}),
+    ('admin_orders', 'GET', '/api/admin/orders', 'admin', None),
+    ('admin_statistics_overview', 'GET', '/api/admin/statistics/overview', 'admin', None),
+    ('admin_statistics_by_time', 'GET', '/api/admin/statistics/by-time', 'admin', lambda ctx, i: ctx.last_month),
+    ('admin_statistics_by_range', 'GET', '/api/admin/statistics/by-range', 'admin',
+     lambda ctx, i: {'period': 'this_year'}),
+    ('admin_statistics_last_week', 'GET', '/api/admin/statistics/last-week', 'admin', None),
+]
+
+
+def _issue(client, ctx: Context, scenario, i: int):
+    _name, method, path, actor, params = scenario
+    headers = {}
+    if actor == 'admin':
+        headers['HTTP_AUTHORIZATION'] = f'Token {ctx.admin_token}'
+    else:
+        pool = {'owner': ctx.owners, 'payer': ctx.payers, 'merchant': ctx.merchants}[actor]
+        headers['HTTP_X_WX_OPENID'] = pool[i % len(pool)]
+    data = params(ctx, i) if params else {}
+    if method == 'GET':
+        return client.get(path, data, **headers)
+    return client.generic(method, path, json.dumps(data), content_type='application/json', **headers)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def run_scenario(client, ctx: Context, stub: WxOpenApiStub, scenario, iterations: int, warmup_rounds: int,
+                 actors: int) -> dict:
+    from django.db import connections
+
+    from wxcloudrun.utils.metrics import RequestMetrics
+
+    for i in range(warmup_rounds * actors):
+        _issue(client, ctx, scenario, i)
+
+    latencies, queries, sql_seconds = [], [], []
+    errors, first_error = 0, None
+    calls_before = sum(stub.calls.values())
+    for i in range(iterations):
+        request_metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(request_metrics.db_wrapper))
+            started = time.perf_counter()
+            response = _issue(client, ctx, scenario, i)
+            latencies.append(time.perf_counter() - started)
+        queries.append(request_metrics.db_count)
+        sql_seconds.append(request_metrics.db_seconds)
+        if response.status_code >= 400:
+            errors += 1
+            first_error = first_error or f'{response.status_code} {response.content[:200].decode("utf-8", "replace")}'
+    openapi_calls = sum(stub.calls.values()) - calls_before
+
+    tracemalloc.start()
+    _issue(client, ctx, scenario, iterations)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        'iterations': iterations,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+        'sql_ms': round(sum(sql_seconds) / len(sql_seconds) * 1000, 3),
+        'openapi_calls': round(openapi_calls / iterations, 2),
+        'peak_alloc_kb': round(peak / 1024, 1),
+        'errors': errors,
+    }
+    if first_error:
+        result['first_error'] = first_error
+    return result
+
+
+# ---------------------------------------------------------------- 基线对比
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """返回回归项描述：p95 超过基线 (1 + max_regression) 倍（且差值超过 1ms）或平均 SQL 条数增加"""
+    regressions = []
+    print(f'\n{"接口":<32}{"p95 基线":>12}{"p95 本次":>12}{"比值":>8}{"SQL 基线":>10}{"SQL 本次":>10}', file=sys.stderr)
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        ratio = current['p95_ms'] / base['p95_ms'] if base['p95_ms'] else 1.0
+        flags = []
+        if ratio > 1 + max_regression and current['p95_ms'] - base['p95_ms'] > 1.0:
+            flags.append(f'p95 {base["p95_ms"]}ms -> {current["p95_ms"]}ms')
+        if current['queries'] > base['queries'] + 0.5:
+            flags.append(f'SQL {base["queries"]} -> {current["queries"]}')
+        print(f'{name:<32}{base["p95_ms"]:>12.2f}{current["p95_ms"]:>12.2f}{ratio:>8.2f}'
+              f'{base["queries"]:>10.1f}{current["queries"]:>10.1f}{"  <-- 回归" if flags else ""}', file=sys.stderr)
+        regressions.extend(f'{name}: {flag}' for flag in flags)
+    return regressions
+
+
+# ---------------------------------------------------------------- 入口
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--db', choices=('sqlite', 'mysql'), default='sqlite')
+    parser.add_argument('--sqlite-path', default='/tmp/wxcloudrun-bench.sqlite3')
+    parser.add_argument('--scale', type=float, default=1.0, help='默认数据量的缩放比例')
+    for key in DEFAULT_COUNTS:
+        parser.add_argument(f'--{key.replace("_", "-")}', type=int, default=None,
+                            help=f'默认 {DEFAULT_COUNTS[key]} x --scale')
+    parser.add_argument('--read-ratio', type=float, default=0.5, help='最新通知的已读业主比例')
+    parser.add_argument('--reseed', action='store_true', help='清空并重新生成数据')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--actors', type=int, default=20, help='每个场景轮流使用的用户数')
+    parser.add_argument('--warmup', type=int, default=1, help='计时前每个用户的预热轮数')
+    parser.add_argument('--only', default='', help='逗号分隔的场景名')
+    parser.add_argument('--openapi-latency', default='fixed:0', help='开放接口替身的延迟规格，如 lognormal:30:0.5')
+    parser.add_argument('--output', default='', help='结果 JSON 文件（默认输出到标准输出）')
+    parser.add_argument('--baseline', default='', help='对比的基线结果 JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        LatencyModel(args.openapi_latency)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    stub = WxOpenApiStub(StubConfig(latency=args.openapi_latency)).start()
+    os.environ['WX_OPENAPI_BASE'] = stub.base_url
+    os.environ.setdefault('CLOUD_ID', CLOUD_ENV)
+    os.environ['BENCH_DB'] = args.db
+    os.environ['BENCH_SQLITE_PATH'] = args.sqlite_path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test import Client
+
+    counts = scaled_counts(args)
+    seeded, seed_seconds = prepare_database(args, counts)
+    ctx = Context(counts, args.actors)
+    client = Client(raise_request_exception=False)
+
+    only = {name.strip() for name in args.only.split(',') if name.strip()}
+    scenarios = [s for s in SCENARIOS if not only or s[0] in only]
+    unknown = only - {s[0] for s in SCENARIOS}
+    if unknown:
+        raise SystemExit(f'未知场景: {", ".join(sorted(unknown))}')
+
+    results = {}
+    for scenario in scenarios:
+        results[scenario[0]] = run_scenario(client, ctx, stub, scenario, args.iterations, args.warmup, args.actors)
+        r = results[scenario[0]]
+        _progress(f'{scenario[0]:<32} p50 {r["p50_ms"]:>8.2f}ms  p95 {r["p95_ms"]:>8.2f}ms  '
+                  f'p99 {r["p99_ms"]:>8.2f}ms  SQL {r["queries"]:>6.1f}  错误 {r["errors"]}')
+    stub.stop()
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'db': connection.vendor,
+            'counts': counts,
+            'read_ratio': args.read_ratio,
+            'seeded': seeded,
+            'seed_seconds': round(seed_seconds, 1),
+            'iterations': args.iterations,
+            'actors': args.actors,
+            'openapi_latency': args.openapi_latency,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        _progress(f'结果已写入 {args.output}')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print('\n性能回归：\n  ' + '\n  '.join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
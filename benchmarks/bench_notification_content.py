@@ -0,0 +1,97 @@
+"""通知正文图片处理基准：对比旧版正则实现与单次解析实现
+
+用法（在项目根目录执行）：
+    python benchmarks/bench_notification_content.py [--images 200] [--paragraphs 400] [--repeat 5]
+
+生成包含大量段落与 <img> 标签的富文本通知，分别计时 extract_image_file_ids /
+normalize_content / render_content，并校验两种实现的结果在属性层面一致。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy_notification_content as legacy  # noqa: E402
+from wxcloudrun.utils import notification_content as current  # noqa: E402
+
+
+IMG_TEMPLATES = (
+    '<img src="cloud://prod-env.7072/notice/{n}.png" data-file-id="cloud://prod-env.7072/notice/{n}.png" '
+    'alt="cloud://prod-env.7072/notice/{n}.png" style="max-width:100%;height:auto" class="rich-img">',
+    '<img src="https://tmp.example.com/{n}.png?sign=abc&t=1" data-fileid="cloud://prod-env.7072/notice/{n}.png" '
+    'width="750" height="420" />',
+    "<img alt='cloud://prod-env.7072/notice/{n}.jpg' src='cloud://prod-env.7072/notice/{n}.jpg'>",
+    '<img src="https://cdn.example.com/static/{n}.gif" alt="装饰图片">',
+)
+
+
+def build_content(images: int, paragraphs: int, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    parts = []
+    img_every = max(paragraphs // max(images, 1), 1)
+    n = 0
+    for i in range(paragraphs):
+        parts.append(f'<p style="text-indent:2em">第{i}段：社区公告内容 &amp; 活动说明，' + '文字' * rnd.randint(20, 80) + '</p>')
+        if n < images and i % img_every == 0:
+            parts.append(IMG_TEMPLATES[n % len(IMG_TEMPLATES)].format(n=n))
+            n += 1
+    return ''.join(parts)
+
+
+def _tag_attrs(content: str) -> list[dict]:
+    """按标签解析属性（名称小写），用于比较两种实现的输出。"""
+    result = []
+    for tag in current.IMG_TAG_RE.findall(content):
+        parsed = current._ImgTag(tag)
+        result.append({name: parsed.get(name) for name in parsed.index})
+    return result
+
+
+def check_equivalent(content: str, url_map: dict) -> None:
+    assert legacy.extract_image_file_ids(content) == current.extract_image_file_ids(content)
+    assert _tag_attrs(legacy.normalize_content(content)) == _tag_attrs(current.normalize_content(content))
+    assert _tag_attrs(legacy.render_content(content, url_map)) == _tag_attrs(current.render_content(content, url_map))
+
+
+def bench(label: str, fn, repeat: int, number: int) -> float:
+    best = min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+    print(f'  {label:<10} {best * 1000:9.3f} ms')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=10)
+    args = parser.parse_args()
+
+    content = build_content(args.images, args.paragraphs)
+    normalized = current.normalize_content(content)
+    url_map = {fid: f'https://tmp.example.com/{i}?sign=x' for i, fid in enumerate(current.extract_image_file_ids(normalized))}
+    check_equivalent(content, url_map)
+    check_equivalent(normalized, url_map)
+    print(f'content: {len(content)} chars, {len(current.IMG_TAG_RE.findall(content))} <img> tags, results equivalent')
+
+    cases = (
+        ('extract', lambda impl: impl.extract_image_file_ids(normalized)),
+        ('normalize', lambda impl: impl.normalize_content(content)),
+        ('render', lambda impl: impl.render_content(normalized, url_map)),
+    )
+    for name, call in cases:
+        print(f'{name}:')
+        old = bench('legacy', lambda: call(legacy), args.repeat, args.number)
+        new = bench('current', lambda: call(current), args.repeat, args.number)
+        print(f'  speedup    {old / new:9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
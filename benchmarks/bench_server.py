@@ -0,0 +1,159 @@
+"""服务入口吞吐基准：manage.py runserver 对比 gunicorn（gunicorn.conf.py）
+
+用法（在项目根目录执行，需可用的数据库配置）：
+    python benchmarks/bench_server.py [--modes runserver,gunicorn] [--duration 15] [--concurrency 32]
+        [--path /readyz] [--header "X-WX-OPENID: bench"] [--server-cpus 0] [--settings wxcloudrun.settings]
+
+依次在本机空闲端口启动各服务（--server-cpus 通过 taskset 把服务进程绑定到指定 CPU，模拟 1 核容器；
+gunicorn.conf.py 按可调度 CPU 数计算默认 worker 数，绑定 1 核时为 3 个），
+等待 /healthz 可用后用 --concurrency 个长连接线程持续请求 --duration 秒，输出 QPS 与延迟分位数。
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _server_command(mode: str, port: int) -> list[str]:
+    if mode == 'runserver':
+        # 与原 Dockerfile 一致：开发服务器（含自动重载）
+        return [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}']
+    if mode in ('gunicorn', 'gunicorn-asgi'):
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}']
+    raise ValueError(f'unknown mode: {mode}')
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/healthz')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} not ready in {timeout}s')
+
+
+def _load(port: int, paths: list[str], headers: dict, duration: float, concurrency: int):
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(index: int):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local, failed, n = [], 0, index
+        while time.monotonic() < stop_at:
+            path = paths[n % len(paths)]
+            n += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    failed += 1
+                if resp.getheader('connection', '').lower() == 'close':
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    return latencies, errors[0], elapsed
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(mode: str, args) -> dict:
+    port = _free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=args.settings, PYTHONUNBUFFERED='1')
+    if mode == 'gunicorn-asgi':
+        env['SERVER_MODE'] = 'asgi'
+    cmd = _server_command(mode, port)
+    if args.server_cpus and shutil.which('taskset'):
+        cmd = ['taskset', '-c', args.server_cpus] + cmd
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    try:
+        _wait_ready(port)
+        headers = dict(h.split(':', 1) for h in args.header)
+        headers = {k.strip(): v.strip() for k, v in headers.items()}
+        _load(port, args.path, headers, min(2.0, args.duration), args.concurrency)  # 预热
+        latencies, errors, elapsed = _load(port, args.path, headers, args.duration, args.concurrency)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'errors': errors,
+        'qps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='runserver,gunicorn')
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--path', action='append', default=None)
+    parser.add_argument('--header', action='append', default=[])
+    parser.add_argument('--server-cpus', default='0', help='taskset CPU 列表，空字符串表示不绑定')
+    parser.add_argument('--settings', default=os.environ.get('DJANGO_SETTINGS_MODULE', 'wxcloudrun.settings'))
+    args = parser.parse_args()
+    args.path = args.path or ['/readyz']
+
+    results = [run(mode.strip(), args) for mode in args.modes.split(',') if mode.strip()]
+    print(f"{'mode':<14}{'requests':>10}{'errors':>8}{'qps':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for r in results:
+        print(f"{r['mode']:<14}{r['requests']:>10}{r['errors']:>8}{r['qps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    if len(results) > 1 and results[0]['qps']:
+        for r in results[1:]:
+            print(f"{r['mode']} / {results[0]['mode']}: {r['qps'] / results[0]['qps']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""基准测试用 Django 配置：在项目配置基础上切换数据库
+
+- BENCH_DB=sqlite（默认）：本地 SQLite 文件 BENCH_SQLITE_PATH（项目迁移含 MySQL 专用语句，按模型直接建表）
+- BENCH_DB=mysql：连接 BENCH_MYSQL_* 环境变量指定的专用 MySQL 库，按迁移建表。
+  基准会清空并重建数据，因此不读取服务使用的 MYSQL_* 环境变量，且主机只允许本机（localhost / 127.0.0.1）：
+  BENCH_MYSQL_HOST（默认 127.0.0.1）、BENCH_MYSQL_PORT（默认 3306）、BENCH_MYSQL_DATABASE（默认 wxcloudrun_bench）、
+  BENCH_MYSQL_USERNAME（默认 root）、BENCH_MYSQL_PASSWORD
+- 日志文件写到 BENCH_LOG_DIR（默认系统临时目录下的 wxcloudrun-bench-logs），不写入项目 logs/
+"""
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+
+from wxcloudrun.settings import *  # noqa: F401,F403
+from wxcloudrun.settings import DATABASES
+
+BENCH_DB = os.environ.get('BENCH_DB', 'sqlite')
+BENCH_MYSQL_LOCAL_HOSTS = ('localhost', '127.0.0.1')
+
+if BENCH_DB == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('BENCH_SQLITE_PATH', '/tmp/wxcloudrun-bench.sqlite3'),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+    MIGRATION_MODULES = {'wxcloudrun': None}
+else:
+    bench_mysql_host = os.environ.get('BENCH_MYSQL_HOST', '127.0.0.1')
+    if bench_mysql_host not in BENCH_MYSQL_LOCAL_HOSTS:
+        raise ImproperlyConfigured(
+            f'BENCH_MYSQL_HOST={bench_mysql_host!r} 不是本机地址；基准会清空数据库，只允许连接 localhost / 127.0.0.1'
+        )
+    # 连接参数沿用项目配置（引擎、连接复用等），只压主库，不走只读副本
+    DATABASES = {
+        'default': {
+            **DATABASES['default'],
+            'NAME': os.environ.get('BENCH_MYSQL_DATABASE', 'wxcloudrun_bench'),
+            'USER': os.environ.get('BENCH_MYSQL_USERNAME', 'root'),
+            'PASSWORD': os.environ.get('BENCH_MYSQL_PASSWORD', ''),
+            'HOST': bench_mysql_host,
+            'PORT': os.environ.get('BENCH_MYSQL_PORT', '3306'),
+        }
+    }
+
+# SQL 检查会给每条查询做指纹归一化，影响计时
+QUERY_INSPECTOR = False
+QUERY_BUDGET_ENFORCE = False
+
+# 应用日志写到临时目录，控制台只保留告警，避免刷屏淹没基准进度
+LOG_PATH = os.environ.get('BENCH_LOG_DIR') or os.path.join(tempfile.gettempdir(), 'wxcloudrun-bench-logs')
+os.makedirs(LOG_PATH, exist_ok=True)
+for _handler in LOGGING['handlers'].values():  # noqa: F405
+    if 'filename' in _handler:
+        _handler['filename'] = os.path.join(LOG_PATH, os.path.basename(_handler['filename']))
+LOGGING['handlers']['console']['level'] = 'WARNING'  # noqa: F405
@@ -0,0 +1,584 @@
+"""积分转账并发压测：多进程 × 多线程并发调用积分接口，统计吞吐与锁等待，结束后校验账本一致性
+
+用法（在项目根目录执行）：
+    python benchmarks/stress_points.py [--db sqlite|mysql] [--sqlite-path /tmp/wxcloudrun-stress.sqlite3] [--i-know-this-flushes]
+        [--owners 2000] [--merchants 100] [--properties 1] [--opening-balance 1000] [--cold-accounts]
+        [--processes 2] [--threads 8] [--duration 30] [--per-worker 0]
+        [--mix pay=5,settle=4,redeem=1] [--hot-owners 1] [--max-retries 5] [--seed 1] [--output stress-result.json]
+
+- 数据库：默认 SQLite 临时文件；--db mysql 连接 BENCH_MYSQL_* 指定的本机专用库（见 bench_settings.py，
+  不读取服务的 MYSQL_* 环境变量，非本机地址直接拒绝）
+- 每次运行先清空数据库再生成数据；库中已有数据（SQLite 文件已存在或 MySQL 中有用户）时，
+  必须显式加 --i-know-this-flushes 才会删除，否则报错退出。业主平均分到 --properties 个物业（默认 1 个，
+  所有业主向同一物业缴费），每个业主写入 --opening-balance 期初积分（流水 + 账户）；商户、物业账户期初为 0，
+  --cold-accounts 时不预建，由接口内 select_for_update().get_or_create 并发创建
+- 交易按 --mix 权重混合：
+  pay     业主积分抵扣物业费（owner_property_fee_pay）：随机业主 -> 所属物业
+  settle  商户结算加积分（merchant_points_add）：随机普通商户 -> 前 --hot-owners 个业主之一
+  redeem  折扣店积分兑换（discount_store_redeem）：前 --hot-owners 个业主之一 -> 随机折扣店
+- 请求经 Django 测试客户端走完整中间件与视图；死锁（MySQL 1213）、锁等待超时（1205）与 SQLite 的
+  database is locked 视为可重试，退避后最多重试 --max-retries 次并计数
+- 锁等待：客户端统计每条 SELECT ... FOR UPDATE 的耗时；MySQL 另取 Innodb_row_lock_* 状态与
+  INNODB_METRICS 中 lock_deadlocks 的增量
+- 结束后校验：每个账户 total_points 等于其流水 change 之和、等于最后一条流水的 total_points；账户与流水无负余额；
+  本次新增的流水条数、积分净增、结算订单与兑换记录数与成功交易一致。校验失败以退出码 1 结束
+- SQLite 没有行锁（FOR UPDATE 被忽略，写事务整库串行），只用于冒烟；锁竞争结论以 MySQL 为准
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_endpoints import BATCH_SIZE, CLOUD_ENV, Seeder, _batched, _percentile, _progress  # noqa: E402
+
+
+OPERATIONS = {
+    'pay': '/api/points/property/pay',
+    'settle': '/api/points/merchant/add',
+    'redeem': '/api/points/discount/redeem',
+}
+MYSQL_RETRYABLE = {1213, 1205}  # 死锁、锁等待超时
+OPENING_SOURCE = 'STRESS_OPENING'
+
+# 视图异常按线程记录：测试客户端的 raise_request_exception 依赖全局信号，多线程并发时会拿到其他线程的异常
+_request_exception = threading.local()
+
+
+def _remember_exception(sender, request=None, **kwargs):
+    _request_exception.value = sys.exc_info()[1]
+
+
+def _retryable(exc: BaseException | None) -> bool:
+    from django.db import OperationalError
+
+    if not isinstance(exc, OperationalError):
+        return False
+    if exc.args and exc.args[0] in MYSQL_RETRYABLE:
+        return True
+    return 'database is locked' in str(exc)
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'未知交易类型: {name}（可选 {"/".join(OPERATIONS)}）')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'权重必须是数字: {part}') from None
+    if not any(w > 0 for w in mix.values()):
+        raise argparse.ArgumentTypeError('至少一种交易的权重大于 0')
+    return mix
+
+
+# ---------------------------------------------------------------- 数据
+
+def seed(args) -> Seeder:
+    """清空数据库并生成压测数据（沿用 Seeder 的主键布局：物业、商户、业主依次编号）"""
+    from django.core.management import call_command
+    from django.db import connection, transaction
+
+    from wxcloudrun.models import PointsRecord, UserInfo, UserPointsAccount
+
+    if args.db == 'sqlite' and os.path.exists(args.sqlite_path):
+        if not args.i_know_this_flushes:
+            raise SystemExit(f'{args.sqlite_path} 已存在，压测会删除它；确认后加 --i-know-this-flushes')
+        connection.close()
+        os.remove(args.sqlite_path)
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    if UserInfo.objects.exists():
+        if not args.i_know_this_flushes:
+            raise SystemExit('数据库中已有数据，压测会清空整个库；确认该库只用于压测后加 --i-know-this-flushes')
+        call_command('flush', interactive=False, verbosity=0)
+
+    counts = {
+        'users': args.properties + args.merchants + args.owners,
+        'properties': args.properties,
+        'merchants': args.merchants,
+        'categories': 5,
+    }
+    seeder = Seeder(counts, read_ratio=0, seed=args.seed)
+    started = time.perf_counter()
+    with transaction.atomic():
+        seeder.seed_categories()
+        seeder.seed_users()
+        # seed_users 随机分配小区；压测按业主编号分段均匀分到各物业，便于控制热点
+        owner_ids = seeder.owner_user_ids
+        per_property = -(-len(owner_ids) // args.properties)
+        for property_id in range(1, args.properties + 1):
+            first = owner_ids.start + (property_id - 1) * per_property
+            UserInfo.objects.filter(id__gte=first, id__lt=min(first + per_property, owner_ids.stop)).update(
+                owner_property_id=property_id, owner_community_id=property_id * 2 - 1,
+            )
+
+        today = date.today()
+        opening = args.opening_balance
+        for batch in _batched(seeder.owner_user_ids, BATCH_SIZE):
+            if opening:
+                PointsRecord.objects.bulk_create([
+                    PointsRecord(user_id=uid, identity_type='OWNER', change=opening, daily_points=opening,
+                                 total_points=opening, source_type=OPENING_SOURCE, source_meta={'action': 'stress_seed'})
+                    for uid in batch
+                ])
+            UserPointsAccount.objects.bulk_create([
+                UserPointsAccount(user_id=uid, identity_type='OWNER', total_points=opening, daily_points=opening,
+                                  daily_points_date=today)
+                for uid in batch
+            ])
+        if not args.cold_accounts:
+            UserPointsAccount.objects.bulk_create(
+                [UserPointsAccount(user_id=uid, identity_type='MERCHANT', daily_points_date=today)
+                 for uid in seeder.merchant_user_ids]
+                + [UserPointsAccount(user_id=uid, identity_type='PROPERTY', daily_points_date=today)
+                   for uid in seeder.property_user_ids],
+                batch_size=BATCH_SIZE,
+            )
+    _progress(f'生成数据完成（业主 {args.owners}，商户 {args.merchants}，物业 {args.properties}），'
+              f'用时 {time.perf_counter() - started:.1f}s')
+    return seeder
+
+
+class Plan:
+    """各交易可用的发起方与目标（按 Seeder 主键布局推算，fork 后子进程直接继承）"""
+
+    def __init__(self, seeder: Seeder, args):
+        self.owners = [f'bench-owner-{uid}' for uid in seeder.owner_user_ids]
+        hot = list(seeder.owner_user_ids)[:max(1, args.hot_owners)]
+        self.hot_phones = [Seeder.owner_phone(uid) for uid in hot]
+        self.merchants = [f'bench-merchant-{uid}' for uid in seeder.merchant_user_ids if uid % 20]
+        self.discount_stores = [f'bench-merchant-{uid}' for uid in seeder.merchant_user_ids if uid % 20 == 0]
+        self.mix = dict(args.mix)
+        for name, pool in (('settle', self.merchants), ('redeem', self.discount_stores)):
+            if self.mix.get(name) and not pool:
+                _progress(f'没有可用于 {name} 的商户（折扣店为编号能被 20 整除的商户），该交易权重置 0')
+                self.mix[name] = 0
+        if not any(self.mix.values()):
+            raise SystemExit('没有可执行的交易类型')
+
+    def request(self, op: str, rnd: random.Random) -> tuple[str, dict]:
+        """返回 (openid, 请求体)"""
+        if op == 'pay':
+            return rnd.choice(self.owners), {'points': rnd.randint(1, 20)}
+        if op == 'settle':
+            return rnd.choice(self.merchants), {
+                'user_phone_number': rnd.choice(self.hot_phones),
+                'amount': f'{rnd.randint(1, 200)}.{rnd.randint(0, 99):02d}',
+            }
+        return rnd.choice(self.discount_stores), {
+            'user_phone_number': rnd.choice(self.hot_phones), 'points': rnd.randint(1, 20),
+        }
+
+
+# ---------------------------------------------------------------- 压测
+
+class WorkerStats:
+    """单个线程的统计；进程内与进程间按 merge 汇总"""
+
+    def __init__(self):
+        self.ok: Counter = Counter()
+        self.rejected: Counter = Counter()  # 4xx（如积分余额不足），业务上合法的拒绝
+        self.failed: Counter = Counter()
+        self.retries: Counter = Counter()
+        self.exhausted: Counter = Counter()  # 重试次数用尽仍失败
+        self.failures: Counter = Counter()  # "交易 状态码 信息" -> 次数
+        self.latencies: dict[str, list] = {op: [] for op in OPERATIONS}
+        self.lock_waits: list[float] = []
+        self.expected_change = 0
+        self.expected_records = 0
+
+    def lock_timer(self, execute, sql, params, many, context):
+        if 'FOR UPDATE' not in sql:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.lock_waits.append(time.perf_counter() - started)
+
+    def record(self, op: str, response):
+        if response.status_code >= 400:
+            try:
+                msg = response.json().get('msg') or ''
+            except ValueError:
+                msg = ''
+            bucket = self.rejected if response.status_code < 500 else self.failed
+            bucket[op] += 1
+            self.failures[f'{op} {response.status_code} {msg}'.strip()] += 1
+            return
+        self.ok[op] += 1
+        data = response.json().get('data') or {}
+        if op == 'settle':
+            added = (data['merchant']['points_added'], data['target_user']['points_added'])
+            self.expected_change += sum(added)
+            self.expected_records += sum(1 for points in added if points > 0)
+        else:
+            self.expected_records += 2
+
+    def merge(self, other: 'WorkerStats'):
+        for name in ('ok', 'rejected', 'failed', 'retries', 'exhausted', 'failures'):
+            getattr(self, name).update(getattr(other, name))
+        for op, values in other.latencies.items():
+            self.latencies[op].extend(values)
+        self.lock_waits.extend(other.lock_waits)
+        self.expected_change += other.expected_change
+        self.expected_records += other.expected_records
+
+
+def _transact(client, stats: WorkerStats, plan: Plan, op: str, rnd: random.Random, max_retries: int):
+    openid, body = plan.request(op, rnd)
+    started = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        _request_exception.value = None
+        response = client.post(OPERATIONS[op], json.dumps(body), content_type='application/json',
+                               HTTP_X_WX_OPENID=openid)
+        exc = _request_exception.value
+        if exc is None:
+            stats.record(op, response)
+            break
+        retryable = _retryable(exc)
+        if not retryable or attempt == max_retries:
+            (stats.exhausted if retryable else stats.failed)[op] += 1
+            stats.failures[f'{op} {type(exc).__name__}: {exc}'[:200]] += 1
+            break
+        stats.retries[op] += 1
+        time.sleep(rnd.uniform(0, 0.005 * 2 ** attempt))
+    stats.latencies[op].append(time.perf_counter() - started)
+
+
+def _worker(plan: Plan, worker_id: int, args, stop_at: float, results: list):
+    from django.db import connection
+    from django.test import Client
+
+    stats = WorkerStats()
+    rnd = random.Random(args.seed * 100_003 + worker_id)
+    ops = [op for op, w in plan.mix.items() if w > 0]
+    weights = [plan.mix[op] for op in ops]
+    client = Client(raise_request_exception=False)
+    try:
+        with connection.execute_wrapper(stats.lock_timer):
+            done = 0
+            while (done < args.per_worker) if args.per_worker else (time.monotonic() < stop_at):
+                _transact(client, stats, plan, rnd.choices(ops, weights)[0], rnd, args.max_retries)
+                done += 1
+    finally:
+        connection.close()
+    results.append(stats)
+
+
+def _run_threads(plan: Plan, process_id: int, args, stop_at: float) -> WorkerStats:
+    results: list[WorkerStats] = []
+    threads = [
+        threading.Thread(target=_worker, args=(plan, process_id * args.threads + i, args, stop_at, results),
+                         name=f'stress-{process_id}-{i}')
+        for i in range(args.threads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    merged = WorkerStats()
+    for stats in results:
+        merged.merge(stats)
+    return merged
+
+
+def _process_main(plan: Plan, process_id: int, args, stop_at: float, queue):
+    queue.put(_run_threads(plan, process_id, args, stop_at))
+
+
+def run(plan: Plan, args) -> tuple[WorkerStats, float]:
+    from django.db import connections
+
+    started = time.perf_counter()
+    stop_at = time.monotonic() + args.duration
+    if args.processes <= 1:
+        return _run_threads(plan, 0, args, stop_at), time.perf_counter() - started
+
+    # 子进程继承父进程的数据库连接会互相干扰：fork 前全部关闭，子进程各自重连
+    connections.close_all()
+    mp = multiprocessing.get_context('fork')
+    queue = mp.Queue()
+    processes = [mp.Process(target=_process_main, args=(plan, i, args, stop_at, queue)) for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    merged = WorkerStats()
+    for _ in processes:
+        merged.merge(queue.get())
+    for p in processes:
+        p.join()
+    return merged, time.perf_counter() - started
+
+
+# ---------------------------------------------------------------- MySQL 锁统计
+
+def mysql_lock_status() -> dict | None:
+    from django.db import DatabaseError, connection
+
+    if connection.vendor != 'mysql':
+        return None
+    status = {}
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'")
+        status.update({name: int(value) for name, value in cursor.fetchall()})
+        try:
+            cursor.execute("SELECT `COUNT` FROM information_schema.INNODB_METRICS WHERE NAME = 'lock_deadlocks'")
+            row = cursor.fetchone()
+            status['lock_deadlocks'] = int(row[0]) if row else None
+        except DatabaseError:
+            status['lock_deadlocks'] = None
+    return status
+
+
+def lock_status_delta(before: dict | None, after: dict | None) -> dict | None:
+    if before is None or after is None:
+        return None
+    delta = {
+        'row_lock_waits': after.get('Innodb_row_lock_waits', 0) - before.get('Innodb_row_lock_waits', 0),
+        'row_lock_time_ms': after.get('Innodb_row_lock_time', 0) - before.get('Innodb_row_lock_time', 0),
+        # 自实例启动以来的最大单次等待，非本次增量
+        'row_lock_time_max_ms': after.get('Innodb_row_lock_time_max'),
+        'deadlocks': None,
+    }
+    if before.get('lock_deadlocks') is not None and after.get('lock_deadlocks') is not None:
+        delta['deadlocks'] = after['lock_deadlocks'] - before['lock_deadlocks']
+    return delta
+
+
+# ---------------------------------------------------------------- 校验
+
+def verify(stats: WorkerStats, baseline: dict) -> list[str]:
+    """账本不变量校验，返回违反项描述"""
+    from django.db.models import Count, Max, Sum
+
+    from wxcloudrun.models import DiscountRedeemRecord, PointsRecord, SettlementOrder, UserPointsAccount
+
+    problems = []
+    sums = {
+        (row['user_id'], row['identity_type']): row['total']
+        for row in PointsRecord.objects.values('user_id', 'identity_type').annotate(total=Sum('change'))
+    }
+    last_ids = {
+        (row['user_id'], row['identity_type']): row['last_id']
+        for row in PointsRecord.objects.values('user_id', 'identity_type').annotate(last_id=Max('id'))
+    }
+    last_totals = {}
+    for batch in _batched(list(last_ids.values()), BATCH_SIZE):
+        last_totals.update(PointsRecord.objects.filter(id__in=batch).values_list('id', 'total_points'))
+
+    accounts = {
+        (user_id, identity): total
+        for user_id, identity, total in UserPointsAccount.objects.values_list('user_id', 'identity_type', 'total_points')
+    }
+    for key, total in accounts.items():
+        if total != sums.get(key, 0):
+            problems.append(f'账户 {key} total_points={total}，流水合计 {sums.get(key, 0)}')
+        elif key in last_ids and last_totals[last_ids[key]] != total:
+            problems.append(f'账户 {key} total_points={total}，最后一条流水 total_points={last_totals[last_ids[key]]}')
+    for key in sums.keys() - accounts.keys():
+        problems.append(f'流水 {key} 没有对应账户（合计 {sums[key]}）')
+
+    negative_accounts = UserPointsAccount.objects.filter(total_points__lt=0).count()
+    if negative_accounts:
+        problems.append(f'{negative_accounts} 个账户余额为负')
+    negative_records = PointsRecord.objects.filter(total_points__lt=0).count()
+    if negative_records:
+        problems.append(f'{negative_records} 条流水的余额为负')
+
+    new_records = PointsRecord.objects.filter(id__gt=baseline['max_record_id']).aggregate(
+        n=Count('id'), change=Sum('change'),
+    )
+    if new_records['n'] != stats.expected_records:
+        problems.append(f'新增流水 {new_records["n"]} 条，成功交易应产生 {stats.expected_records} 条')
+    if (new_records['change'] or 0) != stats.expected_change:
+        problems.append(f'新增流水积分净增 {new_records["change"] or 0}，成功交易应为 {stats.expected_change}')
+    orders = SettlementOrder.objects.count() - baseline['orders']
+    if orders != stats.ok['settle']:
+        problems.append(f'新增结算订单 {orders} 条，成功结算 {stats.ok["settle"]} 次')
+    redeems = DiscountRedeemRecord.objects.count() - baseline['redeems']
+    if redeems != stats.ok['redeem']:
+        problems.append(f'新增兑换记录 {redeems} 条，成功兑换 {stats.ok["redeem"]} 次')
+    return problems
+
+
+def _baseline() -> dict:
+    from django.db.models import Max
+
+    from wxcloudrun.models import DiscountRedeemRecord, PointsRecord, SettlementOrder
+
+    return {
+        'max_record_id': PointsRecord.objects.aggregate(m=Max('id'))['m'] or 0,
+        'orders': SettlementOrder.objects.count(),
+        'redeems': DiscountRedeemRecord.objects.count(),
+    }
+
+
+# ---------------------------------------------------------------- 报告
+
+def _ms_summary(seconds: list[float]) -> dict:
+    values = sorted(seconds)
+    return {
+        'count': len(values),
+        'p50_ms': round(_percentile(values, 50) * 1000, 3),
+        'p95_ms': round(_percentile(values, 95) * 1000, 3),
+        'p99_ms': round(_percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+        'total_ms': round(sum(values) * 1000, 3),
+    }
+
+
+def build_report(args, stats: WorkerStats, elapsed: float, lock_delta, problems: list[str]) -> dict:
+    from django.db import connection
+
+    operations = {}
+    for op in OPERATIONS:
+        if not stats.latencies[op]:
+            continue
+        operations[op] = {
+            'ok': stats.ok[op],
+            'rejected': stats.rejected[op],
+            'failed': stats.failed[op],
+            'deadlock_retries': stats.retries[op],
+            'retries_exhausted': stats.exhausted[op],
+            'tps': round(stats.ok[op] / elapsed, 2) if elapsed else 0.0,
+            'latency': _ms_summary(stats.latencies[op]),
+        }
+    ok = sum(stats.ok.values())
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'db': connection.vendor,
+            'owners': args.owners,
+            'merchants': args.merchants,
+            'properties': args.properties,
+            'hot_owners': args.hot_owners,
+            'cold_accounts': args.cold_accounts,
+            'processes': args.processes,
+            'threads': args.threads,
+            'mix': args.mix,
+            'python': platform.python_version(),
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'transactions': ok,
+        'tps': round(ok / elapsed, 2) if elapsed else 0.0,
+        'deadlock_retries': sum(stats.retries.values()),
+        'retries_exhausted': sum(stats.exhausted.values()),
+        'operations': operations,
+        'lock_wait': _ms_summary(stats.lock_waits),
+        'mysql_lock_status': lock_delta,
+        'failures': dict(stats.failures.most_common(20)),
+        'invariant_violations': problems[:100],
+        'invariants_ok': not problems,
+    }
+
+
+def print_summary(report: dict):
+    out = sys.stderr
+    print(f'\n{"交易":<10}{"成功":>8}{"拒绝":>8}{"失败":>8}{"重试":>8}{"TPS":>10}{"p50":>10}{"p95":>10}{"p99":>10}',
+          file=out)
+    for op, r in report['operations'].items():
+        lat = r['latency']
+        print(f'{op:<10}{r["ok"]:>8}{r["rejected"]:>8}{r["failed"] + r["retries_exhausted"]:>8}'
+              f'{r["deadlock_retries"]:>8}{r["tps"]:>10.1f}{lat["p50_ms"]:>10.2f}{lat["p95_ms"]:>10.2f}'
+              f'{lat["p99_ms"]:>10.2f}', file=out)
+    lock = report['lock_wait']
+    print(f'\n合计 {report["transactions"]} 笔，{report["tps"]:.1f} TPS，死锁/锁超时重试 {report["deadlock_retries"]} 次；'
+          f'FOR UPDATE {lock["count"]} 次，p95 {lock["p95_ms"]:.2f}ms，最长 {lock["max_ms"]:.2f}ms，'
+          f'累计 {lock["total_ms"] / 1000:.2f}s', file=out)
+    if report['mysql_lock_status']:
+        s = report['mysql_lock_status']
+        print(f'InnoDB 行锁等待 {s["row_lock_waits"]} 次，累计 {s["row_lock_time_ms"]}ms，死锁 {s["deadlocks"]}', file=out)
+    for failure, n in report['failures'].items():
+        print(f'  {n:>6} x {failure}', file=out)
+    if report['invariants_ok']:
+        print('账本校验通过', file=out)
+    else:
+        print('账本校验失败：', file=out)
+        for problem in report['invariant_violations']:
+            print(f'  - {problem}', file=out)
+
+
+# ---------------------------------------------------------------- 入口
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--db', choices=('sqlite', 'mysql'), default='sqlite')
+    parser.add_argument('--sqlite-path', default='/tmp/wxcloudrun-stress.sqlite3')
+    parser.add_argument('--i-know-this-flushes', action='store_true', help='允许删除/清空已有数据的压测库')
+    parser.add_argument('--owners', type=int, default=2000)
+    parser.add_argument('--merchants', type=int, default=100, help='编号能被 20 整除的为折扣店')
+    parser.add_argument('--properties', type=int, default=1, help='业主均匀分到各物业，1 表示全部向同一物业缴费')
+    parser.add_argument('--opening-balance', type=int, default=1000, help='每个业主的期初积分')
+    parser.add_argument('--cold-accounts', action='store_true', help='不预建商户、物业积分账户')
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='每个进程的并发线程数')
+    parser.add_argument('--duration', type=float, default=30.0, help='压测时长（秒）')
+    parser.add_argument('--per-worker', type=int, default=0, help='每个线程执行的交易数（非 0 时忽略 --duration）')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('pay=5,settle=4,redeem=1'))
+    parser.add_argument('--hot-owners', type=int, default=1, help='结算与兑换集中到的业主数')
+    parser.add_argument('--max-retries', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='', help='结果 JSON 文件（默认输出到标准输出）')
+    args = parser.parse_args(argv)
+    if args.owners < 1 or args.properties < 1 or args.merchants < 0:
+        parser.error('--owners、--properties 至少为 1')
+    if args.processes > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        parser.error('当前平台不支持 fork，请使用 --processes 1')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('CLOUD_ID', CLOUD_ENV)
+    os.environ['BENCH_DB'] = args.db
+    os.environ['BENCH_SQLITE_PATH'] = args.sqlite_path
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+    import django
+    django.setup()
+    from django.core.signals import got_request_exception
+
+    got_request_exception.connect(_remember_exception)
+    # 视图异常汇总在报告中，不再逐条输出堆栈
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+    plan = Plan(seed(args), args)
+    baseline = _baseline()
+    lock_before = mysql_lock_status()
+    _progress(f'开始压测：{args.processes} 进程 × {args.threads} 线程，'
+              + (f'每线程 {args.per_worker} 笔' if args.per_worker else f'{args.duration:g}s'))
+    stats, elapsed = run(plan, args)
+    lock_delta = lock_status_delta(lock_before, mysql_lock_status())
+    problems = verify(stats, baseline)
+
+    report = build_report(args, stats, elapsed, lock_delta, problems)
+    print_summary(report)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,441 @@
+"""微信开放接口本地替身（离线压测 / CI 用）
+
+实现项目用到的接口，响应格式与线上一致：
+- tcb/batchdownloadfile：按文件 ID 生成确定性的临时下载 URL（带过期时间与签名），
+  GET /files/... 校验签名与有效期：过期返回 403，可用来发现缓存了过期 URL 的问题
+- tcb/uploadfile：返回上传地址与签名字段
+- tcb/batchdeletefile：逐个返回删除结果
+- wxa/business/getuserphonenumber：按 code 生成确定性手机号
+
+可模拟的线上行为：
+- 延迟分布：fixed:MS / uniform:MIN:MAX / normal:MEAN:STD / lognormal:MEDIAN:SIGMA（毫秒），
+  --api-latency 可按接口单独设置；批量接口另按条目数叠加 --per-item-ms
+- 故障注入：--error-rate 比例的请求返回 errcode=-1（errcode）、HTTP 502（http）、
+  超过客户端 10 秒超时才响应（timeout），mixed 为三者随机；--file-error-rate 为批量下载中单个文件失败的比例
+- 限流：每个接口每秒 --rate-limit 次（令牌桶，突发 --burst），超出返回 errcode=45011
+- 统计：GET /__stats 返回各接口调用、注入错误、限流次数与延迟；POST /__reset 清零
+
+独立运行（然后让应用指向它：WX_OPENAPI_BASE=http://127.0.0.1:8081 CLOUD_ID=stub-env）：
+    python benchmarks/wx_openapi_stub.py [--host 127.0.0.1] [--port 8081] [--latency lognormal:30:0.5]
+        [--api-latency tcb/batchdownloadfile=lognormal:60:0.6] [--per-item-ms 0.5]
+        [--error-rate 0.01] [--error-mode errcode|http|timeout|mixed] [--file-error-rate 0]
+        [--rate-limit 0] [--burst 0] [--max-age 0] [--url-window 60] [--seed 1]
+
+在进程内启动：
+    stub = WxOpenApiStub(StubConfig(latency='fixed:20')).start()
+    os.environ['WX_OPENAPI_BASE'] = stub.base_url   # 须在导入 wxcloudrun.services.storage_service 之前设置
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+URL_SECRET = b'wx-openapi-stub'
+CLIENT_TIMEOUT_SECONDS = 10  # storage_service 中 requests.post 的超时
+ERROR_MODES = ('errcode', 'http', 'timeout', 'mixed')
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+class LatencyModel:
+    """按规格字符串生成延迟（秒）：fixed:MS / uniform:MIN:MAX / normal:MEAN:STD / lognormal:MEDIAN:SIGMA"""
+
+    KINDS = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+
+    def __init__(self, spec: str = 'fixed:0'):
+        kind, _, rest = spec.partition(':')
+        try:
+            params = [float(p) for p in rest.split(':')] if rest else []
+        except ValueError:
+            raise ValueError(f'延迟参数必须是数字: {spec}') from None
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f'无法识别的延迟规格: {spec}（示例 fixed:20、uniform:10:50、normal:30:5、lognormal:30:0.5）')
+        self.spec = spec
+        self.kind = kind
+        self.params = params
+
+    def sample(self, rnd: random.Random) -> float:
+        if self.kind == 'fixed':
+            ms = self.params[0]
+        elif self.kind == 'uniform':
+            ms = rnd.uniform(*self.params)
+        elif self.kind == 'normal':
+            ms = rnd.gauss(*self.params)
+        else:
+            median, sigma = self.params
+            ms = rnd.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return max(ms, 0.0) / 1000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+@dataclass
+class StubConfig:
+    latency: str = 'fixed:0'
+    api_latency: dict = field(default_factory=dict)  # 接口路径（不带前导 /）-> 延迟规格
+    per_item_ms: float = 0.0
+    error_rate: float = 0.0
+    error_mode: str = 'errcode'
+    file_error_rate: float = 0.0
+    rate_limit: float = 0.0  # 每个接口每秒请求数，0 不限
+    burst: float = 0.0
+    max_age: int = 0  # 非 0 时覆盖请求中的 max_age（秒），用于快速验证过期处理
+    url_window: int = 60  # 临时 URL 签发时间按此粒度取整，窗口内同一文件得到相同 URL
+    seed: int = 1
+
+    def __post_init__(self):
+        if self.error_mode not in ERROR_MODES:
+            raise ValueError(f'error_mode 必须是 {"/".join(ERROR_MODES)} 之一')
+
+
+class WxOpenApiStub:
+    """在后台线程中运行的开放接口替身"""
+
+    def __init__(self, config: StubConfig | None = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self._default_latency = LatencyModel(self.config.latency)
+        self._api_latency = {
+            '/' + path.strip('/'): LatencyModel(spec) for path, spec in self.config.api_latency.items()
+        }
+        self._rnd = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._server = None
+        self._thread = None
+        self.reset()
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    # ------------------------------------------------------------ 统计
+
+    def reset(self):
+        with self._lock:
+            self.calls: Counter = Counter()
+            self.errors: Counter = Counter()
+            self.rate_limited: Counter = Counter()
+            self.latency_ms: dict[str, list] = {}  # 接口 -> [次数, 累计毫秒]
+            self.downloads: Counter = Counter()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'injected_errors': dict(self.errors),
+                'rate_limited': dict(self.rate_limited),
+                'mean_latency_ms': {path: round(total / n, 3) for path, (n, total) in self.latency_ms.items()},
+                'file_downloads': dict(self.downloads),
+            }
+
+    # ------------------------------------------------------------ 行为
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rnd.random()
+
+    def admit(self, path: str) -> bool:
+        """限流检查（按接口独立计数），同时记一次调用"""
+        with self._lock:
+            self.calls[path] += 1
+            if self.config.rate_limit <= 0:
+                return True
+            bucket = self._buckets.get(path)
+            if bucket is None:
+                bucket = self._buckets[path] = TokenBucket(self.config.rate_limit, self.config.burst)
+            if bucket.take():
+                return True
+            self.rate_limited[path] += 1
+            return False
+
+    def delay(self, path: str, items: int) -> float:
+        model = self._api_latency.get(path, self._default_latency)
+        with self._lock:
+            seconds = model.sample(self._rnd) + items * self.config.per_item_ms / 1000
+            entry = self.latency_ms.setdefault(path, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds * 1000
+        return seconds
+
+    def injected_error(self, path: str):
+        """按 error_rate 决定是否注入故障，返回故障类型或 None"""
+        if self.config.error_rate <= 0 or self._random() >= self.config.error_rate:
+            return None
+        mode = self.config.error_mode
+        if mode == 'mixed':
+            with self._lock:
+                mode = self._rnd.choice(ERROR_MODES[:-1])
+        with self._lock:
+            self.errors[f'{path}:{mode}'] += 1
+        return mode
+
+    def temp_url(self, fileid: str, max_age: int, now: float | None = None) -> str:
+        """确定性的临时 URL：同一文件在同一签发窗口内 URL 相同，过期时间 = 窗口起点 + max_age"""
+        window = max(1, self.config.url_window)
+        issued = int(now if now is not None else time.time()) // window * window
+        expires = issued + (self.config.max_age or max_age)
+        key = _digest(fileid)
+        sign = hmac.new(URL_SECRET, f'{key}:{expires}'.encode(), hashlib.sha1).hexdigest()[:16]
+        return f'{self.base_url}/files/{key}?expires={expires}&sign={sign}'
+
+    def check_url(self, key: str, expires: str, sign: str, now: float | None = None) -> tuple[int, str]:
+        expected = hmac.new(URL_SECRET, f'{key}:{expires}'.encode(), hashlib.sha1).hexdigest()[:16]
+        if not hmac.compare_digest(expected, sign):
+            return 403, 'SignatureDoesNotMatch'
+        try:
+            expired = int(expires) < (now if now is not None else time.time())
+        except ValueError:
+            return 403, 'SignatureDoesNotMatch'
+        if expired:
+            with self._lock:
+                self.downloads['expired'] += 1
+            return 403, 'Request has expired'
+        with self._lock:
+            self.downloads['ok'] += 1
+        return 200, 'ok'
+
+    # ------------------------------------------------------------ 接口
+
+    def batch_download_file(self, body: dict) -> dict:
+        file_list = []
+        for item in body.get('file_list') or []:
+            fileid = item.get('fileid', '')
+            if self.config.file_error_rate and self._random() < self.config.file_error_rate:
+                file_list.append({'fileid': fileid, 'download_url': '', 'status': -503003, 'errmsg': 'file not exist'})
+                continue
+            file_list.append({
+                'fileid': fileid,
+                'download_url': self.temp_url(fileid, int(item.get('max_age') or 7200)),
+                'status': 0,
+                'errmsg': 'ok',
+            })
+        return {'errcode': 0, 'errmsg': 'ok', 'file_list': file_list}
+
+    def upload_file(self, body: dict) -> dict:
+        path = body.get('path', '')
+        return {
+            'errcode': 0,
+            'errmsg': 'ok',
+            'url': f'{self.base_url}/upload',
+            'token': _digest(f'token:{path}'),
+            'authorization': _digest(f'auth:{path}'),
+            'file_id': f"cloud://{body.get('env', 'stub-env')}.stub/{path}",
+            'cos_file_id': _digest(f'cos:{path}'),
+        }
+
+    def batch_delete_file(self, body: dict) -> dict:
+        return {
+            'errcode': 0,
+            'errmsg': 'ok',
+            'delete_list': [{'fileid': fid, 'status': 0, 'errmsg': 'ok'} for fid in body.get('fileid_list') or []],
+        }
+
+    def get_user_phone_number(self, body: dict) -> dict:
+        number = '138' + str(int(_digest(body.get('code', '')), 16))[:8]
+        return {
+            'errcode': 0,
+            'errmsg': 'ok',
+            'phone_info': {'phoneNumber': number, 'purePhoneNumber': number, 'countryCode': '86'},
+        }
+
+    def handler_for(self, path: str):
+        return {
+            '/tcb/batchdownloadfile': self.batch_download_file,
+            '/tcb/uploadfile': self.upload_file,
+            '/tcb/batchdeletefile': self.batch_delete_file,
+            '/wxa/business/getuserphonenumber': self.get_user_phone_number,
+        }.get(path)
+
+    # ------------------------------------------------------------ 生命周期
+
+    def start(self) -> 'WxOpenApiStub':
+        self._server = _StubServer((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='wx-openapi-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server = _StubServer((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _item_count(body: dict) -> int:
+    return len(body.get('file_list') or body.get('fileid_list') or [])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_StubServer'
+
+    def do_POST(self):
+        stub = self.server.stub
+        path = urlsplit(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if path == '/__reset':
+            stub.reset()
+            return self._send_json(200, {'errcode': 0, 'errmsg': 'ok'})
+
+        handler = stub.handler_for(path)
+        if handler is None:
+            return self._send_json(404, {'errcode': 404, 'errmsg': f'unknown api {path}'})
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return self._send_json(400, {'errcode': 40001, 'errmsg': 'invalid json'})
+
+        if not stub.admit(path):
+            return self._send_json(200, {'errcode': 45011, 'errmsg': 'api minute-quota reach limit mustslower retry next minute'})
+        time.sleep(stub.delay(path, _item_count(body)))
+        error = stub.injected_error(path)
+        if error == 'errcode':
+            return self._send_json(200, {'errcode': -1, 'errmsg': 'system error'})
+        if error == 'http':
+            return self._send_json(502, {'errcode': -1, 'errmsg': 'bad gateway'})
+        if error == 'timeout':
+            time.sleep(CLIENT_TIMEOUT_SECONDS + 1)
+        self._send_json(200, handler(body))
+
+    def do_GET(self):
+        stub = self.server.stub
+        parts = urlsplit(self.path)
+        if parts.path == '/__stats':
+            return self._send_json(200, stub.stats())
+        if parts.path.startswith('/files/'):
+            query = parse_qs(parts.query)
+            status, message = stub.check_url(
+                parts.path[len('/files/'):], (query.get('expires') or [''])[0], (query.get('sign') or [''])[0],
+            )
+            data = b'stub-file-content' if status == 200 else message.encode()
+            return self._send(status, data, 'application/octet-stream' if status == 200 else 'text/plain')
+        self._send_json(404, {'errcode': 404, 'errmsg': 'not found'})
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, data: bytes, content_type: str):
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已超时断开（注入 timeout 时属于预期）
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, stub: WxOpenApiStub):
+        super().__init__(address, _Handler)
+        self.stub = stub
+
+
+def _latency_arg(spec: str) -> str:
+    try:
+        LatencyModel(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+    return spec
+
+
+def _api_latency_arg(value: str) -> tuple[str, str]:
+    path, sep, spec = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError('格式为 接口路径=延迟规格，如 tcb/batchdownloadfile=lognormal:60:0.6')
+    return path.strip('/'), _latency_arg(spec)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='微信开放接口本地替身')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=_latency_arg, default='fixed:0', help='默认延迟规格（毫秒）')
+    parser.add_argument('--api-latency', type=_api_latency_arg, action='append', default=[],
+                        help='按接口设置延迟，可重复：tcb/batchdownloadfile=lognormal:60:0.6')
+    parser.add_argument('--per-item-ms', type=float, default=0.0, help='批量接口每个条目额外延迟（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-mode', choices=ERROR_MODES, default='errcode')
+    parser.add_argument('--file-error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='每个接口每秒请求数（0 不限）')
+    parser.add_argument('--burst', type=float, default=0.0)
+    parser.add_argument('--max-age', type=int, default=0, help='覆盖临时 URL 有效期（秒）')
+    parser.add_argument('--url-window', type=int, default=60, help='临时 URL 签发时间取整粒度（秒）')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = StubConfig(
+        latency=args.latency,
+        api_latency=dict(args.api_latency),
+        per_item_ms=args.per_item_ms,
+        error_rate=args.error_rate,
+        error_mode=args.error_mode,
+        file_error_rate=args.file_error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        max_age=args.max_age,
+        url_window=args.url_window,
+        seed=args.seed,
+    )
+    stub = WxOpenApiStub(config, host=args.host, port=args.port)
+    print(f'微信开放接口替身监听 http://{args.host}:{args.port}（WX_OPENAPI_BASE 指向此地址）', flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
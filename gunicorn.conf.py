@@ -0,0 +1,136 @@
+"""gunicorn 生产启动配置（Dockerfile 默认 CMD：gunicorn -c gunicorn.conf.py）
+
+环境变量：
+- PORT：监听端口，默认 80
+- SERVER_MODE：wsgi（默认，gthread 多进程多线程）或 asgi（uvicorn worker，通知 SSE 长连接需要此模式）。
+  asgi 模式下只有 SSE 长连接在事件循环中挂起，其余请求仍在每个 worker 的 GUNICORN_THREADS 线程池中执行
+  （见 wxcloudrun/asgi.py），普通接口的并发能力与 wsgi 模式相同，worker 数无需调整
+- WEB_CONCURRENCY：worker 进程数，默认容器可用 CPU 数 * 2 + 1（1 核容器为 3 个）。可用 CPU 数取 cgroup 配额
+  （/sys/fs/cgroup/cpu.max，或 cgroup v1 的 cpu.cfs_quota_us），未限额时取进程可调度的 CPU 数（taskset 生效），
+  不使用宿主机核数
+- GUNICORN_THREADS：每个 worker 处理普通请求的线程数（两种模式均适用），默认 4
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT：请求超时与优雅退出等待时间（秒）
+- GUNICORN_MAX_REQUESTS：worker 处理多少请求后重启（带随机抖动），0 表示不重启
+- GUNICORN_ACCESS_LOG：设为 1 时输出访问日志到标准输出
+- JOB_WORKER_EMBEDDED：后台任务队列（评分刷新、云文件删除等）的内置消费者。生产环境推荐单独部署
+  manage.py runworker 服务并设为 0；默认 1 时每个实例通过文件锁（JOB_WORKER_LOCK_FILE）只让一个 worker 进程轮询队列
+- JOB_WORKER_CONCURRENCY / JOB_WORKER_POLL_INTERVAL：内置后台任务线程的并发数（默认 1）与空闲轮询间隔（秒，默认 2）
+
+应用在 master 中预加载后再 fork，worker 共享已导入的代码（写时复制），启动更快、内存更省。
+"""
+import logging
+import math
+import os
+
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').strip().lower()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '80')}"
+
+
+def _read_cgroup_quota():
+    """cgroup 的 CPU 配额（核数，可为小数）；未限额或无法读取时返回 None"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """容器实际可用的 CPU 数：cgroup 配额与可调度 CPU 数取小（os.cpu_count() 是宿主机核数）"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _read_cgroup_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+workers = int(os.environ.get('WEB_CONCURRENCY') or available_cpus() * 2 + 1)
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'wxcloudrun.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'wxcloudrun.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '20'))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+# 云托管网关转发的 X-Forwarded-* 头
+forwarded_allow_ips = '*'
+errorlog = '-'
+accesslog = '-' if os.environ.get('GUNICORN_ACCESS_LOG') == '1' else None
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+JOB_WORKER_EMBEDDED = os.environ.get('JOB_WORKER_EMBEDDED', '1') == '1'
+
+
+def on_starting(server):
+    # 清理上次运行遗留的指标快照（计数随实例重启归零）
+    from wxcloudrun.utils.metrics import store
+
+    store.reset()
+
+
+def pre_fork(server, worker):
+    # 预加载期间建立的数据库连接不能被子进程共享
+    from django.db import connections
+
+    from wxcloudrun.db.pool import close_pools
+
+    connections.close_all()
+    close_pools()
+
+
+def post_worker_init(worker):
+    # 被超时强制结束的旧 worker 未能归档指标，由新 worker 补并入 archive.json
+    from wxcloudrun.utils.metrics import store
+
+    store.collect_dead()
+
+    # 后台任务线程须在 fork 之后的 worker 进程中启动
+    if JOB_WORKER_EMBEDDED:
+        from wxcloudrun.services.job_queue import start_embedded_worker
+
+        start_embedded_worker(
+            concurrency=int(os.environ.get('JOB_WORKER_CONCURRENCY', '1')),
+            poll_interval=float(os.environ.get('JOB_WORKER_POLL_INTERVAL', '2')),
+        )
+
+
+def worker_exit(server, worker):
+    # 优雅退出：等待执行中的后台任务，释放数据库连接，写完日志队列后关闭日志处理器
+    from django.db import connections
+
+    from wxcloudrun.db.pool import close_pools
+    from wxcloudrun.services.job_queue import stop_embedded_worker
+    from wxcloudrun.utils.log_handlers import stop_queue_logging
+    from wxcloudrun.utils.metrics import flush_on_exit
+
+    stop_embedded_worker(timeout=graceful_timeout)
+    connections.close_all()
+    close_pools()
+    flush_on_exit()
+    stop_queue_logging()
+    logging.shutdown()
@@ -9,7 +9,9 @@ from .models import (
     ApiPermission,
     IdentityApplication,
     AccessLog,
+    BackgroundJob,
 )
+from .services.job_queue import retry_jobs
 
 
 # 已移除 Counters 模型的后台管理注册
@@ -96,6 +98,21 @@ class AccessLogAdmin(admin.ModelAdmin):
     readonly_fields = ("first_access_at", "last_access_at")
 
 
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "job_type", "status", "attempts", "max_attempts", "run_at", "locked_by", "updated_at")
+    search_fields = ("job_type", "dedupe_key", "last_error")
+    list_filter = ("status", "job_type")
+    ordering = ("-id",)
+    readonly_fields = ("created_at", "updated_at", "finished_at", "locked_at", "locked_by")
+    actions = ("requeue_jobs",)
+
+    @admin.action(description="重新入队所选任务")
+    def requeue_jobs(self, request, queryset):
+        count = retry_jobs(queryset.values_list("id", flat=True))
+        self.message_user(request, f"已重新入队 {count} 个任务")
+
+
 # 自定义 Admin 站点文案
 admin.site.site_header = "后台管理"
 admin.site.site_title = "后台管理"
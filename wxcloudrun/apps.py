@@ -6,3 +6,7 @@ class AppNameConfig(AppConfig):
     name = 'wxcloudrun'
     # 在 Django Admin 中显示为中文分组名称
     verbose_name = 'wxcloudrun 业务模型'
+
+    def ready(self):
+        # 注册模型信号（维护缓存/派生数据）
+        from wxcloudrun import signals  # noqa: F401
@@ -5,12 +5,89 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+
+除通知 SSE 长连接外，请求仍按 WSGI 交给 Django，在每个 worker 的固定线程池（GUNICORN_THREADS 个线程）中执行，
+并发能力与 gthread 模式相同。Django 3.2 的 ASGI 处理器会把同步视图全部放到同一个线程
+（sync_to_async(thread_sensitive=True)）执行，一个 worker 同一时刻只能处理一个普通请求，因此不用它。
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wxcloudrun.settings')
 
-application = get_asgi_application()
+django_application = get_wsgi_application()
+
+# SSE 路由依赖 ORM，需在 Django 初始化之后导入
+from wxcloudrun.sse import is_stream_request, notification_stream  # noqa: E402
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # 在 worker 进程中首次请求时创建（gunicorn 预加载后 fork，线程不能在 master 中创建）
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('GUNICORN_THREADS', '4')),
+            thread_name_prefix='wsgi',
+        )
+    return _executor
+
+
+# asgiref 的 run_wsgi_app 由 @sync_to_async 包装，取出其中的同步实现，沿用其重复请求头 400、按 Content-Length 截断等处理
+_base_run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    """WsgiToAsgi 默认在单一线程中执行 WSGI 应用，这里改为共享线程池；
+    同时按 WSGI 规范在响应结束后调用 close()（触发 request_finished，关闭或归还数据库连接）"""
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=_get_executor())(body)
+
+    def _run_wsgi_app(self, body):
+        results = []
+        application = self.wsgi_application
+
+        def tracked_application(environ, start_response):
+            result = application(environ, start_response)
+            results.append(result)
+            return result
+
+        self.wsgi_application = tracked_application
+        try:
+            _base_run_wsgi_app(self, body)
+        finally:
+            self.wsgi_application = application
+            for result in results:
+                if hasattr(result, 'close'):
+                    result.close()
+
+
+class _PooledWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_bridge = _PooledWsgiToAsgi(django_application)
+
+
+async def application(scope, receive, send):
+    if is_stream_request(scope):
+        await notification_stream(scope, receive, send)
+        return
+    if scope['type'] == 'lifespan':
+        # 无启动/关闭逻辑，直接确认
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    await wsgi_bridge(scope, receive, send)
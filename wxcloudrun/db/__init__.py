@@ -0,0 +1 @@
+"""数据库后端扩展：连接复用（健康检查 + 进程内连接池）与连接指标，见 wxcloudrun/db/pool.py"""
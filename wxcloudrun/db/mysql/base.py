@@ -0,0 +1,19 @@
+"""MySQL 后端：在 Django 自带 MySQL 后端（PyMySQL）基础上增加连接复用层
+
+settings.DATABASES 中 ENGINE 设为 'wxcloudrun.db.mysql'，额外配置项：
+- CONN_MAX_AGE：连接最长存活秒数（Django 原生配置，0 表示每个请求结束即关闭）
+- CONN_HEALTH_CHECKS：复用连接前先 ping 一次，失效则重连（默认开启）
+- POOL_SIZE：每个 worker 进程最多缓存的空闲连接数，0 表示不启用连接池
+"""
+from django.db.backends.mysql import base
+
+from wxcloudrun.db.pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    def ping_connection(self, raw_connection):
+        # PyMySQL 的 ping 默认自动重连，这里关闭重连以便准确统计失效连接
+        try:
+            raw_connection.ping(reconnect=False)
+        except TypeError:
+            raw_connection.ping()
@@ -0,0 +1,231 @@
+"""数据库连接复用层
+
+- 持久连接 + 健康检查：配合 CONN_MAX_AGE 在请求之间复用连接；每个请求首次使用连接前先 ping 一次，
+  失效（MySQL wait_timeout 断开、网络闪断等）则丢弃并重新建立，不把 "MySQL server has gone away" 抛给业务
+- 进程内连接池（POOL_SIZE > 0）：线程关闭连接时不断开，而是放回本进程的空闲队列，
+  之后任意线程建立连接时优先取用（取出前 ping 校验），省去 TCP 握手、认证与会话初始化；
+  池中连接从建立起超过 POOL_MAX_AGE 秒即淘汰。启用连接池时可将 CONN_MAX_AGE 设为 0，
+  让空闲线程在请求结束后归还连接，进程内的连接总数由池大小约束
+- 指标：connection_stats() 返回本进程新建/复用/归还/关闭/健康检查失败等计数
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+DEFAULT_POOL_MAX_AGE = 300
+
+_stats_lock = threading.Lock()
+_stats = {
+    'opened': 0,               # 新建的物理连接
+    'reused': 0,               # 请求间复用的持久连接（通过健康检查）
+    'pool_hits': 0,            # 从连接池取出的连接
+    'pool_returned': 0,        # 归还到连接池的连接
+    'closed': 0,               # 真正断开的物理连接
+    'health_check_failed': 0,  # 健康检查失败被丢弃的连接
+}
+
+_pools: dict[str, 'ConnectionPool'] = {}
+_pools_lock = threading.Lock()
+
+
+def _incr(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def connection_stats() -> dict:
+    """本进程的连接指标快照"""
+    with _stats_lock:
+        stats = dict(_stats)
+    with _pools_lock:
+        pools = list(_pools.values())
+    stats['pool_idle'] = sum(pool.idle_count() for pool in pools)
+    return stats
+
+
+def _close_quietly(raw_connection):
+    try:
+        raw_connection.close()
+    except Exception:
+        pass
+    _incr('closed')
+
+
+class ConnectionPool:
+    """单个数据库别名在本进程内的空闲连接池（线程安全；fork 后子进程中自动清空）"""
+
+    def __init__(self, size: int, max_age: Optional[float]):
+        self.size = size
+        self.max_age = max_age
+        self._idle: deque = deque()  # (raw_connection, created_at)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        # 子进程不能使用继承自父进程的 socket，直接丢弃（不关闭，以免断开父进程的连接）
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._pid = os.getpid()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_age is not None and now - created_at >= self.max_age
+
+    def acquire(self):
+        """取出最近归还的未过期连接 (raw_connection, created_at)，没有时返回 None"""
+        now = time.monotonic()
+        expired = []
+        item = None
+        with self._lock:
+            self._check_pid()
+            while self._idle:
+                # 后进先出：最近使用的连接被服务端超时断开的可能性最小
+                conn, created_at = self._idle.pop()
+                if self._expired(created_at, now):
+                    expired.append(conn)
+                    continue
+                item = (conn, created_at)
+                break
+        for conn in expired:
+            _close_quietly(conn)
+        return item
+
+    def release(self, raw_connection, created_at: float) -> bool:
+        """归还连接；池已满或连接已过期时返回 False，由调用方关闭"""
+        if self._expired(created_at, time.monotonic()):
+            return False
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) >= self.size:
+                return False
+            self._idle.append((raw_connection, created_at))
+        return True
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle) if self._pid == os.getpid() else 0
+
+    def close_all(self):
+        with self._lock:
+            self._check_pid()
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+
+def get_pool(alias: str, settings_dict: dict) -> Optional[ConnectionPool]:
+    size = int(settings_dict.get('POOL_SIZE') or 0)
+    if size <= 0:
+        return None
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(size, settings_dict.get('POOL_MAX_AGE', DEFAULT_POOL_MAX_AGE))
+        return pool
+
+
+def close_pools():
+    """断开本进程所有连接池中的空闲连接（gunicorn fork 前与 worker 退出时调用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledConnectionMixin:
+    """混入 Django DatabaseWrapper，提供健康检查、连接池与指标（放在后端类之前）"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_checks_enabled = self.settings_dict.get('CONN_HEALTH_CHECKS', True)
+        self.health_check_done = False
+        self.connection_created_at = None
+        self._from_pool = False
+        self._discard_connection = False
+
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        return get_pool(self.alias, self.settings_dict)
+
+    def ping_connection(self, raw_connection):
+        """校验物理连接可用，失败时抛出异常（后端可覆盖为更轻量的实现）"""
+        cursor = raw_connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def _connection_usable(self, raw_connection) -> bool:
+        try:
+            self.ping_connection(raw_connection)
+        except Exception:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is not None:
+            item = pool.acquire()
+            while item is not None:
+                raw_connection, created_at = item
+                if self._connection_usable(raw_connection):
+                    _incr('pool_hits')
+                    self._from_pool = True
+                    self.connection_created_at = created_at
+                    return raw_connection
+                _incr('health_check_failed')
+                _close_quietly(raw_connection)
+                item = pool.acquire()
+        raw_connection = super().get_new_connection(conn_params)
+        _incr('opened')
+        self._from_pool = False
+        self.connection_created_at = time.monotonic()
+        return raw_connection
+
+    def init_connection_state(self):
+        # 池中连接建立时已完成会话初始化
+        if not self._from_pool:
+            super().init_connection_state()
+
+    def connect(self):
+        self._discard_connection = False
+        super().connect()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        # 每个请求首次在跨请求保留的连接上执行 SQL 前检查一次
+        if self.connection is not None and not self.health_check_done:
+            self.health_check_done = True
+            if self.health_checks_enabled and not self.in_atomic_block and not self._connection_usable(self.connection):
+                _incr('health_check_failed')
+                self._discard_connection = True
+                self.close()
+            else:
+                _incr('reused')
+        return super()._cursor(name)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _can_return_to_pool(self) -> bool:
+        return not (
+            self._discard_connection
+            or self.in_atomic_block
+            or self.errors_occurred
+            or not self.autocommit
+            or self.connection_created_at is None
+        )
+
+    def _close(self):
+        pool = self.pool
+        if pool is not None and self._can_return_to_pool():
+            if pool.release(self.connection, self.connection_created_at):
+                _incr('pool_returned')
+                return
+        _incr('closed')
+        return super()._close()
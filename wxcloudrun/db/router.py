@@ -0,0 +1,220 @@
+"""读写分离路由
+
+配置了 'replica' 数据库（settings 中 MYSQL_REPLICA_ADDRESS）时：
+- 写操作与事务内的读取始终走主库
+- 只有显式标记的只读代码（视图装饰器 replica_reads、上下文管理器 read_replica）中的查询走副本，
+  未标记的代码默认读主库
+- 写后读一致：一个请求执行过 INSERT/UPDATE/DELETE 后，本请求剩余的读取走主库；
+  响应中附带签名的写入时间（Cookie db_pin 与响应头 X-DB-Pin），客户端在 DB_REPLICA_PIN_SECONDS 秒内
+  带回该值（Cookie 或请求头 X-DB-Pin）的请求都读主库。固定状态随客户端携带，不依赖处理请求的 worker 或实例；
+  同时在 Django 缓存中按用户（openid / 管理员 Token）记录一份，覆盖不回传 Cookie/请求头的客户端
+  （默认进程内缓存只对同一 worker 生效）
+- 延迟回退：每个进程每 DB_REPLICA_LAG_CHECK_INTERVAL 秒检查一次副本复制延迟，
+  超过 DB_REPLICA_MAX_LAG 秒、复制中断或副本不可达时读主库
+"""
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+logger = logging.getLogger('log')
+
+REPLICA_ALIAS = 'replica'
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+PIN_CACHE_PREFIX = 'db:pin:'
+PIN_COOKIE = 'db_pin'
+PIN_HEADER = 'X-DB-Pin'
+PIN_SALT = 'wxcloudrun.db.router.pin'
+
+
+class RoutingState:
+    """单个请求（或 read_replica 上下文）的路由状态"""
+
+    def __init__(self, pin_key: Optional[str] = None, client_pinned: bool = False):
+        self.replica_depth = 0
+        self.wrote = False
+        self.pin_key = pin_key
+        self._pinned = True if client_pinned else None
+
+    @property
+    def pinned(self) -> bool:
+        if self._pinned is None:
+            self._pinned = bool(self.pin_key) and cache.get(self.pin_key) is not None
+        return self._pinned
+
+
+def make_pin_token() -> str:
+    """签名的写入时间，客户端带回后在 DB_REPLICA_PIN_SECONDS 秒内读主库"""
+    return signing.TimestampSigner(salt=PIN_SALT).sign('w')
+
+
+def pin_token_valid(token: Optional[str]) -> bool:
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=PIN_SALT).unsign(token, max_age=settings.DB_REPLICA_PIN_SECONDS)
+    except signing.BadSignature:
+        # 篡改或已过期（SignatureExpired 是 BadSignature 的子类）
+        return False
+    return True
+
+
+_state: contextvars.ContextVar[Optional[RoutingState]] = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def replica_configured() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class _ReplicaHealth:
+    """进程内缓存的副本复制延迟检查结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._healthy = True
+
+    def _measure_lag(self) -> Optional[float]:
+        """返回复制延迟秒数；复制中断时返回 None。非 MySQL 或非复制实例视为无延迟。"""
+        connection = connections[REPLICA_ALIAS]
+        if connection.vendor != 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return 0.0
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute('SHOW REPLICA STATUS')
+            except Exception:
+                # MySQL 8.0.22 之前只支持 SHOW SLAVE STATUS
+                cursor.execute('SHOW SLAVE STATUS')
+            row = cursor.fetchone()
+            if row is None:
+                return 0.0
+            columns = [col[0] for col in cursor.description]
+        status = dict(zip(columns, row))
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else float(lag)
+
+    def healthy(self) -> bool:
+        interval = settings.DB_REPLICA_LAG_CHECK_INTERVAL
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return self._healthy
+        # 只让一个线程去检查，其它线程沿用上次结果
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            try:
+                lag = self._measure_lag()
+                reason = 'replication stopped' if lag is None else f'lag={lag}s'
+                healthy = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG
+            except Exception as exc:
+                reason, healthy = f'error={exc}', False
+            if healthy != self._healthy:
+                if healthy:
+                    logger.info(f'只读副本恢复，读请求切回副本: {reason}')
+                else:
+                    logger.warning(f'只读副本不可用，读请求回退主库: {reason}')
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+            return healthy
+        finally:
+            self._lock.release()
+
+
+replica_health = _ReplicaHealth()
+
+
+@contextmanager
+def read_replica():
+    """标记只读代码块：其中的查询优先走副本（可作装饰器使用：@read_replica()）"""
+    state = _state.get()
+    token = None
+    if state is None:
+        state = RoutingState()
+        token = _state.set(state)
+    state.replica_depth += 1
+    try:
+        yield
+    finally:
+        state.replica_depth -= 1
+        if token is not None:
+            _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_depth or state.wrote or not replica_configured():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or state.pinned:
+            return DEFAULT_DB_ALIAS
+        if not replica_health.healthy():
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+def _pin_key(request) -> Optional[str]:
+    identity = request.headers.get('X-WX-OPENID') or request.headers.get('Authorization')
+    if not identity:
+        return None
+    return PIN_CACHE_PREFIX + hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """为每个请求建立路由状态，记录写操作并在写后将该用户短时间固定到主库"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        client_token = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+        state = RoutingState(_pin_key(request), client_pinned=pin_token_valid(client_token))
+        token = _state.set(state)
+
+        def track_writes(execute, sql, params, many, context):
+            if not state.wrote and sql.lstrip()[:7].upper().startswith(WRITE_PREFIXES):
+                state.wrote = True
+            return execute(sql, params, many, context)
+
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(track_writes):
+                response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            pin_token = make_pin_token()
+            response.set_cookie(
+                PIN_COOKIE,
+                pin_token,
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+            response[PIN_HEADER] = pin_token
+            if state.pin_key:
+                cache.set(state.pin_key, 1, settings.DB_REPLICA_PIN_SECONDS)
+        return response
@@ -1,5 +1,6 @@
 """视图装饰器"""
 import logging
+from wxcloudrun.db.router import read_replica
 from wxcloudrun.utils.auth import get_openid, ensure_userinfo_exists, get_admin_from_token
 from wxcloudrun.utils.responses import json_err
 
@@ -38,3 +39,10 @@ def admin_token_required(view_func):
         return view_func(request, admin=admin, *args, **kwargs)
     return _wrapped
 
+
+def replica_reads(view_func):
+    """只读视图：查询优先走只读副本（未配置副本、用户刚写入或副本延迟过大时仍读主库）。"""
+    def _wrapped(request, *args, **kwargs):
+        with read_replica():
+            return view_func(request, *args, **kwargs)
+    return _wrapped
@@ -5,3 +5,7 @@ class WxOpenApiError(Exception):
     """微信开放接口调用异常"""
     pass
 
+
+class QueryBudgetExceeded(AssertionError):
+    """视图执行的 SQL 条数超出 query_budget 预算（开发/测试环境抛出）"""
+    pass
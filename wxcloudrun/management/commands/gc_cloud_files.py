@@ -0,0 +1,57 @@
+"""回收无引用的云存储文件
+
+用法：python manage.py gc_cloud_files [--grace-hours 24] [--batch-size 500] [--chunk-size 50] [--rate 2] [--dry-run]
+按 id 分批扫描已登记的云文件（CloudFile），与引用索引（CloudFileReference）求差，
+宽限期内仍无引用的文件分块调用 tcb/batchdeletefile 删除，调用频率受 --rate 限制。
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.services.cloud_file_service import GC_GRACE_SECONDS, delete_orphans, iter_orphan_batches
+
+
+class Command(BaseCommand):
+    help = '回收没有被任何实体引用的云存储文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=GC_GRACE_SECONDS / 3600, help='解除引用后至少保留的小时数')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批扫描的文件数量')
+        parser.add_argument('--chunk-size', type=int, default=50, help='每次删除接口调用的文件数量')
+        parser.add_argument('--rate', type=float, default=2.0, help='每秒最多调用删除接口的次数')
+        parser.add_argument('--dry-run', action='store_true', help='只列出孤儿文件，不删除')
+
+    def handle(self, *args, **options):
+        grace_seconds = int(max(0.0, options['grace_hours']) * 3600)
+        chunk_size = max(1, options['chunk_size'])
+        min_interval = 1.0 / options['rate'] if options['rate'] > 0 else 0.0
+
+        found = deleted = failed = 0
+        last_call = 0.0
+        for orphans in iter_orphan_batches(grace_seconds, max(1, options['batch_size'])):
+            found += len(orphans)
+            if options['dry_run']:
+                for fid in orphans:
+                    self.stdout.write(fid)
+                continue
+            for i in range(0, len(orphans), chunk_size):
+                chunk = orphans[i:i + chunk_size]
+                wait = min_interval - (time.monotonic() - last_call)
+                if wait > 0:
+                    time.sleep(wait)
+                last_call = time.monotonic()
+                try:
+                    removed = delete_orphans(chunk, grace_seconds)
+                except WxOpenApiError as exc:
+                    failed += len(chunk)
+                    self.stderr.write(f'删除失败（{len(chunk)} 个文件）: {exc}')
+                    continue
+                deleted += len(removed)
+                failed += len(chunk) - len(removed)
+            self.stdout.write(f'已扫描孤儿文件 {found} 个，删除 {deleted} 个')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'共发现孤儿文件 {found} 个（未删除）'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'回收完成：孤儿文件 {found} 个，删除 {deleted} 个，未删除 {failed} 个'))
@@ -0,0 +1,59 @@
+"""查看后台任务队列与死信
+
+用法：
+  python manage.py jobs                      # 各类型、各状态的任务数
+  python manage.py jobs --status DEAD        # 列出死信任务及最后错误
+  python manage.py jobs --retry 12 15        # 重新入队指定任务
+  python manage.py jobs --retry-dead         # 重新入队全部死信
+  python manage.py jobs --purge-days 7       # 删除完成超过 7 天的成功任务
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from wxcloudrun.models import BackgroundJob
+from wxcloudrun.services.job_queue import purge_finished, retry_jobs
+
+
+class Command(BaseCommand):
+    help = '查看后台任务队列，重新入队死信任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', default='', help='列出指定状态的任务（PENDING/RUNNING/SUCCEEDED/DEAD）')
+        parser.add_argument('--type', default='', help='只看指定任务类型')
+        parser.add_argument('--limit', type=int, default=20, help='列出的任务数量')
+        parser.add_argument('--retry', type=int, nargs='+', default=None, help='重新入队指定 id 的任务')
+        parser.add_argument('--retry-dead', action='store_true', help='重新入队全部死信任务')
+        parser.add_argument('--purge-days', type=int, default=None, help='删除完成超过指定天数的成功任务')
+
+    def handle(self, *args, **options):
+        if options['retry']:
+            count = retry_jobs(options['retry'])
+            self.stdout.write(self.style.SUCCESS(f'已重新入队 {count} 个任务'))
+            return
+        if options['retry_dead']:
+            count = retry_jobs()
+            self.stdout.write(self.style.SUCCESS(f'已重新入队 {count} 个死信任务'))
+            return
+        if options['purge_days'] is not None:
+            count = purge_finished(max(0, options['purge_days']))
+            self.stdout.write(self.style.SUCCESS(f'已删除 {count} 个已完成任务'))
+            return
+
+        qs = BackgroundJob.objects.all()
+        if options['type']:
+            qs = qs.filter(job_type=options['type'])
+
+        status = options['status'].strip().upper()
+        if not status:
+            rows = qs.values('job_type', 'status').annotate(total=Count('id')).order_by('job_type', 'status')
+            for row in rows:
+                self.stdout.write(f"{row['job_type']:<32} {row['status']:<10} {row['total']}")
+            return
+
+        for job in qs.filter(status=status).order_by('-updated_at', '-id')[: max(1, options['limit'])]:
+            self.stdout.write(
+                f'#{job.id} {job.job_type} attempts={job.attempts}/{job.max_attempts} '
+                f'run_at={job.run_at:%Y-%m-%d %H:%M:%S} payload={job.payload}'
+            )
+            if job.last_error:
+                self.stdout.write(f'    {job.last_error.strip().splitlines()[-1]}')
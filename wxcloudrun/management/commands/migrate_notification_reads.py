@@ -0,0 +1,39 @@
+"""把 NotificationRead 逐行已读记录迁移为 NotificationReadBitmap 位图
+
+用法：python manage.py migrate_notification_reads [--batch-size 5000] [--delete-rows]
+可重复执行（已置位的用户不会重复计数）。迁移完成后设置环境变量 NOTIFICATION_READ_STORE=bitmap 切换读写。
+"""
+from django.core.management.base import BaseCommand
+
+from wxcloudrun.models import NotificationRead
+from wxcloudrun.services.notification_read_store import BitmapReadStore
+
+
+class Command(BaseCommand):
+    help = '把通知逐行已读记录迁移为分块位图（NotificationRead -> NotificationReadBitmap）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批读取的已读记录数量')
+        parser.add_argument('--delete-rows', action='store_true', help='迁移后删除已迁移的逐行记录')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        store = BitmapReadStore()
+        qs = NotificationRead.objects.order_by('id').values_list('id', 'notification_id', 'user_id')
+        last_id = 0
+        migrated = added = 0
+        while True:
+            batch = list(qs.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            grouped = {}
+            for _, notification_id, user_id in batch:
+                grouped.setdefault(notification_id, []).append(user_id)
+            for notification_id, user_ids in grouped.items():
+                added += store.mark_many(notification_id, user_ids)
+            if options['delete_rows']:
+                NotificationRead.objects.filter(id__gt=last_id, id__lte=batch[-1][0]).delete()
+            last_id = batch[-1][0]
+            migrated += len(batch)
+            self.stdout.write(f'已处理 {migrated} 条已读记录')
+        self.stdout.write(self.style.SUCCESS(f'迁移完成：处理 {migrated} 条，新增位图成员 {added} 个'))
@@ -0,0 +1,19 @@
+"""全量重建商户搜索索引
+
+用法：python manage.py rebuild_merchant_search [--batch-size 500]
+"""
+from django.core.management.base import BaseCommand
+
+from wxcloudrun.services.merchant_search_service import REBUILD_BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = '全量重建商户搜索倒排索引（MerchantSearchToken）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='每批处理的商户数量')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        total = rebuild_index(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'商户搜索索引重建完成，共 {total} 个商户'))
@@ -0,0 +1,19 @@
+"""全量重建订单搜索投影
+
+用法：python manage.py rebuild_order_search [--batch-size 500]
+"""
+from django.core.management.base import BaseCommand
+
+from wxcloudrun.services.order_search_service import REFRESH_BATCH_SIZE, rebuild_order_search
+
+
+class Command(BaseCommand):
+    help = '全量重建订单搜索投影（OrderSearch / OrderSearchGram）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH_SIZE, help='每批处理的订单数量')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        total = rebuild_order_search(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'订单搜索投影重建完成，共 {total} 条订单'))
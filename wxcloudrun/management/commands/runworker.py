@@ -0,0 +1,44 @@
+"""后台任务 worker
+
+用法：python manage.py runworker [--concurrency 4] [--poll-interval 1] [--types storage.delete_files,...] [--once]
+可部署多个实例，任务通过 SELECT ... FOR UPDATE SKIP LOCKED 领取，不会重复执行。
+收到 SIGTERM/SIGINT 后停止领取新任务，等待执行中的任务完成后退出。
+生产环境推荐以该命令单独部署 worker 服务，并在 Web 服务设置 JOB_WORKER_EMBEDDED=0 关闭 gunicorn 内置 worker。
+"""
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+
+from wxcloudrun.services.job_queue import load_handlers, run_worker
+
+
+class Command(BaseCommand):
+    help = '运行后台任务 worker（消费 BackgroundJob 队列）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='并发执行的任务数（线程数）')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='队列为空时的轮询间隔（秒）')
+        parser.add_argument('--types', default='', help='只处理指定任务类型，逗号分隔')
+        parser.add_argument('--once', action='store_true', help='处理完当前到期任务后退出')
+
+    def handle(self, *args, **options):
+        registry = load_handlers()
+        concurrency = max(1, options['concurrency'])
+        poll_interval = max(0.1, options['poll_interval'])
+        job_types = [t.strip() for t in options['types'].split(',') if t.strip()] or list(registry)
+        unknown = set(job_types) - set(registry)
+        if unknown:
+            self.stderr.write(self.style.ERROR(f'未注册的任务类型: {", ".join(sorted(unknown))}'))
+            return
+
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.set())
+
+        self.stdout.write(f'worker {worker_id} 启动，并发 {concurrency}，任务类型: {", ".join(job_types)}')
+        processed = run_worker(worker_id, stop, concurrency, poll_interval, job_types, once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f'worker {worker_id} 已退出，共领取 {processed} 个任务'))
@@ -0,0 +1,128 @@
+"""全局中间件"""
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from wxcloudrun.utils.auth import get_admin_from_token
+from wxcloudrun.utils.metrics import RequestMetrics, current_request_metrics, registry
+from wxcloudrun.utils.profiler import MODE_CPROFILE, MODE_SAMPLE, RequestProfile, current_profile, get_profile_store
+from wxcloudrun.utils.query_inspector import QueryCapture
+
+
+logger = logging.getLogger('log')
+
+
+_view_names = None
+
+
+def _view_label(request) -> str:
+    """按 urls.py 中引用的视图函数名标记请求（视图装饰器未保留函数名，因此反查 wxcloudrun.views）"""
+    global _view_names
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    if _view_names is None:
+        from wxcloudrun import views
+        _view_names = {id(obj): name for name, obj in vars(views).items() if callable(obj) and not name.startswith('_')}
+    return _view_names.get(id(match.func)) or match.route or 'unknown'
+
+
+class MetricsMiddleware:
+    """记录每个视图的延迟、SQL 条数与耗时、开放接口调用与响应大小（见 wxcloudrun/utils/metrics.py）"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = RequestMetrics()
+        token = current_request_metrics.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        elapsed = time.perf_counter() - started
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.observe(_view_label(request), request.method, response.status_code, elapsed, request_metrics, response_bytes)
+        return response
+
+
+class QueryInspectorMiddleware:
+    """开发/测试环境：记录每个请求的 SQL，同一指纹重复出现时按 N+1 告警（settings.QUERY_INSPECTOR 关闭时不加载）"""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.QUERY_INSPECTOR_N1_THRESHOLD
+
+    def __call__(self, request):
+        with QueryCapture() as capture:
+            response = self.get_response(request)
+        response['X-Query-Count'] = str(capture.count)
+        repeated = capture.repeated(self.threshold)
+        if repeated:
+            response['X-Query-Repeated'] = str(len(repeated))
+            logger.warning('疑似 N+1 查询 %s %s（共 %d 条 SQL）:\n%s',
+                           request.method, request.path, capture.count, capture.report(self.threshold))
+        return response
+
+
+class ProfilingMiddleware:
+    """按需剖析请求（见 wxcloudrun/utils/profiler.py）
+
+    - 管理员 Token 的请求带 X-Profile: sample|cprofile 时剖析该请求，其他请求忽略此头
+    - PROFILING_SAMPLE_RATE 比例的普通请求做统计采样，每个进程同时最多一个
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.interval = settings.PROFILING_INTERVAL_MS / 1000
+        self._sampling = threading.Lock()
+
+    def __call__(self, request):
+        requested = request.headers.get('X-Profile')
+        if requested:
+            admin = get_admin_from_token(request)
+            if admin is not None:
+                mode = MODE_CPROFILE if requested.strip().lower() == MODE_CPROFILE else MODE_SAMPLE
+                return self._profile(request, mode, 'header', admin)
+        if self.sample_rate > 0 and random.random() < self.sample_rate and self._sampling.acquire(blocking=False):
+            try:
+                return self._profile(request, MODE_SAMPLE, 'sampled')
+            finally:
+                self._sampling.release()
+        return self.get_response(request)
+
+    def _profile(self, request, mode, trigger, admin=None):
+        profile = RequestProfile(mode, trigger, self.interval, sys._getframe())
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+            profile.finish()
+        try:
+            get_profile_store().save(profile.to_dict(request, _view_label(request), response.status_code, admin))
+        except Exception as exc:
+            logger.warning('保存请求剖析结果失败: %s %s, error=%s', request.method, request.path, exc)
+            return response
+        if admin is not None:
+            response['X-Profile-Id'] = profile.id
+        return response
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+from wxcloudrun.utils import geohash
+
+
+def forwards_backfill_geo_hash(apps, schema_editor):
+    MerchantProfile = apps.get_model('wxcloudrun', 'MerchantProfile')
+    qs = MerchantProfile.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for m in qs.only('id', 'latitude', 'longitude').iterator():
+        MerchantProfile.objects.filter(id=m.id).update(
+            geo_hash=geohash.encode(float(m.latitude), float(m.longitude))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0026_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchantprofile',
+            name='geo_hash',
+            field=models.CharField(blank=True, default='', max_length=12, verbose_name='位置Geohash'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantprofile',
+            index=models.Index(fields=['geo_hash'], name='MerchantProfile_geo_hash_idx'),
+        ),
+        migrations.RunPython(forwards_backfill_geo_hash, migrations.RunPython.noop),
+    ]
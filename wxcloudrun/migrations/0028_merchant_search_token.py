@@ -0,0 +1,70 @@
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from wxcloudrun.utils.search_tokenizer import index_terms
+
+
+FIELD_WEIGHTS = (
+    ('merchant_name', 8),
+    ('title', 4),
+    ('address', 2),
+    ('description', 1),
+)
+
+
+def forwards_build_search_index(apps, schema_editor):
+    MerchantProfile = apps.get_model('wxcloudrun', 'MerchantProfile')
+    MerchantSearchToken = apps.get_model('wxcloudrun', 'MerchantSearchToken')
+    rows = []
+    for m in MerchantProfile.objects.all().iterator():
+        weights = Counter()
+        for field, field_weight in FIELD_WEIGHTS:
+            for term, count in index_terms(getattr(m, field, '') or '').items():
+                weights[term] += field_weight * min(count, 3)
+        for term, weight in weights.most_common(2000):
+            rows.append(MerchantSearchToken(
+                merchant_id=m.id,
+                token=term,
+                weight=weight,
+                category_id=m.category_id,
+                merchant_type=m.merchant_type or 'NORMAL',
+            ))
+        if len(rows) >= 5000:
+            MerchantSearchToken.objects.bulk_create(rows, batch_size=500)
+            rows = []
+    if rows:
+        MerchantSearchToken.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0027_merchant_geo_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, verbose_name='词元')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='权重')),
+                ('category_id', models.IntegerField(blank=True, null=True, verbose_name='分类ID')),
+                ('merchant_type', models.CharField(default='NORMAL', max_length=20, verbose_name='商户类型')),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='wxcloudrun.merchantprofile', verbose_name='商户')),
+            ],
+            options={
+                'db_table': 'MerchantSearchToken',
+                'verbose_name': '商户搜索索引',
+                'verbose_name_plural': '商户搜索索引',
+                'unique_together': {('merchant', 'token')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='merchantsearchtoken',
+            index=models.Index(fields=['token', 'category_id'], name='MerchantSearch_token_cat_idx'),
+        ),
+        migrations.RunPython(forwards_build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+from wxcloudrun.utils.phone import normalize_phone
+
+
+def forwards_backfill_search_fields(apps, schema_editor):
+    UserInfo = apps.get_model('wxcloudrun', 'UserInfo')
+    for u in UserInfo.objects.only('id', 'phone_number', 'nickname').iterator():
+        phone = normalize_phone(u.phone_number)
+        UserInfo.objects.filter(id=u.id).update(
+            phone_normalized=phone,
+            phone_reversed=phone[::-1],
+            nickname_lower=(u.nickname or '').lower(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0028_merchant_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userinfo',
+            name='phone_normalized',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='规范化手机号'),
+        ),
+        migrations.AddField(
+            model_name='userinfo',
+            name='phone_reversed',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='倒序手机号'),
+        ),
+        migrations.AddField(
+            model_name='userinfo',
+            name='nickname_lower',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='小写昵称'),
+        ),
+        migrations.AddIndex(
+            model_name='userinfo',
+            index=models.Index(fields=['phone_normalized'], name='UserInfo_phone_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinfo',
+            index=models.Index(fields=['phone_reversed'], name='UserInfo_phone_rev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinfo',
+            index=models.Index(fields=['nickname_lower'], name='UserInfo_nickname_lower_idx'),
+        ),
+        migrations.RunPython(forwards_backfill_search_fields, migrations.RunPython.noop),
+    ]
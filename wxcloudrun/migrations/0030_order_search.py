@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from wxcloudrun.utils.phone import normalize_phone
+
+
+def _clean(value):
+    return str(value or '').replace('\n', ' ').lower()
+
+
+def forwards_build_order_search(apps, schema_editor):
+    SettlementOrder = apps.get_model('wxcloudrun', 'SettlementOrder')
+    OrderSearch = apps.get_model('wxcloudrun', 'OrderSearch')
+    OrderSearchGram = apps.get_model('wxcloudrun', 'OrderSearchGram')
+    entries, grams = [], []
+    qs = SettlementOrder.objects.select_related('merchant', 'owner').order_by('id')
+    for order in qs.iterator():
+        owner, merchant = order.owner, order.merchant
+        text = '\n'.join([
+            _clean(order.order_id),
+            _clean(owner.openid),
+            _clean(owner.system_id),
+            _clean(normalize_phone(owner.phone_number)),
+            _clean(owner.nickname),
+            _clean(merchant.merchant_id),
+            _clean(merchant.merchant_name),
+        ])
+        entries.append(OrderSearch(order_id=order.id, search_text=text))
+        order_grams = set()
+        for part in text.split('\n'):
+            for i in range(len(part) - 2):
+                order_grams.add(part[i:i + 3])
+        grams.extend(OrderSearchGram(order_id=order.id, gram=g) for g in order_grams)
+        if len(entries) >= 500:
+            OrderSearch.objects.bulk_create(entries, batch_size=500)
+            OrderSearchGram.objects.bulk_create(grams, batch_size=2000)
+            entries, grams = [], []
+    if entries:
+        OrderSearch.objects.bulk_create(entries, batch_size=500)
+        OrderSearchGram.objects.bulk_create(grams, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0029_userinfo_search_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearch',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='wxcloudrun.settlementorder', verbose_name='订单')),
+                ('search_text', models.CharField(blank=True, default='', max_length=600, verbose_name='检索文本')),
+                ('updated_at', models.DateTimeField(default=datetime.now, verbose_name='更新时间')),
+            ],
+            options={
+                'db_table': 'OrderSearch',
+                'verbose_name': '订单搜索投影',
+                'verbose_name_plural': '订单搜索投影',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderSearchGram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3, verbose_name='三元组')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to='wxcloudrun.settlementorder', verbose_name='订单')),
+            ],
+            options={
+                'db_table': 'OrderSearchGram',
+                'verbose_name': '订单搜索三元组',
+                'verbose_name_plural': '订单搜索三元组',
+                'unique_together': {('order', 'gram')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ordersearchgram',
+            index=models.Index(fields=['gram', 'order'], name='OrderSearchGram_gram_idx'),
+        ),
+        migrations.RunPython(forwards_build_order_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0030_order_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='Category_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinfo',
+            index=models.Index(fields=['updated_at', 'id'], name='UserInfo_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinfo',
+            index=models.Index(fields=['owner_property', 'identity_type', 'updated_at', 'id'], name='UserInfo_owner_prop_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyprofile',
+            index=models.Index(fields=['updated_at', 'id'], name='PropertyProfile_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(fields=['updated_at', 'id'], name='Community_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantprofile',
+            index=models.Index(fields=['updated_at', 'id'], name='MerchantProfile_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantprofile',
+            index=models.Index(fields=['category', 'updated_at', 'id'], name='MerchantProfile_cat_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantprofile',
+            index=models.Index(fields=['merchant_type', 'updated_at', 'id'], name='MerchantProfile_type_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsrecord',
+            index=models.Index(fields=['created_at', 'id'], name='PointsRecord_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsrecord',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='PointsRecord_user_ctd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlementorder',
+            index=models.Index(fields=['created_at', 'id'], name='SettlementOrder_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlementorder',
+            index=models.Index(fields=['merchant', 'created_at', 'id'], name='SettleOrder_merchant_ctd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlementorder',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='SettleOrder_owner_ctd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantreview',
+            index=models.Index(fields=['created_at', 'id'], name='MerchantReview_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchantreview',
+            index=models.Index(fields=['merchant', 'created_at', 'id'], name='MerchantRev_merchant_ctd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discountredeemrecord',
+            index=models.Index(fields=['created_at', 'id'], name='DiscountRedeem_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfeedback',
+            index=models.Index(fields=['created_at', 'id'], name='UserFeedback_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfeedback',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='UserFeedback_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at', 'id'], name='Notification_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='identityapplication',
+            index=models.Index(fields=['created_at', 'id'], name='IdentityApp_created_id_idx'),
+        ),
+    ]
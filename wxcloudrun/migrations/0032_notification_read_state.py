@@ -0,0 +1,28 @@
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0031_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_state', serialize=False, to='wxcloudrun.userinfo', verbose_name='用户')),
+                ('watermark_id', models.IntegerField(default=0, verbose_name='已读水位')),
+                ('unread_count', models.IntegerField(default=0, verbose_name='未读数量')),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '通知阅读状态',
+                'verbose_name_plural': '通知阅读状态',
+                'db_table': 'NotificationReadState',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+from wxcloudrun.utils.notification_content import build_summary, html_to_text
+
+
+def forwards_backfill_summary(apps, schema_editor):
+    Notification = apps.get_model('wxcloudrun', 'Notification')
+    for n in Notification.objects.only('id', 'content').iterator():
+        text = html_to_text(n.content)
+        Notification.objects.filter(id=n.id).update(plain_text=text, summary=build_summary(text))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0032_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='summary',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='摘要'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='plain_text',
+            field=models.TextField(blank=True, default='', verbose_name='纯文本内容'),
+        ),
+        migrations.RunPython(forwards_backfill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+from wxcloudrun.utils.notification_content import content_digest
+
+
+def forwards_backfill_content_hash(apps, schema_editor):
+    Notification = apps.get_model('wxcloudrun', 'Notification')
+    for n in Notification.objects.only('id', 'content').iterator():
+        Notification.objects.filter(id=n.id).update(content_hash=content_digest(n.content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0033_notification_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='内容摘要值'),
+        ),
+        migrations.RunPython(forwards_backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0034_notification_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadBitmap',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk', models.IntegerField(verbose_name='用户分块')),
+                ('bitmap', models.BinaryField(verbose_name='压缩位图')),
+                ('member_count', models.IntegerField(default=0, verbose_name='已读人数')),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='更新时间')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_bitmaps', to='wxcloudrun.notification', verbose_name='通知')),
+            ],
+            options={
+                'verbose_name': '通知已读位图',
+                'verbose_name_plural': '通知已读位图',
+                'db_table': 'NotificationReadBitmap',
+                'unique_together': {('notification', 'chunk')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationreadbitmap',
+            index=models.Index(fields=['chunk', 'notification'], name='NotifReadBitmap_chunk_idx'),
+        ),
+    ]
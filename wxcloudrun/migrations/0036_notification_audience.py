@@ -0,0 +1,45 @@
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forwards_global_audience(apps, schema_editor):
+    Notification = apps.get_model('wxcloudrun', 'Notification')
+    NotificationAudience = apps.get_model('wxcloudrun', 'NotificationAudience')
+    rows = [
+        NotificationAudience(notification_id=nid, segment_type='ALL', segment_value='', created_at=created_at)
+        for nid, created_at in Notification.objects.values_list('id', 'created_at').iterator()
+    ]
+    NotificationAudience.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0035_notification_read_bitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationAudience',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segment_type', models.CharField(choices=[('ALL', '全部用户'), ('IDENTITY', '按身份'), ('PROPERTY', '按物业'), ('COMMUNITY', '按小区')], max_length=20, verbose_name='分段类型')),
+                ('segment_value', models.CharField(blank=True, default='', max_length=32, verbose_name='分段值')),
+                ('created_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='通知创建时间')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audiences', to='wxcloudrun.notification', verbose_name='通知')),
+            ],
+            options={
+                'verbose_name': '通知受众',
+                'verbose_name_plural': '通知受众',
+                'db_table': 'NotificationAudience',
+                'unique_together': {('notification', 'segment_type', 'segment_value')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationaudience',
+            index=models.Index(fields=['segment_type', 'segment_value', 'created_at', 'notification'], name='NotifAudience_segment_idx'),
+        ),
+        migrations.RunPython(forwards_global_audience, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0036_notification_audience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(max_length=64, verbose_name='任务类型')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='任务参数')),
+                ('status', models.CharField(choices=[('PENDING', '待执行'), ('RUNNING', '执行中'), ('SUCCEEDED', '已完成'), ('DEAD', '已放弃')], default='PENDING', max_length=20, verbose_name='状态')),
+                ('dedupe_key', models.CharField(blank=True, default='', max_length=128, verbose_name='去重键')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='已尝试次数')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='最大尝试次数')),
+                ('run_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='计划执行时间')),
+                ('locked_by', models.CharField(blank=True, default='', max_length=128, verbose_name='执行进程')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='领取时间')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='最后错误')),
+                ('created_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='更新时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '后台任务',
+                'verbose_name_plural': '后台任务',
+                'db_table': 'BackgroundJob',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'run_at', 'id'], name='BackgroundJob_claim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['job_type', 'status'], name='BackgroundJob_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['job_type', 'dedupe_key', 'status'], name='BackgroundJob_dedupe_idx'),
+        ),
+    ]
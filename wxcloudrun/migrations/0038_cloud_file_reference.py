@@ -0,0 +1,74 @@
+import datetime
+
+from django.db import migrations, models
+
+from wxcloudrun.utils.cloud_files import REFERENCE_FIELDS, object_references
+
+
+def forwards_backfill_references(apps, schema_editor):
+    CloudFile = apps.get_model('wxcloudrun', 'CloudFile')
+    CloudFileReference = apps.get_model('wxcloudrun', 'CloudFileReference')
+    now = datetime.datetime.now()
+    for model_name, fields in REFERENCE_FIELDS.items():
+        model = apps.get_model('wxcloudrun', model_name)
+        refs, file_ids = [], set()
+        for obj in model.objects.only('pk', *fields).iterator():
+            for field, fid in object_references(obj, fields):
+                refs.append(CloudFileReference(owner_type=model_name, owner_id=str(obj.pk), field=field, file_id=fid, created_at=now))
+                file_ids.add(fid)
+        CloudFileReference.objects.bulk_create(refs, batch_size=500, ignore_conflicts=True)
+        CloudFile.objects.bulk_create(
+            [CloudFile(file_id=fid, created_at=now, updated_at=now) for fid in file_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0037_background_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CloudFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_id', models.CharField(max_length=512, unique=True, verbose_name='云文件ID')),
+                ('created_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='登记时间')),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '云文件',
+                'verbose_name_plural': '云文件',
+                'db_table': 'CloudFile',
+            },
+        ),
+        migrations.CreateModel(
+            name='CloudFileReference',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_id', models.CharField(max_length=512, verbose_name='云文件ID')),
+                ('owner_type', models.CharField(max_length=40, verbose_name='引用方')),
+                ('owner_id', models.CharField(max_length=64, verbose_name='引用方ID')),
+                ('field', models.CharField(max_length=40, verbose_name='字段')),
+                ('created_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '云文件引用',
+                'verbose_name_plural': '云文件引用',
+                'db_table': 'CloudFileReference',
+                'unique_together': {('owner_type', 'owner_id', 'field', 'file_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cloudfile',
+            index=models.Index(fields=['updated_at'], name='CloudFile_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cloudfilereference',
+            index=models.Index(fields=['file_id'], name='CloudFileRef_file_idx'),
+        ),
+        migrations.RunPython(forwards_backfill_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wxcloudrun', '0038_cloud_file_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='缓存名')),
+                ('version', models.BigIntegerField(default=1, verbose_name='版本号')),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '缓存版本',
+                'verbose_name_plural': '缓存版本',
+                'db_table': 'CacheVersion',
+            },
+        ),
+    ]
@@ -3,6 +3,10 @@ from datetime import datetime, date
 from django.db import models
 from django.contrib.auth.models import User
 
+from wxcloudrun.utils import geohash
+from wxcloudrun.utils.notification_content import build_summary, content_digest, html_to_text
+from wxcloudrun.utils.phone import normalize_phone
+
 # 已移除官方示例计数器模型 Counters（与本项目无关）
 
 
@@ -18,6 +22,7 @@ class Category(models.Model):
         db_table = 'Category'
         indexes = [
             models.Index(fields=['name']),
+            models.Index(fields=['updated_at', 'id'], name='Category_updated_id_idx'),
         ]
         verbose_name = '商品分类'
         verbose_name_plural = '商品分类'
@@ -84,6 +89,10 @@ class UserInfo(models.Model):
     nickname = models.CharField('用户昵称', max_length=100, blank=True, default='')
     avatar_url = models.CharField('头像云文件ID', max_length=512, blank=True, default='')  # 存储云文件ID，如：cloud://xxx.jpg
     phone_number = models.CharField('手机号', max_length=32, blank=True, default='')
+    # 以下为检索用派生字段，由 save() 自动维护
+    phone_normalized = models.CharField('规范化手机号', max_length=32, blank=True, default='')
+    phone_reversed = models.CharField('倒序手机号', max_length=32, blank=True, default='')  # 用于尾号检索
+    nickname_lower = models.CharField('小写昵称', max_length=100, blank=True, default='')  # 用于昵称前缀检索
     identity_type = models.CharField('身份类型(兼容字段)', max_length=20, choices=IDENTITY_CHOICES)
     active_identity = models.CharField('活跃身份', max_length=20, choices=IDENTITY_CHOICES, default='OWNER')
 
@@ -106,6 +115,11 @@ class UserInfo(models.Model):
         indexes = [
             models.Index(fields=['openid']),
             models.Index(fields=['identity_type']),
+            models.Index(fields=['phone_normalized'], name='UserInfo_phone_norm_idx'),
+            models.Index(fields=['phone_reversed'], name='UserInfo_phone_rev_idx'),
+            models.Index(fields=['nickname_lower'], name='UserInfo_nickname_lower_idx'),
+            models.Index(fields=['updated_at', 'id'], name='UserInfo_updated_id_idx'),
+            models.Index(fields=['owner_property', 'identity_type', 'updated_at', 'id'], name='UserInfo_owner_prop_upd_idx'),
         ]
         verbose_name = '用户信息'
         verbose_name_plural = '用户信息'
@@ -121,6 +135,19 @@ class UserInfo(models.Model):
         # 按需设置每日积分日期
         if self.daily_points_date is None:
             self.daily_points_date = date.today()
+        # 同步检索字段
+        self.phone_normalized = normalize_phone(self.phone_number)
+        self.phone_reversed = self.phone_normalized[::-1]
+        self.nickname_lower = (self.nickname or '').lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = []
+            if 'phone_number' in update_fields:
+                extra += ['phone_normalized', 'phone_reversed']
+            if 'nickname' in update_fields:
+                extra.append('nickname_lower')
+            if extra:
+                kwargs['update_fields'] = list(update_fields) + extra
         self.updated_at = datetime.now()
         super().save(*args, **kwargs)
 
@@ -173,6 +200,7 @@ class PropertyProfile(models.Model):
         db_table = 'PropertyProfile'
         indexes = [
             models.Index(fields=['property_id']),
+            models.Index(fields=['updated_at', 'id'], name='PropertyProfile_updated_id_idx'),
         ]
         verbose_name = '物业信息'
         verbose_name_plural = '物业信息'
@@ -203,6 +231,7 @@ class Community(models.Model):
             models.Index(fields=['community_id']),
             models.Index(fields=['property']),
             models.Index(fields=['community_name']),
+            models.Index(fields=['updated_at', 'id'], name='Community_updated_id_idx'),
         ]
         verbose_name = '小区信息'
         verbose_name_plural = '小区信息'
@@ -233,6 +262,7 @@ class MerchantProfile(models.Model):
     address = models.CharField('地址', max_length=300, blank=True, default='')
     latitude = models.DecimalField('纬度', max_digits=10, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField('经度', max_digits=10, decimal_places=6, null=True, blank=True)
+    geo_hash = models.CharField('位置Geohash', max_length=12, blank=True, default='')  # 由经纬度自动生成，用于地图聚合
     positive_rating_percent = models.IntegerField('好评率(%)', default=0)  # 0-100
     open_hours = models.CharField('营业时间', max_length=255, blank=True, default='')
     gallery = models.JSONField('图集', default=list, blank=True)
@@ -247,6 +277,10 @@ class MerchantProfile(models.Model):
         indexes = [
             models.Index(fields=['merchant_id']),
             models.Index(fields=['merchant_name']),
+            models.Index(fields=['geo_hash'], name='MerchantProfile_geo_hash_idx'),
+            models.Index(fields=['updated_at', 'id'], name='MerchantProfile_updated_id_idx'),
+            models.Index(fields=['category', 'updated_at', 'id'], name='MerchantProfile_cat_upd_idx'),
+            models.Index(fields=['merchant_type', 'updated_at', 'id'], name='MerchantProfile_type_upd_idx'),
         ]
         verbose_name = '商户信息'
         verbose_name_plural = '商户信息'
@@ -257,6 +291,14 @@ class MerchantProfile(models.Model):
     def save(self, *args, **kwargs):
         if not self.merchant_id:
             self.merchant_id = _generate_seq('MERCHANT', MerchantProfile, 'merchant_id')
+        # 经纬度变化时同步 geohash（地图聚合依赖该索引键）
+        if self.latitude is not None and self.longitude is not None:
+            self.geo_hash = geohash.encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geo_hash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('latitude' in update_fields or 'longitude' in update_fields):
+            kwargs['update_fields'] = list(update_fields) + ['geo_hash']
         self.updated_at = datetime.now()
         super().save(*args, **kwargs)
 
@@ -291,6 +333,27 @@ class RecommendedMerchant(models.Model):
         super().save(*args, **kwargs)
 
 
+# 商户搜索倒排索引（由商户保存信号维护，可通过 rebuild_merchant_search 命令重建）
+class MerchantSearchToken(models.Model):
+    merchant = models.ForeignKey(MerchantProfile, verbose_name='商户', on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField('词元', max_length=32)
+    weight = models.PositiveIntegerField('权重', default=1)
+    category_id = models.IntegerField('分类ID', null=True, blank=True)  # 冗余商户分类，便于按分类过滤
+    merchant_type = models.CharField('商户类型', max_length=20, default='NORMAL')  # 冗余商户类型
+
+    class Meta:
+        db_table = 'MerchantSearchToken'
+        unique_together = ('merchant', 'token')
+        indexes = [
+            models.Index(fields=['token', 'category_id'], name='MerchantSearch_token_cat_idx'),
+        ]
+        verbose_name = '商户搜索索引'
+        verbose_name_plural = '商户搜索索引'
+
+    def __str__(self):
+        return f"{self.token} -> {self.merchant_id}"
+
+
 # 积分阈值配置
 class PointsThreshold(models.Model):
     property = models.OneToOneField(PropertyProfile, verbose_name='物业', on_delete=models.CASCADE, related_name='points_threshold')
@@ -326,6 +389,8 @@ class PointsRecord(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['user', 'identity_type']),
             models.Index(fields=['created_at'], name='PointsRecord_created_at_idx'),
+            models.Index(fields=['created_at', 'id'], name='PointsRecord_created_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='PointsRecord_user_ctd_idx'),
         ]
         verbose_name = '积分记录'
         verbose_name_plural = '积分记录'
@@ -369,6 +434,9 @@ class SettlementOrder(models.Model):
             models.Index(fields=['owner']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id'], name='SettlementOrder_created_id_idx'),
+            models.Index(fields=['merchant', 'created_at', 'id'], name='SettleOrder_merchant_ctd_idx'),
+            models.Index(fields=['owner', 'created_at', 'id'], name='SettleOrder_owner_ctd_idx'),
         ]
         verbose_name = '订单结算记录'
         verbose_name_plural = '订单结算记录'
@@ -383,6 +451,39 @@ class SettlementOrder(models.Model):
         super().save(*args, **kwargs)
 
 
+# 订单搜索投影（冗余订单号、业主与商户信息，由信号维护，可通过 rebuild_order_search 命令重建）
+class OrderSearch(models.Model):
+    order = models.OneToOneField(
+        SettlementOrder,
+        verbose_name='订单',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='search_entry',
+    )
+    search_text = models.CharField('检索文本', max_length=600, blank=True, default='')  # 小写，字段间以换行分隔
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'OrderSearch'
+        verbose_name = '订单搜索投影'
+        verbose_name_plural = '订单搜索投影'
+
+
+# 订单检索文本的三元组（trigram）索引
+class OrderSearchGram(models.Model):
+    order = models.ForeignKey(SettlementOrder, verbose_name='订单', on_delete=models.CASCADE, related_name='search_grams')
+    gram = models.CharField('三元组', max_length=3)
+
+    class Meta:
+        db_table = 'OrderSearchGram'
+        unique_together = ('order', 'gram')
+        indexes = [
+            models.Index(fields=['gram', 'order'], name='OrderSearchGram_gram_idx'),
+        ]
+        verbose_name = '订单搜索三元组'
+        verbose_name_plural = '订单搜索三元组'
+
+
 class MerchantReview(models.Model):
     """业主对商户的评价（仅允许对已结算订单评价）"""
 
@@ -415,6 +516,8 @@ class MerchantReview(models.Model):
             models.Index(fields=['merchant']),
             models.Index(fields=['owner']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id'], name='MerchantReview_created_id_idx'),
+            models.Index(fields=['merchant', 'created_at', 'id'], name='MerchantRev_merchant_ctd_idx'),
         ]
         verbose_name = '商户评价'
         verbose_name_plural = '商户评价'
@@ -452,6 +555,7 @@ class DiscountRedeemRecord(models.Model):
             models.Index(fields=['merchant'], name='DRR_merchant_idx'),
             models.Index(fields=['owner'], name='DRR_owner_idx'),
             models.Index(fields=['created_at'], name='DRR_created_at_idx'),
+            models.Index(fields=['created_at', 'id'], name='DiscountRedeem_created_id_idx'),
         ]
         verbose_name = '折扣店兑换记录'
         verbose_name_plural = '折扣店兑换记录'
@@ -570,6 +674,8 @@ class UserFeedback(models.Model):
         indexes = [
             models.Index(fields=['user']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id'], name='UserFeedback_created_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='UserFeedback_user_created_idx'),
         ]
         verbose_name = '意见反馈'
         verbose_name_plural = '意见反馈'
@@ -584,6 +690,10 @@ class Notification(models.Model):
 
     title = models.CharField('通知标题', max_length=200)
     content = models.TextField('通知内容', default='')
+    # 以下字段在保存时由 content 生成，列表接口无需读取正文
+    summary = models.CharField('摘要', max_length=100, blank=True, default='')
+    plain_text = models.TextField('纯文本内容', blank=True, default='')
+    content_hash = models.CharField('内容摘要值', max_length=40, blank=True, default='')
 
     created_at = models.DateTimeField('创建时间', default=datetime.now)
     updated_at = models.DateTimeField('更新时间', default=datetime.now)
@@ -592,6 +702,7 @@ class Notification(models.Model):
         db_table = 'Notification'
         indexes = [
             models.Index(fields=['created_at'], name='Notification_created_at_idx'),
+            models.Index(fields=['created_at', 'id'], name='Notification_created_id_idx'),
         ]
         verbose_name = '通知'
         verbose_name_plural = '通知'
@@ -600,10 +711,58 @@ class Notification(models.Model):
         return f"{self.title}({self.id})"
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.plain_text = html_to_text(self.content)
+            self.summary = build_summary(self.plain_text)
+            self.content_hash = content_digest(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + ['plain_text', 'summary', 'content_hash']
         self.updated_at = datetime.now()
         super().save(*args, **kwargs)
 
 
+NOTIFICATION_SEGMENT_CHOICES = (
+    ('ALL', '全部用户'),
+    ('IDENTITY', '按身份'),
+    ('PROPERTY', '按物业'),
+    ('COMMUNITY', '按小区'),
+)
+
+
+class NotificationAudience(models.Model):
+    """通知受众分段：每条通知一或多行，用户可见 = 命中任一分段
+
+    segment_value：ALL 为空串，IDENTITY 为身份类型，PROPERTY 为物业ID，COMMUNITY 为小区ID。
+    created_at 冗余通知创建时间，使每个分段都能按 (分段, 时间) 索引独立做游标分页。
+    """
+
+    notification = models.ForeignKey(
+        Notification,
+        verbose_name='通知',
+        on_delete=models.CASCADE,
+        related_name='audiences',
+    )
+    segment_type = models.CharField('分段类型', max_length=20, choices=NOTIFICATION_SEGMENT_CHOICES)
+    segment_value = models.CharField('分段值', max_length=32, blank=True, default='')
+    created_at = models.DateTimeField('通知创建时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'NotificationAudience'
+        unique_together = ('notification', 'segment_type', 'segment_value')
+        indexes = [
+            models.Index(
+                fields=['segment_type', 'segment_value', 'created_at', 'notification'],
+                name='NotifAudience_segment_idx',
+            ),
+        ]
+        verbose_name = '通知受众'
+        verbose_name_plural = '通知受众'
+
+    def __str__(self):
+        return f"{self.notification_id}:{self.segment_type}={self.segment_value}"
+
+
 class NotificationRead(models.Model):
     """用户通知已读记录"""
 
@@ -636,6 +795,63 @@ class NotificationRead(models.Model):
         return f"{self.user_id}-{self.notification_id}"
 
 
+class NotificationReadBitmap(models.Model):
+    """通知已读位图（NotificationRead 的紧凑替代存储）
+
+    每条通知按用户 id 分块，每块一行，bitmap 为 zlib 压缩的定长位图（见 utils/bitmap.py）。
+    """
+
+    notification = models.ForeignKey(
+        Notification,
+        verbose_name='通知',
+        on_delete=models.CASCADE,
+        related_name='read_bitmaps',
+    )
+    chunk = models.IntegerField('用户分块')
+    bitmap = models.BinaryField('压缩位图')
+    member_count = models.IntegerField('已读人数', default=0)
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'NotificationReadBitmap'
+        unique_together = ('notification', 'chunk')
+        indexes = [
+            models.Index(fields=['chunk', 'notification'], name='NotifReadBitmap_chunk_idx'),
+        ]
+        verbose_name = '通知已读位图'
+        verbose_name_plural = '通知已读位图'
+
+    def __str__(self):
+        return f"{self.notification_id}#{self.chunk}({self.member_count})"
+
+
+class NotificationReadState(models.Model):
+    """用户通知阅读水位与未读计数
+
+    - id 不大于 watermark_id 的通知视为已读；水位以上的已读通知记录在 NotificationRead 中
+    - unread_count 在发布/删除/阅读通知时增量维护，读取未读数无需扫描通知表
+    """
+
+    user = models.OneToOneField(
+        UserInfo,
+        verbose_name='用户',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='notification_state',
+    )
+    watermark_id = models.IntegerField('已读水位', default=0)
+    unread_count = models.IntegerField('未读数量', default=0)
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'NotificationReadState'
+        verbose_name = '通知阅读状态'
+        verbose_name_plural = '通知阅读状态'
+
+    def __str__(self):
+        return f"{self.user_id}:{self.watermark_id}/{self.unread_count}"
+
+
 
 # 协议合同配置（全局单条）
 class ContractSetting(models.Model):
@@ -699,6 +915,7 @@ class IdentityApplication(models.Model):
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id'], name='IdentityApp_created_id_idx'),
         ]
         verbose_name = '身份申请'
         verbose_name_plural = '身份申请'
@@ -755,3 +972,101 @@ class UserContractSignature(models.Model):
     def save(self, *args, **kwargs):
         self.updated_at = datetime.now()
         super().save(*args, **kwargs)
+
+
+JOB_STATUS_CHOICES = (
+    ('PENDING', '待执行'),
+    ('RUNNING', '执行中'),
+    ('SUCCEEDED', '已完成'),
+    ('DEAD', '已放弃'),
+)
+
+
+class BackgroundJob(models.Model):
+    """后台任务队列（数据库实现，由 gunicorn 内置 worker 线程或 runworker 命令消费，见 services/job_queue）"""
+
+    job_type = models.CharField('任务类型', max_length=64)
+    payload = models.JSONField('任务参数', default=dict, blank=True)
+    status = models.CharField('状态', max_length=20, choices=JOB_STATUS_CHOICES, default='PENDING')
+    # 非空时同类型同键只保留一个待执行任务（如同一商户的评分刷新）
+    dedupe_key = models.CharField('去重键', max_length=128, blank=True, default='')
+    attempts = models.PositiveIntegerField('已尝试次数', default=0)
+    max_attempts = models.PositiveIntegerField('最大尝试次数', default=5)
+    run_at = models.DateTimeField('计划执行时间', default=datetime.now)
+    locked_by = models.CharField('执行进程', max_length=128, blank=True, default='')
+    locked_at = models.DateTimeField('领取时间', null=True, blank=True)
+    last_error = models.TextField('最后错误', blank=True, default='')
+    created_at = models.DateTimeField('创建时间', default=datetime.now)
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+    finished_at = models.DateTimeField('完成时间', null=True, blank=True)
+
+    class Meta:
+        db_table = 'BackgroundJob'
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='BackgroundJob_claim_idx'),
+            models.Index(fields=['job_type', 'status'], name='BackgroundJob_type_status_idx'),
+            models.Index(fields=['job_type', 'dedupe_key', 'status'], name='BackgroundJob_dedupe_idx'),
+        ]
+        verbose_name = '后台任务'
+        verbose_name_plural = '后台任务'
+
+    def __str__(self):
+        return f"{self.job_type}#{self.id}({self.status})"
+
+
+class CloudFile(models.Model):
+    """已知的云存储文件（上传凭证签发或首次被引用时登记），供孤儿文件回收使用"""
+
+    file_id = models.CharField('云文件ID', max_length=512, unique=True)
+    created_at = models.DateTimeField('登记时间', default=datetime.now)
+    # 最近一次被引用/解除引用的时间，回收时据此留出宽限期
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'CloudFile'
+        indexes = [
+            models.Index(fields=['updated_at'], name='CloudFile_updated_idx'),
+        ]
+        verbose_name = '云文件'
+        verbose_name_plural = '云文件'
+
+    def __str__(self):
+        return self.file_id
+
+
+class CloudFileReference(models.Model):
+    """云文件引用索引：哪个实体的哪个字段引用了哪个文件（见 services/cloud_file_service）"""
+
+    file_id = models.CharField('云文件ID', max_length=512)
+    owner_type = models.CharField('引用方', max_length=40)
+    owner_id = models.CharField('引用方ID', max_length=64)
+    field = models.CharField('字段', max_length=40)
+    created_at = models.DateTimeField('创建时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'CloudFileReference'
+        unique_together = ('owner_type', 'owner_id', 'field', 'file_id')
+        indexes = [
+            models.Index(fields=['file_id'], name='CloudFileRef_file_idx'),
+        ]
+        verbose_name = '云文件引用'
+        verbose_name_plural = '云文件引用'
+
+    def __str__(self):
+        return f"{self.owner_type}#{self.owner_id}.{self.field} -> {self.file_id}"
+
+
+class CacheVersion(models.Model):
+    """共享的缓存版本号：各进程的本地缓存键带上版本号，修改数据时递增版本即在所有进程中失效"""
+
+    key = models.CharField('缓存名', max_length=64, unique=True)
+    version = models.BigIntegerField('版本号', default=1)
+    updated_at = models.DateTimeField('更新时间', default=datetime.now)
+
+    class Meta:
+        db_table = 'CacheVersion'
+        verbose_name = '缓存版本'
+        verbose_name_plural = '缓存版本'
+
+    def __str__(self):
+        return f"{self.key}@{self.version}"
@@ -0,0 +1,173 @@
+"""云文件引用索引与孤儿文件回收
+
+- CloudFile 登记已知的云文件：签发上传凭证时、首次被实体引用时写入
+- CloudFileReference 记录 (实体表, 实体ID, 字段) -> 云文件ID，由模型信号在保存/删除时维护（见 signals.py），
+  需要索引的字段见 utils/cloud_files.REFERENCE_FIELDS
+- 回收（gc_cloud_files 命令）：按 id 分批扫描 CloudFile，与引用索引求差，超过宽限期仍无引用的文件
+  分块调用 tcb/batchdeletefile 删除
+- 列表接口可用 resolve_entity_urls 一次索引查询 + 一次临时URL请求解析多个实体的文件
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.db.models import Q
+
+from wxcloudrun.models import CloudFile, CloudFileReference
+from wxcloudrun.services.job_queue import register
+from wxcloudrun.services.storage_service import delete_cloud_files, get_temp_file_urls
+from wxcloudrun.utils.cloud_files import REFERENCE_FIELDS, is_cloud_file, object_references
+
+
+logger = logging.getLogger('log')
+
+# 解除引用（或登记）后至少保留的时长，避免删除刚上传、尚未保存到实体上的文件
+GC_GRACE_SECONDS = 24 * 3600
+
+
+def register_files(file_ids: Iterable[str]) -> None:
+    """登记云文件并刷新其更新时间。"""
+    file_ids = [fid for fid in dict.fromkeys(file_ids) if is_cloud_file(fid)]
+    if not file_ids:
+        return
+    now = datetime.now()
+    CloudFile.objects.bulk_create(
+        [CloudFile(file_id=fid, created_at=now, updated_at=now) for fid in file_ids],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    CloudFile.objects.filter(file_id__in=file_ids).update(updated_at=now)
+
+
+def _touch(file_ids: Iterable[str]) -> None:
+    file_ids = list(file_ids)
+    if file_ids:
+        CloudFile.objects.filter(file_id__in=file_ids).update(updated_at=datetime.now())
+
+
+def sync_references(obj, update_fields: Optional[Iterable[str]] = None) -> None:
+    """按对象当前字段值增删引用记录（update_fields 不为空时只处理其中的字段）。"""
+    owner_type, owner_id = obj._meta.db_table, str(obj.pk)
+    fields = REFERENCE_FIELDS.get(owner_type)
+    if not fields:
+        return
+    if update_fields is not None:
+        fields = [f for f in fields if f in set(update_fields)]
+        if not fields:
+            return
+
+    wanted = object_references(obj, fields)
+    existing = set(
+        CloudFileReference.objects.filter(owner_type=owner_type, owner_id=owner_id, field__in=fields).values_list(
+            'field',
+            'file_id',
+        )
+    )
+    removed = existing - wanted
+    added = wanted - existing
+    if removed:
+        q = Q()
+        for field, fid in removed:
+            q |= Q(field=field, file_id=fid)
+        CloudFileReference.objects.filter(q, owner_type=owner_type, owner_id=owner_id).delete()
+        _touch(fid for _, fid in removed)
+    if added:
+        now = datetime.now()
+        CloudFileReference.objects.bulk_create(
+            [
+                CloudFileReference(owner_type=owner_type, owner_id=owner_id, field=field, file_id=fid, created_at=now)
+                for field, fid in added
+            ],
+            ignore_conflicts=True,
+        )
+        register_files(fid for _, fid in added)
+
+
+def drop_references(obj) -> None:
+    """实体删除后移除其全部引用。"""
+    owner_type, owner_id = obj._meta.db_table, str(obj.pk)
+    if owner_type not in REFERENCE_FIELDS:
+        return
+    refs = CloudFileReference.objects.filter(owner_type=owner_type, owner_id=owner_id)
+    file_ids = list(refs.values_list('file_id', flat=True))
+    if file_ids:
+        refs.delete()
+        _touch(file_ids)
+
+
+def referenced_file_ids(file_ids: Iterable[str]) -> set[str]:
+    file_ids = list(file_ids)
+    if not file_ids:
+        return set()
+    return set(CloudFileReference.objects.filter(file_id__in=file_ids).values_list('file_id', flat=True))
+
+
+def entity_file_ids(objs: Iterable, fields: Optional[Iterable[str]] = None) -> set[str]:
+    """一次索引查询取出多个实体（可混合不同模型）引用的云文件ID。"""
+    groups: dict[str, list[str]] = {}
+    for obj in objs:
+        groups.setdefault(obj._meta.db_table, []).append(str(obj.pk))
+    if not groups:
+        return set()
+    q = Q()
+    for owner_type, owner_ids in groups.items():
+        q |= Q(owner_type=owner_type, owner_id__in=owner_ids)
+    qs = CloudFileReference.objects.filter(q)
+    if fields is not None:
+        qs = qs.filter(field__in=list(fields))
+    return set(qs.values_list('file_id', flat=True))
+
+
+def resolve_entity_urls(objs: Iterable, fields: Optional[Iterable[str]] = None) -> dict[str, str]:
+    """批量解析实体引用文件的临时URL，返回 {云文件ID: 临时URL}。"""
+    file_ids = entity_file_ids(objs, fields)
+    return get_temp_file_urls(sorted(file_ids)) if file_ids else {}
+
+
+def iter_orphan_batches(grace_seconds: int = GC_GRACE_SECONDS, batch_size: int = 500) -> Iterator[list[str]]:
+    """按 id 分批扫描已登记文件，逐批产出超过宽限期且无引用的文件ID。"""
+    cutoff = datetime.now() - timedelta(seconds=grace_seconds)
+    last_id = 0
+    while True:
+        rows = list(
+            CloudFile.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'file_id', 'updated_at')[:batch_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        candidates = [fid for _, fid, updated_at in rows if updated_at < cutoff]
+        referenced = referenced_file_ids(candidates)
+        orphans = [fid for fid in candidates if fid not in referenced]
+        if orphans:
+            yield orphans
+
+
+def delete_orphans(file_ids: list[str], grace_seconds: int = GC_GRACE_SECONDS) -> list[str]:
+    """删除前再次确认仍无引用且宽限期内未被登记/解除引用，返回删除成功的文件ID。"""
+    cutoff = datetime.now() - timedelta(seconds=grace_seconds)
+    confirmed = set(
+        CloudFile.objects.filter(file_id__in=file_ids, updated_at__lt=cutoff).values_list('file_id', flat=True)
+    ) - referenced_file_ids(file_ids)
+    if not confirmed:
+        return []
+    data = delete_cloud_files(sorted(confirmed))
+    deleted = [item.get('fileid') for item in data.get('delete_list', []) if item.get('status') == 0]
+    failed = [item for item in data.get('delete_list', []) if item.get('status') != 0]
+    if failed:
+        logger.warning(f'部分孤儿云文件删除失败: {failed}')
+    CloudFile.objects.filter(file_id__in=deleted).delete()
+    return deleted
+
+
+@register('storage.delete_files', max_attempts=6, concurrency=2)
+def _delete_cloud_files_job(payload):
+    file_ids = [fid for fid in payload.get('file_ids') or [] if is_cloud_file(fid)]
+    # 已被其它实体重新引用的文件保留（由回收任务在解除引用后处理）
+    referenced = referenced_file_ids(file_ids)
+    file_ids = [fid for fid in file_ids if fid not in referenced]
+    if not file_ids:
+        return
+    delete_cloud_files(file_ids)
+    CloudFile.objects.filter(file_id__in=file_ids).delete()
@@ -0,0 +1,364 @@
+"""后台任务队列（数据库实现，无需外部消息中间件）
+
+- 视图中调用 enqueue() 写入 BackgroundJob，与业务数据同一事务提交，回滚时任务一并撤销；
+  带 dedupe_key 且处理时需读取本事务写入数据的任务，应在 transaction.on_commit 中入队，
+  否则去重命中的待执行任务可能在本事务提交前被领取执行
+- worker 循环领取到期任务：SELECT ... FOR UPDATE SKIP LOCKED，多个 worker 互不阻塞、不重复领取。
+  生产环境推荐单独部署 `manage.py runworker` 服务，并在 Web 服务上设置 JOB_WORKER_EMBEDDED=0；
+  未单独部署时，每个实例由文件锁选出一个 gunicorn worker 运行内置 worker 线程（见 gunicorn.conf.py），
+  其余 worker 不轮询数据库，持锁进程退出后由其它 worker 接替
+- 任务类型可限制全局并发数（领取时按执行中的任务计数，多 worker 同时领取时为近似限制）
+- 失败按指数退避重试，超过最大尝试次数后置为 DEAD（死信），可在 Django Admin 或 `manage.py jobs` 中查看并重新入队
+- 领取后长时间未回报的任务（worker 崩溃/被杀）会被重新放回队列
+
+任务处理函数用 @register 注册，所在模块需列入 HANDLER_MODULES，worker 启动时统一导入。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from importlib import import_module
+from typing import Callable, Iterable, Optional
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F
+
+from wxcloudrun.models import BackgroundJob
+
+
+logger = logging.getLogger('log')
+
+HANDLER_MODULES = (
+    'wxcloudrun.services.cloud_file_service',
+    'wxcloudrun.services.order_service',
+)
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+# 领取后超过该时长仍未完成，视为 worker 已退出
+STALE_AFTER_SECONDS = int(os.environ.get('JOB_STALE_AFTER', '600'))
+ERROR_MAX_LENGTH = 4000
+# 内置 worker 的实例内选举：持有该文件锁的进程才轮询队列，其余进程每隔 EMBEDDED_LOCK_RETRY 秒重试
+EMBEDDED_LOCK_FILE = os.environ.get('JOB_WORKER_LOCK_FILE') or os.path.join(
+    tempfile.gettempdir(), 'wxcloudrun-job-worker.lock',
+)
+EMBEDDED_LOCK_RETRY = 30
+# 回收超时任务、清理已完成任务的间隔（秒）
+MAINTENANCE_INTERVAL = 60
+PURGE_AFTER_DAYS = 7
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    handler: Callable[[dict], None]
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    concurrency: Optional[int] = None
+
+
+_registry: dict[str, JobType] = {}
+
+
+def register(name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS, concurrency: Optional[int] = None):
+    """注册任务处理函数：handler(payload)，抛出异常即视为失败并按退避重试。"""
+    def decorator(func):
+        _registry[name] = JobType(name, func, max_attempts, concurrency)
+        return func
+    return decorator
+
+
+def load_handlers() -> dict[str, JobType]:
+    for module in HANDLER_MODULES:
+        import_module(module)
+    return dict(_registry)
+
+
+def enqueue(
+    job_type: str,
+    payload: Optional[dict] = None,
+    *,
+    delay: float = 0,
+    dedupe_key: str = '',
+    max_attempts: Optional[int] = None,
+) -> BackgroundJob:
+    """写入任务；dedupe_key 非空且已有同键的待执行任务时不重复写入，直接返回已有任务。"""
+    if dedupe_key:
+        existing = BackgroundJob.objects.filter(job_type=job_type, dedupe_key=dedupe_key, status='PENDING').first()
+        if existing:
+            return existing
+    spec = _registry.get(job_type)
+    now = datetime.now()
+    job = BackgroundJob.objects.create(
+        job_type=job_type,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts or (spec.max_attempts if spec else DEFAULT_MAX_ATTEMPTS),
+        run_at=now + timedelta(seconds=delay),
+        created_at=now,
+        updated_at=now,
+    )
+    logger.info('后台任务已入队: %s#%s', job_type, job.id)
+    return job
+
+
+def backoff_seconds(attempts: int) -> float:
+    """第 attempts 次失败后的重试间隔：指数增长并加 ±20% 抖动，避免同批失败任务同时重试。"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_jobs(worker_id: str, limit: int, job_types: Optional[Iterable[str]] = None) -> list[BackgroundJob]:
+    """领取最多 limit 个到期任务并标记为执行中（只领取本进程已注册的类型）。"""
+    if limit <= 0:
+        return []
+    job_types = set(job_types or _registry)
+    if not job_types:
+        return []
+    now = datetime.now()
+    with transaction.atomic():
+        running = dict(
+            BackgroundJob.objects.filter(status='RUNNING', job_type__in=job_types)
+            .values('job_type')
+            .annotate(total=Count('id'))
+            .values_list('job_type', 'total')
+        )
+        slots = {}
+        for name in job_types:
+            spec = _registry.get(name)
+            if spec and spec.concurrency is not None:
+                slots[name] = spec.concurrency - running.get(name, 0)
+        available = [name for name in job_types if slots.get(name, 1) > 0]
+        if not available:
+            return []
+
+        # MySQL 5.7 等不支持 SKIP LOCKED 的数据库退化为普通行锁（worker 间会短暂互相等待）
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        candidates = list(
+            BackgroundJob.objects.select_for_update(skip_locked=skip_locked)
+            .filter(status='PENDING', run_at__lte=now, job_type__in=available)
+            .order_by('run_at', 'id')[:limit]
+        )
+        claimed = []
+        for job in candidates:
+            if job.job_type in slots:
+                if slots[job.job_type] <= 0:
+                    continue
+                slots[job.job_type] -= 1
+            claimed.append(job)
+        if not claimed:
+            return []
+
+        BackgroundJob.objects.filter(id__in=[job.id for job in claimed]).update(
+            status='RUNNING',
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+    for job in claimed:
+        job.status = 'RUNNING'
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+    return claimed
+
+
+def run_job(job: BackgroundJob) -> bool:
+    """执行已领取的任务并记录结果，返回是否成功。"""
+    spec = _registry.get(job.job_type)
+    try:
+        if spec is None:
+            raise LookupError(f'未注册的任务类型: {job.job_type}')
+        spec.handler(job.payload or {})
+    except Exception:
+        _record_failure(job, traceback.format_exc())
+        return False
+
+    now = datetime.now()
+    BackgroundJob.objects.filter(id=job.id, status='RUNNING', locked_by=job.locked_by).update(
+        status='SUCCEEDED',
+        last_error='',
+        finished_at=now,
+        updated_at=now,
+    )
+    return True
+
+
+def _record_failure(job: BackgroundJob, error: str) -> None:
+    now = datetime.now()
+    error = error[-ERROR_MAX_LENGTH:]
+    qs = BackgroundJob.objects.filter(id=job.id, status='RUNNING', locked_by=job.locked_by)
+    if job.attempts >= job.max_attempts:
+        qs.update(status='DEAD', last_error=error, locked_by='', finished_at=now, updated_at=now)
+        logger.error(f'后台任务多次失败，已转入死信: {job.job_type}#{job.id} attempts={job.attempts}\n{error}')
+        return
+    delay = backoff_seconds(job.attempts)
+    qs.update(
+        status='PENDING',
+        last_error=error,
+        locked_by='',
+        run_at=now + timedelta(seconds=delay),
+        updated_at=now,
+    )
+    logger.warning(f'后台任务执行失败，{delay:.0f} 秒后重试: {job.job_type}#{job.id} attempts={job.attempts}\n{error}')
+
+
+def requeue_stale(stale_after: int = STALE_AFTER_SECONDS) -> int:
+    """把超时未完成的执行中任务放回队列（尝试次数已用尽的转入死信）。"""
+    now = datetime.now()
+    stale = BackgroundJob.objects.filter(status='RUNNING', locked_at__lt=now - timedelta(seconds=stale_after))
+    error = f'执行超过 {stale_after} 秒未完成，worker 可能已退出'
+    dead = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='DEAD',
+        last_error=error,
+        locked_by='',
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = stale.update(status='PENDING', last_error=error, locked_by='', run_at=now, updated_at=now)
+    if dead or requeued:
+        logger.warning(f'回收超时后台任务: 重新入队 {requeued} 个，转入死信 {dead} 个')
+    return requeued + dead
+
+
+def retry_jobs(job_ids: Optional[Iterable[int]] = None, status: str = 'DEAD') -> int:
+    """重新入队：指定 id，或某状态（默认死信）下的全部任务；尝试次数清零。"""
+    qs = BackgroundJob.objects.filter(status=status) if job_ids is None else BackgroundJob.objects.filter(
+        id__in=list(job_ids),
+    ).exclude(status='RUNNING')
+    now = datetime.now()
+    return qs.update(status='PENDING', attempts=0, run_at=now, locked_by='', finished_at=None, updated_at=now)
+
+
+def purge_finished(older_than_days: int) -> int:
+    """删除完成超过指定天数的成功任务。"""
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    deleted, _ = BackgroundJob.objects.filter(status='SUCCEEDED', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _execute(job: BackgroundJob) -> bool:
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_worker(
+    worker_id: str,
+    stop: threading.Event,
+    concurrency: int = 4,
+    poll_interval: float = 1.0,
+    job_types: Optional[Iterable[str]] = None,
+    once: bool = False,
+) -> int:
+    """循环领取并执行任务，直到 stop 被设置（once 时处理完当前到期任务即返回），返回领取的任务数。
+
+    stop 设置后不再领取新任务，等待执行中的任务完成后返回。
+    """
+    job_types = list(job_types or _registry)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job')
+    inflight = set()
+    last_maintenance = 0.0
+    processed = 0
+    try:
+        while not stop.is_set():
+            if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                requeue_stale()
+                purge_finished(PURGE_AFTER_DAYS)
+                last_maintenance = time.monotonic()
+
+            inflight = {f for f in inflight if not f.done()}
+            free = concurrency - len(inflight)
+            jobs = claim_jobs(worker_id, free, job_types) if free > 0 else []
+            for job in jobs:
+                inflight.add(executor.submit(_execute, job))
+            processed += len(jobs)
+
+            if jobs and len(inflight) < concurrency:
+                continue
+            if once and not jobs and not inflight:
+                break
+            if inflight:
+                wait(inflight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            else:
+                stop.wait(poll_interval)
+    finally:
+        executor.shutdown(wait=True)
+        close_old_connections()
+    return processed
+
+
+_embedded: Optional[tuple[threading.Thread, threading.Event]] = None
+
+
+def _acquire_instance_lock(stop: threading.Event):
+    """等待获得实例内的内置 worker 文件锁，返回持有锁的文件对象；stop 被设置时返回 None。"""
+    try:
+        import fcntl
+    except ImportError:
+        # 非 POSIX 平台不做选举
+        return open(os.devnull)
+    lock_file = open(EMBEDDED_LOCK_FILE, 'a+')
+    while not stop.is_set():
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except OSError:
+            stop.wait(EMBEDDED_LOCK_RETRY)
+    lock_file.close()
+    return None
+
+
+def start_embedded_worker(concurrency: int = 1, poll_interval: float = 2.0) -> None:
+    """在当前进程中启动后台 worker 线程（gunicorn worker 初始化后调用，每个进程最多一个）。
+
+    线程先竞争实例内的文件锁，只有持锁的进程轮询队列；进程退出时锁随之释放。
+    """
+    global _embedded
+    if _embedded is not None:
+        return
+    load_handlers()
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:embedded'
+    stop = threading.Event()
+
+    def loop():
+        lock_file = _acquire_instance_lock(stop)
+        if lock_file is None:
+            return
+        logger.info(f'内置后台任务 worker 开始消费队列: {worker_id} 并发 {concurrency}')
+        try:
+            while not stop.is_set():
+                try:
+                    run_worker(worker_id, stop, max(1, concurrency), max(0.1, poll_interval))
+                except Exception:
+                    # 数据库暂时不可用等异常：记录后稍候重试，不让线程退出
+                    logger.exception(f'内置后台任务 worker 异常，稍后重试: {worker_id}')
+                    stop.wait(max(poll_interval, 5.0))
+        finally:
+            lock_file.close()
+
+    thread = threading.Thread(target=loop, name='job-worker', daemon=True)
+    thread.start()
+    _embedded = (thread, stop)
+
+
+def stop_embedded_worker(timeout: Optional[float] = None) -> None:
+    """停止领取新任务并等待执行中的任务完成（最多 timeout 秒）。"""
+    global _embedded
+    if _embedded is None:
+        return
+    thread, stop = _embedded
+    stop.set()
+    thread.join(timeout)
+    _embedded = None
@@ -0,0 +1,194 @@
+"""商户地图聚合服务
+
+按视野范围（矩形）返回服务端聚合后的商户标记点：
+- 以 MerchantProfile.geo_hash 为空间索引键，按缩放级别选择格子精度
+- 视野先被切分为若干“瓦片”（比格子粗一级的 geohash 前缀），每个瓦片内按格子分组聚合
+- 瓦片结果按 (精度, 分类, 版本) 缓存，商户定位变化时通过版本号整体失效；
+  版本号存于数据库（CacheVersion），各 worker / 实例的进程内缓存同时失效
+- 瓦片数量有上限，单个瓦片最多 32 个格子，因此返回数据量与视野内商户数量无关
+- 按格子范围裁剪：完全在视野内的格子直接使用缓存结果，与视野不相交的丢弃，
+  跨视野边界的格子只统计视野内的商户（一次查询，不缓存），保证视野内的商户都被计入且不多计
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.db.models.functions import Substr
+
+from wxcloudrun.models import CacheVersion, MerchantProfile
+from wxcloudrun.utils import geohash
+
+
+MAX_TILES = 16
+TILE_CACHE_TTL = 300
+MIN_CELL_PRECISION = 2
+MAX_CELL_PRECISION = 8
+
+_VERSION_KEY = 'merchant_map'
+
+# 小程序 map 组件 scale 取值 3-20，按区间映射为格子精度
+_ZOOM_PRECISION = (
+    (4, 2),
+    (7, 3),
+    (10, 4),
+    (13, 5),
+    (16, 6),
+    (18, 7),
+)
+
+
+def precision_for_zoom(zoom: int) -> int:
+    for max_zoom, precision in _ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return MAX_CELL_PRECISION
+
+
+def invalidate_merchant_map_cache():
+    """商户定位/类型/分类变化后调用，使所有进程中的瓦片缓存失效（与商户修改同一事务提交）。"""
+    now = datetime.now()
+    if CacheVersion.objects.filter(key=_VERSION_KEY).update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            CacheVersion.objects.create(key=_VERSION_KEY, version=2, updated_at=now)
+    except IntegrityError:
+        # 并发创建：对方已建行，再递增一次
+        CacheVersion.objects.filter(key=_VERSION_KEY).update(version=F('version') + 1, updated_at=now)
+
+
+def _cache_version() -> int:
+    version = CacheVersion.objects.filter(key=_VERSION_KEY).values_list('version', flat=True).first()
+    return version or 1
+
+
+def _tile_cache_key(tile: str, cell_precision: int, category_id: Optional[int], version: int) -> str:
+    return f"merchant_map:v{version}:{tile}:{cell_precision}:{category_id or 0}"
+
+
+def _map_queryset(category_id: Optional[int]):
+    qs = MerchantProfile.objects.exclude(merchant_type='DISCOUNT_STORE')
+    if category_id is not None:
+        qs = qs.filter(category_id=category_id)
+    return qs
+
+
+def _compute_tile(tile: str, cell_precision: int, category_id: Optional[int]) -> list[dict]:
+    return _aggregate(_map_queryset(category_id).filter(geo_hash__startswith=tile), cell_precision)
+
+
+def _aggregate(qs, cell_precision: int) -> list[dict]:
+    rows = (
+        qs.annotate(cell=Substr('geo_hash', 1, cell_precision))
+        .values('cell')
+        .annotate(
+            count=Count('id'),
+            latitude=Avg('latitude'),
+            longitude=Avg('longitude'),
+            first_merchant_id=Min('merchant_id'),
+            last_merchant_id=Max('merchant_id'),
+        )
+        .order_by('cell')
+    )
+    clusters = []
+    for row in rows:
+        merchant_ids = [row['first_merchant_id']]
+        if row['last_merchant_id'] != row['first_merchant_id']:
+            merchant_ids.append(row['last_merchant_id'])
+        clusters.append({
+            'geohash': row['cell'],
+            'latitude': round(float(row['latitude']), 6),
+            'longitude': round(float(row['longitude']), 6),
+            'count': row['count'],
+            'merchant_ids': merchant_ids,
+        })
+    return clusters
+
+
+def _clip_clusters(
+    clusters: list[dict],
+    cell_precision: int,
+    category_id: Optional[int],
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+) -> list[dict]:
+    """按格子范围裁剪到视野：内部格子原样保留，边界格子重新统计视野内的商户。"""
+    visible = []
+    edge_cells = []
+    for cluster in clusters:
+        cell_min_lat, cell_min_lng, cell_max_lat, cell_max_lng = geohash.bounds(cluster['geohash'])
+        if cell_max_lat < min_lat or cell_min_lat > max_lat or cell_max_lng < min_lng or cell_min_lng > max_lng:
+            continue
+        if min_lat <= cell_min_lat and cell_max_lat <= max_lat and min_lng <= cell_min_lng and cell_max_lng <= max_lng:
+            visible.append(cluster)
+        else:
+            edge_cells.append(cluster['geohash'])
+    if edge_cells:
+        prefixes = Q()
+        for cell in edge_cells:
+            prefixes |= Q(geo_hash__startswith=cell)
+        qs = _map_queryset(category_id).filter(
+            prefixes,
+            latitude__gte=min_lat,
+            latitude__lte=max_lat,
+            longitude__gte=min_lng,
+            longitude__lte=max_lng,
+        )
+        visible.extend(_aggregate(qs, cell_precision))
+    visible.sort(key=lambda c: c['geohash'])
+    return visible
+
+
+def get_map_clusters(
+    *,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    zoom: int,
+    category_id: Optional[int] = None,
+) -> dict:
+    """返回视野范围内的聚合标记点。"""
+    cell_precision = precision_for_zoom(zoom)
+    # 视野过大时降低精度，保证瓦片数量不超过上限
+    while (
+        cell_precision > MIN_CELL_PRECISION
+        and geohash.count_covering_cells(min_lat, min_lng, max_lat, max_lng, cell_precision - 1) > MAX_TILES * 4
+    ):
+        cell_precision -= 1
+    tile_precision = cell_precision - 1
+    tiles = geohash.covering_cells(min_lat, min_lng, max_lat, max_lng, tile_precision)
+    while len(tiles) > MAX_TILES and tile_precision > 1:
+        cell_precision -= 1
+        tile_precision -= 1
+        tiles = geohash.covering_cells(min_lat, min_lng, max_lat, max_lng, tile_precision)
+    truncated = len(tiles) > MAX_TILES
+    tiles = tiles[:MAX_TILES]
+
+    version = _cache_version()
+    keys = {tile: _tile_cache_key(tile, cell_precision, category_id, version) for tile in tiles}
+    cached = cache.get_many(list(keys.values()))
+    to_cache = {}
+    clusters = []
+    for tile in tiles:
+        key = keys[tile]
+        tile_clusters = cached.get(key)
+        if tile_clusters is None:
+            tile_clusters = _compute_tile(tile, cell_precision, category_id)
+            to_cache[key] = tile_clusters
+        clusters.extend(tile_clusters)
+    if to_cache:
+        cache.set_many(to_cache, TILE_CACHE_TTL)
+
+    visible = _clip_clusters(clusters, cell_precision, category_id, min_lat, min_lng, max_lat, max_lng)
+    return {
+        'precision': cell_precision,
+        'clusters': visible,
+        'truncated': truncated,
+    }
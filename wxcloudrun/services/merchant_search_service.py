@@ -0,0 +1,147 @@
+"""商户全文搜索服务
+
+基于 MerchantSearchToken 倒排索引表实现：
+- 建索引：商户名称/标题/地址/简介按字段权重分词写入索引表（中文单字+二元组，字母数字前缀词）
+- 查询：查询词元全部命中的商户按权重之和排序，可按分类过滤
+- 查询只走 (token, category_id) 索引，不再对商户表做前置通配符的 LIKE 全表扫描
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from wxcloudrun.models import MerchantProfile, MerchantSearchToken
+from wxcloudrun.utils.search_tokenizer import index_terms, query_terms
+
+
+logger = logging.getLogger('log')
+
+# 参与索引的字段及权重
+FIELD_WEIGHTS = (
+    ('merchant_name', 8),
+    ('title', 4),
+    ('address', 2),
+    ('description', 1),
+)
+# 影响索引内容的商户字段（信号据此判断是否需要重建单个商户的索引）
+INDEXED_FIELDS = {name for name, _ in FIELD_WEIGHTS} | {'category', 'category_id', 'merchant_type'}
+
+# 同一字段内重复出现的词元最多累计 3 次，避免堆砌关键词
+MAX_TERM_REPEAT = 3
+# 单个商户最多保留的词元数量（按权重取前 N 个，限制长简介的索引体积）
+MAX_TOKENS_PER_MERCHANT = 2000
+MAX_QUERY_TERMS = 16
+REBUILD_BATCH_SIZE = 500
+
+
+def _merchant_weights(merchant: MerchantProfile) -> Counter:
+    weights: Counter = Counter()
+    for field, field_weight in FIELD_WEIGHTS:
+        for term, count in index_terms(getattr(merchant, field, '') or '').items():
+            weights[term] += field_weight * min(count, MAX_TERM_REPEAT)
+    return weights
+
+
+def _build_rows(merchant: MerchantProfile) -> list[MerchantSearchToken]:
+    weights = _merchant_weights(merchant)
+    return [
+        MerchantSearchToken(
+            merchant_id=merchant.id,
+            token=term,
+            weight=weight,
+            category_id=merchant.category_id,
+            merchant_type=merchant.merchant_type or 'NORMAL',
+        )
+        for term, weight in weights.most_common(MAX_TOKENS_PER_MERCHANT)
+    ]
+
+
+def reindex_merchant(merchant: MerchantProfile):
+    """重建单个商户的索引。"""
+    rows = _build_rows(merchant)
+    with transaction.atomic():
+        MerchantSearchToken.objects.filter(merchant_id=merchant.id).delete()
+        MerchantSearchToken.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+
+
+def rebuild_index(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """全量重建索引，返回处理的商户数量。"""
+    fields = ['id', 'category_id', 'merchant_type'] + [name for name, _ in FIELD_WEIGHTS]
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(
+            MerchantProfile.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only(*fields)[:batch_size]
+        )
+        if not batch:
+            break
+        ids = [m.id for m in batch]
+        rows = []
+        for m in batch:
+            rows.extend(_build_rows(m))
+        with transaction.atomic():
+            MerchantSearchToken.objects.filter(merchant_id__in=ids).delete()
+            MerchantSearchToken.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+        total += len(batch)
+        last_id = ids[-1]
+    logger.info(f'商户搜索索引重建完成，共 {total} 个商户')
+    return total
+
+
+def _matching_tokens(
+    keyword: str,
+    category_id: Optional[int] = None,
+    merchant_types: Optional[Iterable[str]] = None,
+    exclude_merchant_types: Optional[Iterable[str]] = None,
+):
+    """返回按商户分组的命中结果（所有查询词元都命中才算匹配），关键词无有效词元时返回 None。"""
+    terms = query_terms(keyword)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    qs = MerchantSearchToken.objects.filter(token__in=terms)
+    if category_id is not None:
+        qs = qs.filter(category_id=category_id)
+    if merchant_types:
+        qs = qs.filter(merchant_type__in=list(merchant_types))
+    if exclude_merchant_types:
+        qs = qs.exclude(merchant_type__in=list(exclude_merchant_types))
+    return (
+        qs.values('merchant_id')
+        .annotate(hits=Count('id'), score=Sum('weight'))
+        .filter(hits=len(terms))
+    )
+
+
+def search_merchant_ids(keyword: str, *, offset: int = 0, limit: int = 20, **filters) -> list[tuple[int, int]]:
+    """按相关度返回 [(商户主键, 得分)]。
+
+    filters 支持 category_id / merchant_types / exclude_merchant_types。
+    """
+    matched = _matching_tokens(keyword, **filters)
+    if matched is None:
+        return []
+    rows = matched.order_by('-score', '-merchant_id').values_list('merchant_id', 'score')
+    return list(rows[offset:offset + limit])
+
+
+def matching_merchant_pks(keyword: str, **filters):
+    """返回命中商户主键的子查询，供列表接口与其他条件组合（关键词无有效词元时返回 None）。"""
+    matched = _matching_tokens(keyword, **filters)
+    if matched is None:
+        return None
+    return matched.values('merchant_id')
+
+
+def search_merchants(keyword: str, **kwargs) -> list[tuple[MerchantProfile, int]]:
+    """按相关度返回 [(商户, 得分)]，参数同 search_merchant_ids。"""
+    hits = search_merchant_ids(keyword, **kwargs)
+    if not hits:
+        return []
+    merchants = MerchantProfile.objects.select_related('user', 'category').in_bulk([pk for pk, _ in hits])
+    return [(merchants[pk], score) for pk, score in hits if pk in merchants]
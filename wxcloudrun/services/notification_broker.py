@@ -0,0 +1,132 @@
+"""通知未读数推送（进程内发布/订阅）
+
+SSE 连接（见 wxcloudrun/sse.py）在事件循环中订阅自己用户的未读数：
+- 本进程内的阅读/发布/删除操作调用 notify_users/notify_all（线程安全，可在同步视图中调用），
+  被标记的用户在短暂合并后一次查询最新未读数并推送给对应连接
+- 其它副本上的变更由轮询桥接发现：定期查询已订阅用户中 updated_at 有变化的阅读状态
+没有订阅者时以上调用均为空操作，同步部署（WSGI）下不产生额外开销。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from wxcloudrun.models import NotificationReadState
+
+
+logger = logging.getLogger('log')
+
+# 副本间轮询间隔（秒）
+POLL_INTERVAL = float(os.environ.get('NOTIFICATION_SSE_POLL_INTERVAL', '5'))
+# 本进程内变更的合并窗口（秒）
+FLUSH_DELAY = 0.05
+QUERY_CHUNK_SIZE = 500
+
+
+def _fetch_counts(user_ids: list[int], since: Optional[datetime] = None) -> list[tuple[int, int]]:
+    """查询用户未读数；since 不为空时只返回此后有变化的用户。"""
+    close_old_connections()
+    rows = []
+    for i in range(0, len(user_ids), QUERY_CHUNK_SIZE):
+        qs = NotificationReadState.objects.filter(user_id__in=user_ids[i:i + QUERY_CHUNK_SIZE])
+        if since is not None:
+            qs = qs.filter(updated_at__gte=since)
+        rows.extend(qs.values_list('user_id', 'unread_count'))
+    return rows
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dirty: set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._bridge_task: Optional[asyncio.Task] = None
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """注册连接（需在事件循环中调用），返回只保留最新未读数的队列。"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        if self._bridge_task is None or self._bridge_task.done():
+            self._bridge_task = self._loop.create_task(self._bridge())
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def notify_users(self, user_ids: Iterable[int]) -> None:
+        """标记用户未读数已变化（线程安全）。"""
+        if not self._subscribers or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._mark_dirty, list(user_ids))
+
+    def notify_all(self) -> None:
+        """标记所有订阅用户未读数已变化（线程安全）。"""
+        if not self._subscribers or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._mark_dirty, None)
+
+    def _mark_dirty(self, user_ids: Optional[list[int]]) -> None:
+        self._dirty.update(self._subscribers if user_ids is None else user_ids)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self._loop.create_task(self._flush())
+
+    def _deliver(self, rows: Iterable[tuple[int, int]]) -> None:
+        for user_id, count in rows:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(max(count, 0))
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(FLUSH_DELAY)
+        user_ids = [uid for uid in self._dirty if uid in self._subscribers]
+        self._dirty.clear()
+        if not user_ids:
+            return
+        try:
+            rows = await sync_to_async(_fetch_counts, thread_sensitive=False)(user_ids)
+        except Exception as exc:
+            logger.error(f'查询未读数失败: {exc}', exc_info=True)
+            return
+        self._deliver(rows)
+
+    async def _bridge(self) -> None:
+        """轮询其它副本产生的阅读状态变化，没有订阅者时退出。"""
+        since = datetime.now()
+        while self._subscribers:
+            await asyncio.sleep(POLL_INTERVAL)
+            started = datetime.now()
+            user_ids = list(self._subscribers)
+            if not user_ids:
+                break
+            try:
+                # 回看一个轮询周期，容忍副本间的时钟偏差与未提交事务
+                rows = await sync_to_async(_fetch_counts, thread_sensitive=False)(
+                    user_ids,
+                    since - timedelta(seconds=POLL_INTERVAL),
+                )
+            except Exception as exc:
+                logger.error(f'轮询未读数变化失败: {exc}', exc_info=True)
+                continue
+            since = started
+            self._deliver(rows)
+
+
+broker = NotificationBroker()
@@ -0,0 +1,182 @@
+"""通知已读记录存储
+
+两种实现，由 settings.NOTIFICATION_READ_STORE 选择：
+- rows：NotificationRead 每个 (通知, 用户) 一行，保留阅读时间
+- bitmap：NotificationReadBitmap 每个 (通知, 用户分块) 一行压缩位图，每块 256 个用户；
+  20 万用户阅读一条通知约 800 行，写入只锁定并修改一行位图，不再产生逐行记录与二级索引项，
+  但不保留阅读时间（重复标记时 mark 返回的阅读时间为 None）
+
+两者都只记录“水位以上”的例外集合（见 notification_service），接口一致：
+read_ids / mark / mark_many / count_read / reader_counts / exclude_readers。
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+
+from wxcloudrun.models import Notification, NotificationRead, NotificationReadBitmap
+from wxcloudrun.utils import bitmap
+
+
+class RowReadStore:
+    name = 'rows'
+
+    def read_ids(self, user_id: int, notification_ids: list[int]) -> set[int]:
+        return set(
+            NotificationRead.objects.filter(user_id=user_id, notification_id__in=notification_ids).values_list(
+                'notification_id',
+                flat=True,
+            )
+        )
+
+    def mark(self, user_id: int, notice: Notification) -> tuple[bool, Optional[datetime]]:
+        """标记已读，返回 (是否新增, 阅读时间)。"""
+        read_record, created = NotificationRead.objects.get_or_create(
+            notification=notice,
+            user_id=user_id,
+            defaults={'read_at': datetime.now()},
+        )
+        if not created and not read_record.read_at:
+            read_record.read_at = datetime.now()
+            read_record.save()
+        return created, read_record.read_at
+
+    def mark_many(self, notification_id: int, user_ids: Iterable[int]) -> int:
+        user_ids = set(user_ids)
+        existing = set(
+            NotificationRead.objects.filter(notification_id=notification_id, user_id__in=user_ids).values_list(
+                'user_id',
+                flat=True,
+            )
+        )
+        now = datetime.now()
+        NotificationRead.objects.bulk_create(
+            [NotificationRead(notification_id=notification_id, user_id=uid, read_at=now) for uid in user_ids - existing],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        return len(user_ids - existing)
+
+    def count_read(self, user_id: int, notification_ids=None) -> int:
+        """用户已读数量；notification_ids（列表或子查询）限定统计范围。"""
+        qs = NotificationRead.objects.filter(user_id=user_id)
+        if notification_ids is not None:
+            qs = qs.filter(notification_id__in=notification_ids)
+        return qs.count()
+
+    def reader_counts(self, notification_ids: list[int]) -> dict[int, int]:
+        rows = (
+            NotificationRead.objects.filter(notification_id__in=notification_ids)
+            .values('notification_id')
+            .annotate(total=Count('id'))
+        )
+        return {r['notification_id']: r['total'] for r in rows}
+
+    def exclude_readers(self, qs, notification_id: int) -> list:
+        """把用户查询集拆成若干“未读过该通知的用户”查询集（用于批量 UPDATE）。"""
+        readers = NotificationRead.objects.filter(notification_id=notification_id).values('user_id')
+        return [qs.exclude(user_id__in=readers)]
+
+
+class BitmapReadStore:
+    name = 'bitmap'
+    EXCLUDE_SPAN_BITS = 12
+
+    def read_ids(self, user_id: int, notification_ids: list[int]) -> set[int]:
+        chunk, offset = bitmap.split_id(user_id)
+        rows = NotificationReadBitmap.objects.filter(chunk=chunk, notification_id__in=notification_ids).values_list(
+            'notification_id',
+            'bitmap',
+        )
+        return {nid for nid, blob in rows if bitmap.test_bit(bitmap.decode(blob), offset)}
+
+    def mark(self, user_id: int, notice: Notification) -> tuple[bool, Optional[datetime]]:
+        """标记已读，返回 (是否新增, 阅读时间)；位图不保留阅读时间，已读过时阅读时间为 None。"""
+        created = self.mark_many(notice.id, [user_id]) > 0
+        return created, datetime.now() if created else None
+
+    def mark_many(self, notification_id: int, user_ids: Iterable[int]) -> int:
+        added = 0
+        for chunk, offsets in bitmap.group_by_chunk(user_ids).items():
+            added += self._set_chunk(notification_id, chunk, offsets)
+        return added
+
+    def _set_chunk(self, notification_id: int, chunk: int, offsets: list[int]) -> int:
+        # 行锁只覆盖同一分块（CHUNK_SIZE 个用户）内的并发写入，事务内只做解压/置位/压缩
+        for _ in range(2):
+            with transaction.atomic():
+                row = (
+                    NotificationReadBitmap.objects.select_for_update()
+                    .filter(notification_id=notification_id, chunk=chunk)
+                    .first()
+                )
+                if row is not None:
+                    bits = bitmap.decode(row.bitmap)
+                    added = bitmap.set_bits(bits, offsets)
+                    if added:
+                        row.bitmap = bitmap.encode(bits)
+                        row.member_count += added
+                        row.updated_at = datetime.now()
+                        row.save(update_fields=['bitmap', 'member_count', 'updated_at'])
+                    return added
+            bits = bitmap.decode(None)
+            added = bitmap.set_bits(bits, offsets)
+            try:
+                with transaction.atomic():
+                    NotificationReadBitmap.objects.create(
+                        notification_id=notification_id,
+                        chunk=chunk,
+                        bitmap=bitmap.encode(bits),
+                        member_count=added,
+                    )
+                return added
+            except IntegrityError:
+                # 并发请求已创建该分块，回到加锁更新分支
+                continue
+        raise IntegrityError(f'写入通知已读位图失败 notification={notification_id} chunk={chunk}')
+
+    def count_read(self, user_id: int, notification_ids=None) -> int:
+        chunk, offset = bitmap.split_id(user_id)
+        qs = NotificationReadBitmap.objects.filter(chunk=chunk)
+        if notification_ids is not None:
+            qs = qs.filter(notification_id__in=notification_ids)
+        blobs = qs.values_list('bitmap', flat=True)
+        return sum(1 for blob in blobs if bitmap.test_bit(bitmap.decode(blob), offset))
+
+    def reader_counts(self, notification_ids: list[int]) -> dict[int, int]:
+        rows = (
+            NotificationReadBitmap.objects.filter(notification_id__in=notification_ids)
+            .values('notification_id')
+            .annotate(total=Sum('member_count'))
+        )
+        return {r['notification_id']: r['total'] or 0 for r in rows}
+
+    def exclude_readers(self, qs, notification_id: int) -> list:
+        """按 id 区间拆分：有位图的区间各排除区间内读者，其余用户一次性处理。
+
+        相邻分块合并为 1 << EXCLUDE_SPAN_BITS 个 id 的区间，避免分块变小后 UPDATE 语句数随之增多。
+        """
+        spans: dict[int, list[int]] = {}
+        rows = NotificationReadBitmap.objects.filter(notification_id=notification_id).values_list('chunk', 'bitmap')
+        for chunk, blob in rows:
+            members = spans.setdefault((chunk << bitmap.CHUNK_BITS) >> self.EXCLUDE_SPAN_BITS, [])
+            members.extend(bitmap.iter_members(chunk, bitmap.decode(blob)))
+        result = []
+        covered = Q()
+        for span in sorted(spans):
+            lo, hi = span << self.EXCLUDE_SPAN_BITS, (span + 1) << self.EXCLUDE_SPAN_BITS
+            result.append(qs.filter(user_id__gte=lo, user_id__lt=hi).exclude(user_id__in=spans[span]))
+            covered |= Q(user_id__gte=lo, user_id__lt=hi)
+        result.append(qs.exclude(covered) if covered else qs)
+        return result
+
+
+_STORES = {store.name: store for store in (RowReadStore(), BitmapReadStore())}
+
+
+def get_read_store():
+    return _STORES.get(getattr(settings, 'NOTIFICATION_READ_STORE', 'rows'), _STORES['rows'])
@@ -0,0 +1,340 @@
+"""通知服务：受众分段、阅读状态与正文渲染缓存
+
+每条通知有一或多个受众分段（NotificationAudience：全部用户/身份/物业/小区），用户可见 = 命中任一分段。
+小程序列表对用户的每个分段各做一次 (分段, 创建时间) 索引上的游标查询再合并，
+定向通知只出现在对应分段的索引区间里，不会拖慢其他用户的列表。
+
+每个用户维护一条 NotificationReadState：
+- 已读水位 watermark_id：id 不大于水位的通知全部视为已读（“全部已读”只需更新水位）
+- 水位以上单独阅读过的通知记录在已读存储中（例外集合，通常很小；存储实现见 notification_read_store）
+- 未读数 unread_count：发布通知时受众 +1，删除未读通知/阅读水位以上的通知时受众 -1；
+  修改受众时旧受众 -1、新受众 +1，用户身份/物业/小区变化时重新统计
+
+首次访问时按可见通知与已读记录精确统计一次未读数，之后只做增量维护；变更提交后经 notification_broker 推送给 SSE 连接。
+
+正文渲染（把图片云文件ID替换为临时URL）的结果按 (通知id, 内容哈希) 缓存，
+有效期短于临时URL的有效期；编辑通知后内容哈希变化，旧缓存自然失效。
+冷缓存由拿到锁的请求渲染一次，其余请求短暂等待结果。
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q
+
+from wxcloudrun.models import (
+    NOTIFICATION_SEGMENT_CHOICES,
+    Community,
+    Notification,
+    NotificationAudience,
+    NotificationReadState,
+    PropertyProfile,
+    UserInfo,
+)
+from wxcloudrun.services.notification_broker import broker
+from wxcloudrun.services.notification_read_store import get_read_store
+from wxcloudrun.services.storage_service import TEMP_URL_MAX_AGE, get_temp_file_urls
+from wxcloudrun.utils.notification_content import (
+    content_digest,
+    dedupe_file_ids,
+    extract_image_file_ids,
+    render_content,
+)
+from wxcloudrun.utils.pagination import build_cursor, parse_cursor
+
+
+logger = logging.getLogger('log')
+
+# 渲染结果提前于临时URL过期，避免返回即将失效的链接
+RENDER_EXPIRY_MARGIN = 600
+# 不含云文件图片的正文与临时URL无关，可缓存更久
+RENDER_STATIC_TTL = 86400
+RENDER_LOCK_TTL = 30
+RENDER_WAIT_SECONDS = 2.0
+RENDER_WAIT_INTERVAL = 0.05
+
+SEGMENT_TYPES = {value for value, _ in NOTIFICATION_SEGMENT_CHOICES}
+GLOBAL_SEGMENT = ('ALL', '')
+
+
+def user_segments(user: UserInfo) -> list[tuple[str, str]]:
+    """用户命中的受众分段：全部用户 + 身份（含已分配身份）+ 所属/自有物业 + 所属小区。"""
+    segments = [GLOBAL_SEGMENT]
+    identities = {user.identity_type} | set(user.assigned_identities.values_list('identity_type', flat=True))
+    segments.extend(('IDENTITY', identity) for identity in sorted(filter(None, identities)))
+    property_ids = PropertyProfile.objects.filter(
+        Q(user_id=user.id) | Q(id=user.owner_property_id)
+    ).values_list('property_id', flat=True)
+    segments.extend(('PROPERTY', pid) for pid in sorted(property_ids))
+    if user.owner_community_id:
+        community_id = Community.objects.filter(id=user.owner_community_id).values_list('community_id', flat=True).first()
+        if community_id:
+            segments.append(('COMMUNITY', community_id))
+    return segments
+
+
+def _segment_q(segments: Iterable[tuple[str, str]]) -> Q:
+    q = Q()
+    for segment_type, segment_value in segments:
+        q |= Q(segment_type=segment_type, segment_value=segment_value)
+    return q
+
+
+def _audience_user_ids(segments: list[tuple[str, str]]):
+    """受众用户 id 子查询，包含全部用户分段时返回 None（不限定用户）。"""
+    if GLOBAL_SEGMENT in segments:
+        return None
+    q = Q()
+    for segment_type, segment_value in segments:
+        if segment_type == 'IDENTITY':
+            q |= Q(identity_type=segment_value) | Q(assigned_identities__identity_type=segment_value)
+        elif segment_type == 'PROPERTY':
+            q |= Q(owner_property__property_id=segment_value) | Q(property_profile__property_id=segment_value)
+        elif segment_type == 'COMMUNITY':
+            q |= Q(owner_community__community_id=segment_value)
+    return UserInfo.objects.filter(q).values('id')
+
+
+def get_audience(notice: Notification) -> list[tuple[str, str]]:
+    return list(notice.audiences.values_list('segment_type', 'segment_value'))
+
+
+def set_audience(notice: Notification, segments: Iterable[tuple[str, str]]) -> list[tuple[str, str]]:
+    """替换通知受众（空列表表示全部用户），已发布的通知同步调整新旧受众的未读数。"""
+    segments = sorted(set(segments)) or [GLOBAL_SEGMENT]
+    if GLOBAL_SEGMENT in segments:
+        segments = [GLOBAL_SEGMENT]
+    current = get_audience(notice)
+    if set(current) == set(segments):
+        return segments
+    with transaction.atomic():
+        # 尚无受众行说明通知还未发布（发布在事务提交后进行），只写入受众
+        if current:
+            _adjust_unread(notice, current, -1)
+        notice.audiences.all().delete()
+        NotificationAudience.objects.bulk_create([
+            NotificationAudience(
+                notification=notice,
+                segment_type=segment_type,
+                segment_value=segment_value,
+                created_at=notice.created_at,
+            )
+            for segment_type, segment_value in segments
+        ])
+        if current:
+            _adjust_unread(notice, segments, 1)
+    return segments
+
+
+def is_visible(user: UserInfo, notice: Notification) -> bool:
+    return NotificationAudience.objects.filter(_segment_q(user_segments(user)), notification_id=notice.id).exists()
+
+
+def visible_notification_page(user: UserInfo, cursor: str, page_size: int):
+    """按 (-created_at, -id) 游标分页用户可见的通知，返回 (通知列表, has_more, next_cursor)。
+
+    每个分段各取 page_size + 1 条（走 NotifAudience_segment_idx 倒序扫描），合并去重后截取一页。
+    游标非法时抛出 ValueError。
+    """
+    after = None
+    cursor = (cursor or '').strip()
+    if cursor:
+        after = parse_cursor(cursor, 'created_at')
+        if not after:
+            raise ValueError('cursor 无效')
+
+    candidates = {}
+    for segment_type, segment_value in user_segments(user):
+        qs = NotificationAudience.objects.filter(segment_type=segment_type, segment_value=segment_value)
+        if after:
+            cursor_dt, cursor_pk = after
+            qs = qs.filter(Q(created_at__lt=cursor_dt) | Q(created_at=cursor_dt, notification_id__lt=cursor_pk))
+        rows = qs.order_by('-created_at', '-notification_id').values_list('notification_id', 'created_at')
+        candidates.update(rows[: page_size + 1])
+
+    ordered = sorted(candidates, key=lambda nid: (candidates[nid], nid), reverse=True)[: page_size + 1]
+    has_more = len(ordered) > page_size
+    page_ids = ordered[:page_size]
+    notices = Notification.objects.only('id', 'title', 'summary', 'created_at').in_bulk(page_ids)
+    objects = [notices[nid] for nid in page_ids if nid in notices]
+    next_cursor = build_cursor(objects[-1], 'created_at') if has_more and objects else None
+    return objects, has_more, next_cursor
+
+
+def _count_unread(user: UserInfo, watermark_id: int) -> int:
+    visible = NotificationAudience.objects.filter(
+        _segment_q(user_segments(user)),
+        notification_id__gt=watermark_id,
+    ).values('notification_id')
+    return visible.distinct().count() - get_read_store().count_read(user.id, visible)
+
+
+def get_read_state(user: UserInfo) -> NotificationReadState:
+    """获取用户阅读状态，不存在时按可见通知与已读记录初始化。"""
+    state = NotificationReadState.objects.filter(user_id=user.id).first()
+    if state:
+        return state
+    unread = _count_unread(user, 0)
+    try:
+        with transaction.atomic():
+            return NotificationReadState.objects.create(user_id=user.id, unread_count=unread)
+    except IntegrityError:
+        # 并发请求已完成初始化
+        return NotificationReadState.objects.get(user_id=user.id)
+
+
+def unread_count(user: UserInfo) -> int:
+    return max(get_read_state(user).unread_count, 0)
+
+
+def refresh_read_state(user: UserInfo):
+    """用户分段变化后按当前水位重新统计未读数（未初始化的用户无需处理）。"""
+    state = NotificationReadState.objects.filter(user_id=user.id).only('watermark_id').first()
+    if not state:
+        return None
+    unread = _count_unread(user, state.watermark_id)
+    NotificationReadState.objects.filter(user_id=user.id).update(unread_count=unread, updated_at=datetime.now())
+    transaction.on_commit(lambda: broker.notify_users([user.id]))
+    return unread
+
+
+def read_notification_ids(state: NotificationReadState, notification_ids: Iterable[int]) -> set[int]:
+    """返回给定通知中已读的 id 集合（水位以下直接视为已读，只查询水位以上的例外记录）。"""
+    notification_ids = list(notification_ids)
+    read_ids = {nid for nid in notification_ids if nid <= state.watermark_id}
+    above = [nid for nid in notification_ids if nid > state.watermark_id]
+    if above:
+        read_ids.update(get_read_store().read_ids(state.user_id, above))
+    return read_ids
+
+
+def mark_read(user: UserInfo, notice: Notification):
+    """标记单条通知已读，返回阅读时间（位图存储不保留历史阅读时间，已读过时返回 None）。"""
+    state = get_read_state(user)
+    created, read_at = get_read_store().mark(user.id, notice)
+    if created and notice.id > state.watermark_id:
+        NotificationReadState.objects.filter(
+            user_id=user.id,
+            watermark_id__lt=notice.id,
+            unread_count__gt=0,
+        ).update(unread_count=F('unread_count') - 1, updated_at=datetime.now())
+        transaction.on_commit(lambda: broker.notify_users([user.id]))
+    return read_at
+
+
+def mark_all_read(user: UserInfo) -> int:
+    """全部标记为已读：把水位推进到当前最大通知 id，返回新的水位。"""
+    watermark = Notification.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    updated = NotificationReadState.objects.filter(user_id=user.id).update(
+        watermark_id=watermark,
+        unread_count=0,
+        updated_at=datetime.now(),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                NotificationReadState.objects.create(user_id=user.id, watermark_id=watermark, unread_count=0)
+        except IntegrityError:
+            NotificationReadState.objects.filter(user_id=user.id).update(watermark_id=watermark, unread_count=0)
+    transaction.on_commit(lambda: broker.notify_users([user.id]))
+    return watermark
+
+
+def _adjust_unread(notice: Notification, segments: list[tuple[str, str]], delta: int) -> int:
+    """受众中水位低于该通知且未读过它的已初始化用户，未读数加 delta。"""
+    states = NotificationReadState.objects.filter(watermark_id__lt=notice.id)
+    user_ids = _audience_user_ids(segments)
+    if user_ids is not None:
+        states = states.filter(user_id__in=user_ids)
+    if delta < 0:
+        states = states.filter(unread_count__gt=0)
+    count = 0
+    for qs in get_read_store().exclude_readers(states, notice.id):
+        count += qs.update(unread_count=F('unread_count') + delta, updated_at=datetime.now())
+    transaction.on_commit(broker.notify_all)
+    return count
+
+
+def on_notification_published(notice: Notification) -> int:
+    """新通知提交后调用：未指定受众时设为全部用户，受众内已初始化用户的未读数 +1。"""
+    segments = get_audience(notice)
+    if not segments:
+        segments = set_audience(notice, [GLOBAL_SEGMENT])
+    count = _adjust_unread(notice, segments, 1)
+    logger.info(f'通知发布，更新未读计数 notification={notice.id} segments={segments} users={count}')
+    return count
+
+
+def on_notification_deleted(notice: Notification) -> int:
+    """通知删除前调用：对受众中仍未读该通知的用户未读数 -1（需在受众与已读记录级联删除前执行）。"""
+    return _adjust_unread(notice, get_audience(notice) or [GLOBAL_SEGMENT], -1)
+
+
+def _render_cache_key(notice: Notification) -> str:
+    return f'notification_html:{notice.id}:{notice.content_hash or content_digest(notice.content)}'
+
+
+def _render(notices: list[Notification]) -> tuple[dict[int, str], dict[int, int]]:
+    """渲染正文，返回 ({通知id: html}, {通知id: 可缓存秒数})，临时URL获取失败的不缓存。"""
+    file_ids_map = {n.id: dedupe_file_ids(extract_image_file_ids(n.content)) for n in notices}
+    all_file_ids = dedupe_file_ids(fid for ids in file_ids_map.values() for fid in ids)
+    temp_urls = get_temp_file_urls(all_file_ids) if all_file_ids else {}
+
+    rendered, ttls = {}, {}
+    for n in notices:
+        rendered[n.id] = render_content(n.content, temp_urls)
+        file_ids = file_ids_map[n.id]
+        if not file_ids:
+            ttls[n.id] = RENDER_STATIC_TTL
+        elif all(fid in temp_urls for fid in file_ids):
+            ttls[n.id] = TEMP_URL_MAX_AGE - RENDER_EXPIRY_MARGIN
+    return rendered, ttls
+
+
+def render_notification(notice: Notification) -> str:
+    """返回渲染后的通知正文（带缓存，冷缓存只由一个请求渲染）。"""
+    key = _render_cache_key(notice)
+    content_html = cache.get(key)
+    if content_html is not None:
+        return content_html
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, RENDER_LOCK_TTL):
+        deadline = time.monotonic() + RENDER_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(RENDER_WAIT_INTERVAL)
+            content_html = cache.get(key)
+            if content_html is not None:
+                return content_html
+        logger.warning(f'等待通知渲染缓存超时，直接渲染 notification={notice.id}')
+        rendered, _ = _render([notice])
+        return rendered[notice.id]
+
+    try:
+        rendered, ttls = _render([notice])
+        if notice.id in ttls:
+            cache.set(key, rendered[notice.id], ttls[notice.id])
+        return rendered[notice.id]
+    finally:
+        cache.delete(lock_key)
+
+
+def render_notifications(notices: Iterable[Notification]) -> dict[int, str]:
+    """批量渲染通知正文，未命中缓存的合并为一次临时URL请求。"""
+    notices = list(notices)
+    keys = {n.id: _render_cache_key(n) for n in notices}
+    cached = cache.get_many(list(keys.values()))
+    result = {n.id: cached[keys[n.id]] for n in notices if keys[n.id] in cached}
+    misses = [n for n in notices if n.id not in result]
+    if misses:
+        rendered, ttls = _render(misses)
+        result.update(rendered)
+        for n in misses:
+            if n.id in ttls:
+                cache.set(keys[n.id], rendered[n.id], ttls[n.id])
+    return result
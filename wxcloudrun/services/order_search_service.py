@@ -0,0 +1,162 @@
+"""订单搜索投影服务
+
+后台订单关键词检索原先对订单表关联业主、商户表做 7 个 icontains 条件，属于全表扫描。
+这里维护一张去规范化的投影表：
+- OrderSearch.search_text：订单号、业主（openid/系统编号/手机号/昵称）、商户（商户ID/名称）拼接的小写文本
+- OrderSearchGram：检索文本的三元组倒排索引
+查询时先用三元组索引取候选订单，再对候选做子串校验；关键词不足 3 个字符时退化为对投影表的单表匹配。
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count
+
+from wxcloudrun.models import MerchantProfile, OrderSearch, OrderSearchGram, SettlementOrder, UserInfo
+from wxcloudrun.utils.phone import is_phone_keyword, normalize_phone
+
+
+logger = logging.getLogger('log')
+
+GRAM_SIZE = 3
+MAX_QUERY_GRAMS = 8
+REFRESH_BATCH_SIZE = 500
+
+# 影响检索文本的字段（信号据此判断是否需要刷新投影）
+ORDER_FIELDS = {'order_id', 'merchant', 'merchant_id', 'owner', 'owner_id'}
+OWNER_FIELDS = {'openid', 'system_id', 'phone_number', 'nickname'}
+MERCHANT_FIELDS = {'merchant_id', 'merchant_name'}
+
+
+def _clean(value) -> str:
+    return str(value or '').replace('\n', ' ').lower()
+
+
+def owner_text(owner: Optional[UserInfo]) -> str:
+    if owner is None:
+        return '\n\n\n'
+    return '\n'.join([
+        _clean(owner.openid),
+        _clean(owner.system_id),
+        _clean(normalize_phone(owner.phone_number)),
+        _clean(owner.nickname),
+    ])
+
+
+def merchant_text(merchant: Optional[MerchantProfile]) -> str:
+    if merchant is None:
+        return '\n'
+    return '\n'.join([_clean(merchant.merchant_id), _clean(merchant.merchant_name)])
+
+
+def build_search_text(order: SettlementOrder) -> str:
+    """检索文本：订单号 \\n 业主信息 \\n 商户信息（商户信息固定在末尾，便于判断是否过期）。"""
+    return '\n'.join([_clean(order.order_id), owner_text(order.owner), merchant_text(order.merchant)])
+
+
+def _grams(text: str) -> set[str]:
+    grams = set()
+    for part in text.split('\n'):
+        for i in range(len(part) - GRAM_SIZE + 1):
+            grams.add(part[i:i + GRAM_SIZE])
+    return grams
+
+
+def refresh_orders(orders: Iterable[SettlementOrder], force: bool = False) -> int:
+    """刷新给定订单的投影与三元组，返回实际改写的订单数量（文本未变化时跳过）。"""
+    orders = list(orders)
+    if not orders:
+        return 0
+    existing = {}
+    if not force:
+        existing = dict(
+            OrderSearch.objects.filter(order_id__in=[o.id for o in orders]).values_list('order_id', 'search_text')
+        )
+    changed = []
+    for order in orders:
+        text = build_search_text(order)
+        if force or existing.get(order.id) != text:
+            changed.append((order.id, text))
+    if not changed:
+        return 0
+
+    ids = [pk for pk, _ in changed]
+    with transaction.atomic():
+        OrderSearch.objects.filter(order_id__in=ids).delete()
+        OrderSearchGram.objects.filter(order_id__in=ids).delete()
+        OrderSearch.objects.bulk_create(
+            [OrderSearch(order_id=pk, search_text=text) for pk, text in changed],
+            batch_size=REFRESH_BATCH_SIZE,
+        )
+        OrderSearchGram.objects.bulk_create(
+            [OrderSearchGram(order_id=pk, gram=gram) for pk, text in changed for gram in _grams(text)],
+            batch_size=2000,
+        )
+    return len(changed)
+
+
+def refresh_orders_queryset(qs, force: bool = False, batch_size: int = REFRESH_BATCH_SIZE) -> int:
+    """按主键分批刷新查询集中的订单。"""
+    qs = qs.select_related('merchant', 'owner').order_by('id')
+    total = 0
+    last_id = 0
+    while True:
+        batch = list(qs.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        total += refresh_orders(batch, force=force)
+        last_id = batch[-1].id
+    return total
+
+
+def refresh_owner_orders(owner: UserInfo) -> int:
+    """业主资料变更后，只刷新检索文本已过期的订单。"""
+    stale = SettlementOrder.objects.filter(owner_id=owner.id).exclude(
+        search_entry__search_text__contains=f'\n{owner_text(owner)}\n'
+    )
+    return refresh_orders_queryset(stale)
+
+
+def refresh_merchant_orders(merchant: MerchantProfile) -> int:
+    """商户资料变更后，只刷新检索文本已过期的订单。"""
+    stale = SettlementOrder.objects.filter(merchant_id=merchant.id).exclude(
+        search_entry__search_text__endswith=f'\n{merchant_text(merchant)}'
+    )
+    return refresh_orders_queryset(stale)
+
+
+def rebuild_order_search(batch_size: int = REFRESH_BATCH_SIZE) -> int:
+    """全量重建订单搜索投影。"""
+    total = refresh_orders_queryset(SettlementOrder.objects.all(), force=True, batch_size=batch_size)
+    logger.info(f'订单搜索投影重建完成，共 {total} 条订单')
+    return total
+
+
+def _query_grams(keyword: str) -> list[str]:
+    grams = sorted({keyword[i:i + GRAM_SIZE] for i in range(len(keyword) - GRAM_SIZE + 1)})
+    if len(grams) <= MAX_QUERY_GRAMS:
+        return grams
+    step = len(grams) / MAX_QUERY_GRAMS
+    return [grams[int(i * step)] for i in range(MAX_QUERY_GRAMS)]
+
+
+def matching_order_pks(keyword: str):
+    """返回命中关键词的订单主键子查询（手机号关键词按规范化数字匹配）。"""
+    keyword = (keyword or '').strip()
+    if is_phone_keyword(keyword):
+        keyword = normalize_phone(keyword)
+    keyword = _clean(keyword)
+    qs = OrderSearch.objects.filter(search_text__contains=keyword)
+    if len(keyword) >= GRAM_SIZE:
+        grams = _query_grams(keyword)
+        candidates = (
+            OrderSearchGram.objects.filter(gram__in=grams)
+            .values('order_id')
+            .annotate(hits=Count('id'))
+            .filter(hits=len(grams))
+            .values('order_id')
+        )
+        qs = qs.filter(order_id__in=candidates)
+    return qs.values('order_id')
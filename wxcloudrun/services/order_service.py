@@ -9,6 +9,7 @@ from django.db import transaction
 from django.db.models import Avg, Count, Q
 
 from wxcloudrun.models import MerchantProfile, MerchantReview, SettlementOrder, UserInfo
+from wxcloudrun.services.job_queue import enqueue, register
 
 
 def create_settlement_order(
@@ -61,6 +62,24 @@ def refresh_merchant_rating(merchant: MerchantProfile) -> MerchantProfile:
     return merchant
 
 
+@register('merchant.refresh_rating')
+def _refresh_merchant_rating_job(payload):
+    with transaction.atomic():
+        merchant = MerchantProfile.objects.select_for_update().filter(id=payload.get('merchant_id')).first()
+        if merchant:
+            refresh_merchant_rating(merchant)
+
+
+def schedule_merchant_rating_refresh(merchant_id: int) -> None:
+    """异步刷新商户评分汇总（同一商户待执行的刷新只保留一个）。
+
+    在外层事务提交后才入队：去重命中的待执行任务一定在评价可见之后才被领取，不会漏算本次评价。
+    """
+    transaction.on_commit(
+        lambda: enqueue('merchant.refresh_rating', {'merchant_id': merchant_id}, dedupe_key=str(merchant_id))
+    )
+
+
 def create_order_review(
     *,
     order_id: str,
@@ -111,8 +130,8 @@ def create_order_review(
         order.reviewed_at = datetime.now()
         order.save(update_fields=['status', 'reviewed_at', 'updated_at'])
 
-        merchant = MerchantProfile.objects.select_for_update().get(id=order.merchant_id)
-        refresh_merchant_rating(merchant)
+        # 评分汇总由后台任务刷新，提交评价不再锁商户行
+        schedule_merchant_rating_refresh(order.merchant_id)
 
         return review
 
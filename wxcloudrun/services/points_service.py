@@ -29,6 +29,40 @@ def get_points_account(user: UserInfo, identity_type: Optional[str] = None) -> U
     return account
 
 
+def get_points_accounts(users: list[UserInfo], identity_type: str) -> dict[int, UserPointsAccount]:
+    """批量获取多个用户同一身份的积分账户：{user_id: account}
+
+    与逐个调用 get_points_account 结果一致（缺失的账户批量创建，跨日账户批量重置当日积分），
+    但查询次数不随用户数增长。
+    """
+    identity = normalize_points_identity(identity_type)
+    user_ids = [u.id for u in users]
+    if not user_ids:
+        return {}
+    today = date.today()
+    accounts = {
+        a.user_id: a for a in UserPointsAccount.objects.filter(user_id__in=user_ids, identity_type=identity)
+    }
+    missing = [uid for uid in user_ids if uid not in accounts]
+    if missing:
+        UserPointsAccount.objects.bulk_create(
+            [UserPointsAccount(user_id=uid, identity_type=identity, daily_points_date=today) for uid in missing],
+            ignore_conflicts=True,
+        )
+        accounts.update({
+            a.user_id: a for a in UserPointsAccount.objects.filter(user_id__in=missing, identity_type=identity)
+        })
+    stale = [a for a in accounts.values() if a.daily_points_date != today]
+    if stale:
+        UserPointsAccount.objects.filter(id__in=[a.id for a in stale]).exclude(daily_points_date=today).update(
+            daily_points=0, daily_points_date=today,
+        )
+        for account in stale:
+            account.daily_points = 0
+            account.daily_points_date = today
+    return accounts
+
+
 def get_points_account_for_update(user: UserInfo, identity_type: str) -> UserPointsAccount:
     """获取指定身份的积分账户（select_for_update），用于事务内并发安全更新。"""
     identity = normalize_points_identity(identity_type)
@@ -1,9 +1,12 @@
 """统计业务逻辑服务"""
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncDate
+from wxcloudrun.db.router import read_replica
 from wxcloudrun.models import UserInfo, PointsRecord, AccessLog
 
 
+@read_replica()
 def get_overview_statistics():
     """获取统计概览数据"""
     today = date.today()
@@ -52,6 +55,7 @@ def get_overview_statistics():
     }
 
 
+@read_replica()
 def get_statistics_by_time(period: str):
     """按时间周期获取统计数据
     period: 'month' 或 'week'
@@ -69,31 +73,38 @@ def get_statistics_by_time(period: str):
     else:
         raise ValueError(f"不支持的周期: {period}")
     
+    # 每项指标按天分组一次查询（按时间范围过滤可走索引），再补齐没有数据的日期
+    start_at = datetime.combine(start_date, time.min)
+    end_at = datetime.combine(today + timedelta(days=1), time.min)
+    
     # 每日新增用户
-    daily_new_users = {}
-    for d in date_list:
-        count = UserInfo.objects.filter(created_at__date=d).count()
-        daily_new_users[d.strftime('%Y-%m-%d')] = count
+    users_by_day = dict(
+        UserInfo.objects.filter(created_at__gte=start_at, created_at__lt=end_at)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Count('id'))
+        .values_list('day', 'total')
+    )
+    daily_new_users = {d.strftime('%Y-%m-%d'): users_by_day.get(d, 0) for d in date_list}
     
     # 每日交易额
-    daily_transaction = {}
-    for d in date_list:
-        total = PointsRecord.objects.filter(
-            created_at__date=d
-        ).aggregate(
-            total=Sum('change')
-        )['total'] or 0
-        daily_transaction[d.strftime('%Y-%m-%d')] = abs(total)
+    transaction_by_day = dict(
+        PointsRecord.objects.filter(created_at__gte=start_at, created_at__lt=end_at)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(total=Sum('change'))
+        .values_list('day', 'total')
+    )
+    daily_transaction = {d.strftime('%Y-%m-%d'): abs(transaction_by_day.get(d) or 0) for d in date_list}
     
     # 每日访问量
-    daily_visits = {}
-    for d in date_list:
-        total = AccessLog.objects.filter(
-            access_date=d
-        ).aggregate(
-            total=Sum('access_count')
-        )['total'] or 0
-        daily_visits[d.strftime('%Y-%m-%d')] = total
+    visits_by_day = dict(
+        AccessLog.objects.filter(access_date__gte=start_date, access_date__lte=today)
+        .values('access_date')
+        .annotate(total=Sum('access_count'))
+        .values_list('access_date', 'total')
+    )
+    daily_visits = {d.strftime('%Y-%m-%d'): visits_by_day.get(d) or 0 for d in date_list}
     
     return {
         'period': period,
@@ -1,14 +1,28 @@
 """对象存储服务"""
 import os
+import time
 import logging
 import requests
 from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.services.job_queue import enqueue
+from wxcloudrun.utils.metrics import record_openapi_call
+from wxcloudrun.utils.profiler import record_openapi_event
 
 
-logger = logging.getLogger('log')
+# 开放接口调用频繁，日志走采样限速的子 logger（错误日志不受限）
+logger = logging.getLogger('log.hot')
 
 WX_OPENAPI_BASE = os.environ.get('WX_OPENAPI_BASE', 'http://api.weixin.qq.com')
 WX_ENV_ID = os.environ.get('CLOUD_ID')
+# 临时下载URL有效期（秒），依赖临时URL的缓存不得超过该时长
+TEMP_URL_MAX_AGE = 7200
+# 错误日志中响应内容的最大长度
+LOG_BODY_LIMIT = 500
+
+
+def _payload_summary(payload: dict) -> dict:
+    """错误日志只记录请求体概要：列表字段只记条数（批量文件接口可能带上百个文件ID）"""
+    return {k: f'[{len(v)} items]' if isinstance(v, (list, tuple)) else v for k, v in payload.items()}
 
 
 def wx_openapi_post(path: str, payload: dict):
@@ -18,21 +32,30 @@ def wx_openapi_post(path: str, payload: dict):
 
     url = f"{WX_OPENAPI_BASE.rstrip('/')}/{path.lstrip('/')}"
     headers = {'Content-Type': 'application/json'}
+    started = time.perf_counter()
+    ok = False
     try:
         resp = requests.post(url, headers=headers, json=payload, timeout=10)
         resp.raise_for_status()
+        ok = True
     except Exception as exc:
-        logger.error(f'请求微信开放接口失败: {path}, error={exc}')
+        logger.error('请求微信开放接口失败: %s, error=%s', path, exc)
         raise WxOpenApiError('调用微信开放接口失败') from exc
+    finally:
+        elapsed = time.perf_counter() - started
+        record_openapi_call(elapsed)
+        record_openapi_event(path, started, elapsed, ok)
+        logger.info('调用微信开放接口: %s ok=%s 耗时 %.1fms', path, ok, elapsed * 1000)
 
     try:
         data = resp.json()
     except ValueError as exc:
-        logger.error(f'解析微信开放接口响应失败: {path}, resp={resp.text}')
+        logger.error('解析微信开放接口响应失败: %s, resp=%s', path, resp.text[:LOG_BODY_LIMIT])
         raise WxOpenApiError('微信开放接口返回格式错误') from exc
 
     if data.get('errcode') != 0:
-        logger.error(f'微信开放接口返回错误: {path}, payload={payload}, resp={data}')
+        logger.error('微信开放接口返回错误: %s, payload=%s, errcode=%s, errmsg=%s',
+                     path, _payload_summary(payload), data.get('errcode'), data.get('errmsg'))
         raise WxOpenApiError(data.get('errmsg') or '微信开放接口返回错误')
     return data
 
@@ -44,7 +67,7 @@ def get_temp_file_urls(file_ids):
     try:
         data = wx_openapi_post('tcb/batchdownloadfile', {
             'env': WX_ENV_ID,
-            'file_list': [{'fileid': fid, 'max_age': 7200} for fid in file_ids],
+            'file_list': [{'fileid': fid, 'max_age': TEMP_URL_MAX_AGE} for fid in file_ids],
         })
     except WxOpenApiError:
         return {}
@@ -68,15 +91,22 @@ def resolve_icon_url(icon_value, temp_map=None):
 
 
 def delete_cloud_files(file_ids):
-    """批量删除云存储文件"""
+    """批量删除云存储文件，返回接口响应（含每个文件结果的 delete_list）"""
     if not file_ids:
-        return
-    wx_openapi_post('tcb/batchdeletefile', {
+        return {}
+    return wx_openapi_post('tcb/batchdeletefile', {
         'env': WX_ENV_ID,
         'fileid_list': file_ids,
     })
 
 
+def delete_cloud_files_later(file_ids):
+    """异步删除云存储文件（写入后台任务，由后台 worker 执行，失败自动重试；处理函数见 cloud_file_service）；非 cloud:// 文件忽略"""
+    file_ids = [fid for fid in dict.fromkeys(file_ids or []) if fid and fid.startswith('cloud://')]
+    if file_ids:
+        enqueue('storage.delete_files', {'file_ids': file_ids})
+
+
 def generate_storage_path(filename: str, directory: str = 'category-icons') -> str:
     """生成存储路径"""
     import uuid
@@ -1,6 +1,11 @@
 """用户业务逻辑服务"""
 from datetime import date
-from wxcloudrun.models import UserPointsAccount
+from typing import Optional
+
+from django.db.models import Q
+
+from wxcloudrun.models import UserInfo, UserPointsAccount
+from wxcloudrun.utils.phone import is_phone_keyword, normalize_phone
 
 
 def ensure_daily_reset(account: UserPointsAccount):
@@ -10,4 +15,29 @@ def ensure_daily_reset(account: UserPointsAccount):
         account.daily_points = 0
         account.daily_points_date = today
         account.save()
-
+
+
+def user_keyword_q(keyword: str, prefix: str = '') -> Q:
+    """用户关键词检索条件（均可走索引）
+
+    - 数字关键词：手机号前缀 或 手机号尾号（倒序字段前缀）
+    - 其他关键词：昵称前缀（小写）
+    prefix 为关联查询前缀，如 'owner__'。
+    注：派生字段已统一为小写/纯数字，使用 istartswith 以便 MySQL 生成可走索引的 LIKE 'xxx%'。
+    """
+    keyword = (keyword or '').strip()
+    cond = Q(**{f'{prefix}nickname_lower__istartswith': keyword.lower()})
+    if is_phone_keyword(keyword):
+        digits = normalize_phone(keyword)
+        cond |= Q(**{f'{prefix}phone_normalized__istartswith': digits})
+        cond |= Q(**{f'{prefix}phone_reversed__istartswith': digits[::-1]})
+    return cond
+
+
+def find_user_by_phone(phone_number: str, queryset=None) -> Optional[UserInfo]:
+    """按规范化手机号精确查找用户（同号多用户时取最新创建的）。"""
+    digits = normalize_phone(phone_number)
+    if not digits:
+        return None
+    qs = queryset if queryset is not None else UserInfo.objects.all()
+    return qs.filter(phone_normalized=digits).order_by('-id').first()
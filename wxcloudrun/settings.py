@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 import time
 
@@ -36,10 +37,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'wxcloudrun.middleware.MetricsMiddleware',
+    'wxcloudrun.middleware.QueryInspectorMiddleware',
+    'wxcloudrun.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'wxcloudrun.db.router.ReplicaRoutingMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -73,18 +78,69 @@ WSGI_APPLICATION = 'wxcloudrun.wsgi.application'
 mysql_address = os.environ.get("MYSQL_ADDRESS", "localhost:3306")
 mysql_host, mysql_port = mysql_address.split(':') if ':' in mysql_address else (mysql_address, '3306')
 
+# 连接复用（见 wxcloudrun/db/pool.py）：
+# - DB_CONN_MAX_AGE：线程持有连接的最长秒数，0 表示每个请求结束即释放
+# - DB_HEALTH_CHECKS：复用连接前先 ping，失效则重连
+# - DB_POOL_SIZE / DB_POOL_MAX_AGE：每个 worker 进程缓存的空闲连接数（0 关闭连接池）及物理连接最长寿命
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'wxcloudrun.db.mysql',
         'NAME': os.environ.get("MYSQL_DATABASE", 'django_demo'),
         'USER': os.environ.get("MYSQL_USERNAME"),
         'HOST': mysql_host,
         'PORT': mysql_port,
         'PASSWORD': os.environ.get("MYSQL_PASSWORD"),
         'OPTIONS': {'charset': 'utf8mb4'},
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',
+        'POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', '0')),
+        'POOL_MAX_AGE': int(os.environ.get('DB_POOL_MAX_AGE', '300')),
     }
 }
 
+# 只读副本（可选，见 wxcloudrun/db/router.py）：设置 MYSQL_REPLICA_ADDRESS 后，
+# 标记为只读的视图与统计查询走副本；账号、库名与主库相同
+mysql_replica_address = os.environ.get("MYSQL_REPLICA_ADDRESS")
+if mysql_replica_address:
+    replica_host, replica_port = mysql_replica_address.split(':') if ':' in mysql_replica_address else (mysql_replica_address, '3306')
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['wxcloudrun.db.router.ReplicaRouter']
+# 用户写入后固定读主库的秒数；副本可接受的最大复制延迟（秒）与检查间隔（秒）
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5'))
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '3'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+
+# 旧版明文分页游标（<时间>#<id>）可被伪造，默认拒绝；升级期间客户端仍持有旧游标时可临时设为 1（已弃用）
+PAGINATION_LEGACY_CURSOR = os.environ.get('PAGINATION_LEGACY_CURSOR', '0') == '1'
+
+# 通知已读记录存储：rows（NotificationRead 逐行）或 bitmap（NotificationReadBitmap 分块位图）
+# 切换到 bitmap 前先执行 python manage.py migrate_notification_reads 迁移历史记录；
+# bitmap 不保留阅读时间，通知详情接口对已读过的通知返回 read_at=null
+NOTIFICATION_READ_STORE = os.environ.get('NOTIFICATION_READ_STORE', 'rows')
+
+# 缓存配置（默认进程内缓存，可通过环境变量切换为文件缓存以在多进程间共享）
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', '/tmp/wxcloudrun-cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'wxcloudrun-default',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -103,6 +159,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# SQL 检查（见 wxcloudrun/utils/query_inspector.py）：
+# - QUERY_INSPECTOR：记录每个请求的 SQL，同一指纹出现不少于 QUERY_INSPECTOR_N1_THRESHOLD 次时按 N+1 告警
+# - QUERY_BUDGET_ENFORCE：视图超出 @query_budget 预算时抛异常（manage.py test 下默认开启），否则只告警
+QUERY_INSPECTOR = os.environ.get('QUERY_INSPECTOR', '1' if DEBUG else '0') == '1'
+QUERY_INSPECTOR_N1_THRESHOLD = int(os.environ.get('QUERY_INSPECTOR_N1_THRESHOLD', '3'))
+QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', '1' if DEBUG or sys.argv[1:2] == ['test'] else '0') == '1'
+
+# 请求剖析（见 wxcloudrun/utils/profiler.py）：
+# - 管理员请求带 X-Profile: sample|cprofile 头时剖析该请求，结果在 /api/admin/profiles 查看
+# - PROFILING_SAMPLE_RATE：普通流量的统计采样比例（0 关闭，如 0.001 为千分之一）
+# - PROFILING_INTERVAL_MS：统计采样间隔；PROFILING_BUFFER_SIZE：保留最近多少条结果（所有 worker 共享）
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '1') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', '5'))
+PROFILING_BUFFER_SIZE = int(os.environ.get('PROFILING_BUFFER_SIZE', '50'))
+PROFILING_DIR = os.environ.get('PROFILING_DIR', '/tmp/wxcloudrun-profiles')
+
+# 日志经内存队列由后台线程写出（见 wxcloudrun/utils/log_handlers.py），LOG_QUEUE=0 时同步写
+# 高频调用位置（商户列表、微信开放接口调用等）使用子 logger 'log.hot'，只对它采样与限速，'log' 上的审计类日志不受影响：
+# LOG_HOT_SAMPLE_RATE：INFO 日志保留比例（默认 1）；LOG_HOT_RATE_LIMIT：每个调用位置每秒最多输出的 INFO 条数（默认 10，0 不限）
+LOGGING_CONFIG = 'wxcloudrun.utils.log_handlers.configure_logging'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': True,
@@ -117,6 +195,12 @@ LOGGING = {
     },
     # 过滤
     'filters': {
+        # 高频 INFO 日志采样与限速（只挂在 'log.hot' 上，WARNING 以上不受影响）
+        'sample_hot': {
+            '()': 'wxcloudrun.utils.log_handlers.SampledRateLimitFilter',
+            'sample_rate': float(os.environ.get('LOG_HOT_SAMPLE_RATE', '1')),
+            'rate': float(os.environ.get('LOG_HOT_RATE_LIMIT', '10')),
+        },
     },
     # 定义具体处理日志的方式
     'handlers': {
@@ -171,6 +255,12 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True
         },
+        # 高频调用位置：经采样限速后交给 'log' 的处理器输出
+        'log.hot': {
+            'filters': ['sample_hot'],
+            'level': 'INFO',
+            'propagate': True
+        },
     }
 }
 
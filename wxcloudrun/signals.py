@@ -0,0 +1,162 @@
+"""模型信号处理
+
+用于维护跨表的派生数据（缓存、索引等），在 AppConfig.ready() 中注册。
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from wxcloudrun.models import (
+    Category,
+    ContractSetting,
+    MerchantProfile,
+    Notification,
+    PropertyProfile,
+    SettlementOrder,
+    UserAssignedIdentity,
+    UserContractSignature,
+    UserFeedback,
+    UserInfo,
+)
+from wxcloudrun.services.cloud_file_service import drop_references, sync_references
+from wxcloudrun.services.merchant_map_service import invalidate_merchant_map_cache
+from wxcloudrun.services.merchant_search_service import INDEXED_FIELDS, reindex_merchant
+from wxcloudrun.services.notification_service import (
+    on_notification_deleted,
+    on_notification_published,
+    refresh_read_state,
+)
+from wxcloudrun.services.order_search_service import (
+    MERCHANT_FIELDS,
+    ORDER_FIELDS,
+    OWNER_FIELDS,
+    refresh_merchant_orders,
+    refresh_orders,
+    refresh_owner_orders,
+)
+
+
+# 影响地图聚合结果的商户字段
+_MAP_FIELDS = {'latitude', 'longitude', 'geo_hash', 'merchant_type', 'category', 'category_id'}
+# 引用云文件的模型（字段见 utils/cloud_files.REFERENCE_FIELDS）
+_FILE_OWNER_MODELS = (
+    Category,
+    ContractSetting,
+    MerchantProfile,
+    Notification,
+    UserContractSignature,
+    UserFeedback,
+    UserInfo,
+)
+# 影响通知受众分段的用户字段
+_SEGMENT_FIELDS = {'identity_type', 'owner_property', 'owner_property_id', 'owner_community', 'owner_community_id'}
+# 保存时需比较新旧值的字段：派生数据只依赖这些字段
+_MERCHANT_TRACKED = _MAP_FIELDS | INDEXED_FIELDS | MERCHANT_FIELDS
+_USER_TRACKED = OWNER_FIELDS | _SEGMENT_FIELDS
+
+
+def _record_changed_fields(instance, update_fields, tracked, raw=False):
+    """pre_save：记录本次保存涉及的字段，存入 instance._changed_fields（None 表示按全部字段处理）。
+
+    整行 save() 未指定 update_fields 时，与数据库当前值比较，只记录实际变化的跟踪字段，
+    避免无关字段的保存也触发派生数据刷新。
+    """
+    if update_fields is not None:
+        instance._changed_fields = set(update_fields)
+        return
+    instance._changed_fields = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    meta = instance._meta
+    attnames = {meta.get_field(name).attname for name in tracked}
+    previous = type(instance)._base_manager.filter(pk=instance.pk).values(*attnames).first()
+    if previous is None:
+        return
+    changed = {name for name in attnames if getattr(instance, name) != previous[name]}
+    # 同时记录字段名与 attname（如 category 与 category_id），便于与各 *_FIELDS 集合比较
+    instance._changed_fields = changed | {meta.get_field(name).name for name in changed}
+
+
+def _pop_changed_fields(instance):
+    return instance.__dict__.pop('_changed_fields', None)
+
+
+@receiver(pre_save, sender=MerchantProfile)
+def merchant_saving(sender, instance, update_fields=None, raw=False, **kwargs):
+    _record_changed_fields(instance, update_fields, _MERCHANT_TRACKED, raw)
+
+
+@receiver(post_save, sender=MerchantProfile)
+def merchant_saved(sender, instance, created=False, **kwargs):
+    changed = _pop_changed_fields(instance)
+    if changed is None or _MAP_FIELDS.intersection(changed):
+        invalidate_merchant_map_cache()
+    if changed is None or INDEXED_FIELDS.intersection(changed):
+        reindex_merchant(instance)
+    if not created and (changed is None or MERCHANT_FIELDS.intersection(changed)):
+        refresh_merchant_orders(instance)
+
+
+@receiver(post_delete, sender=MerchantProfile)
+def merchant_deleted(sender, instance, **kwargs):
+    invalidate_merchant_map_cache()
+
+
+@receiver(post_save, sender=SettlementOrder)
+def order_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or update_fields is None or ORDER_FIELDS.intersection(update_fields):
+        refresh_orders([instance])
+
+
+@receiver(pre_save, sender=UserInfo)
+def user_saving(sender, instance, update_fields=None, raw=False, **kwargs):
+    _record_changed_fields(instance, update_fields, _USER_TRACKED, raw)
+
+
+@receiver(post_save, sender=UserInfo)
+def user_saved(sender, instance, created=False, **kwargs):
+    changed = _pop_changed_fields(instance)
+    if created:
+        return
+    if changed is None or OWNER_FIELDS.intersection(changed):
+        refresh_owner_orders(instance)
+    if changed is None or _SEGMENT_FIELDS.intersection(changed):
+        refresh_read_state(instance)
+
+
+@receiver(post_save, sender=UserAssignedIdentity)
+@receiver(post_delete, sender=UserAssignedIdentity)
+def assigned_identity_changed(sender, instance, **kwargs):
+    refresh_read_state(instance.user)
+
+
+@receiver(post_save, sender=PropertyProfile)
+def property_profile_saved(sender, instance, created=False, **kwargs):
+    if created:
+        refresh_read_state(instance.user)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created=False, **kwargs):
+    if created:
+        # 提交后再发布：同一事务内设置的受众此时已写入
+        transaction.on_commit(lambda: on_notification_published(instance))
+
+
+@receiver(pre_delete, sender=Notification)
+def notification_deleting(sender, instance, **kwargs):
+    # 已读记录随通知级联删除，需在删除前按已读记录调整未读数
+    on_notification_deleted(instance)
+
+
+def file_owner_saved(sender, instance, update_fields=None, **kwargs):
+    sync_references(instance, update_fields)
+
+
+def file_owner_deleted(sender, instance, **kwargs):
+    drop_references(instance)
+
+
+for _model in _FILE_OWNER_MODELS:
+    post_save.connect(file_owner_saved, sender=_model)
+    post_delete.connect(file_owner_deleted, sender=_model)
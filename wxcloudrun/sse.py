@@ -0,0 +1,121 @@
+"""小程序未读通知数 SSE 推送（原生 ASGI 路由）
+
+GET /api/notifications/stream （请求头 X-WX-OPENID 与其它小程序接口一致）
+- 连接建立后立即推送一次当前未读数，之后仅在未读数变化时推送：
+    event: unread
+    data: {"unread_count": 3}
+- 空闲时定期发送注释行心跳，避免网关断开空闲连接
+- 连接在事件循环中挂起，不占用线程；需以 ASGI 服务器运行 wxcloudrun.asgi:application
+  （SERVER_MODE=asgi，其余接口在同一 worker 的线程池中按 WSGI 执行，并发不受影响）
+
+Django 3.2 的 StreamingHttpResponse 不支持异步迭代，因此该路由在 asgi.py 中先于 Django 分发。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from wxcloudrun.services.notification_broker import broker
+from wxcloudrun.services.notification_service import unread_count
+from wxcloudrun.utils.auth import ensure_userinfo_exists
+
+
+logger = logging.getLogger('log')
+
+STREAM_PATH_RE = re.compile(r'^/api/notifications/stream/?$')
+HEARTBEAT_SECONDS = float(os.environ.get('NOTIFICATION_SSE_HEARTBEAT', '25'))
+MAX_CONNECTIONS = int(os.environ.get('NOTIFICATION_SSE_MAX_CONNECTIONS', '5000'))
+RETRY_MS = 5000
+
+
+def is_stream_request(scope) -> bool:
+    return scope['type'] == 'http' and bool(STREAM_PATH_RE.match(scope.get('path') or ''))
+
+
+def _load_state(openid: str):
+    close_old_connections()
+    user = ensure_userinfo_exists(openid)
+    return user, unread_count(user)
+
+
+async def _send_json(send, status: int, code: int, msg: str):
+    body = json.dumps({'code': code, 'msg': msg, 'data': None}, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+def _event(count: int) -> bytes:
+    return f'event: unread\ndata: {json.dumps({"unread_count": count})}\n\n'.encode('utf-8')
+
+
+async def notification_stream(scope, receive, send):
+    if scope.get('method') != 'GET':
+        await _send_json(send, 405, 405, '请求方法不允许')
+        return
+
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers') or []}
+    openid = headers.get('x-wx-openid')
+    if not openid:
+        await _send_json(send, 401, 401, '缺少openid')
+        return
+    if broker.connection_count >= MAX_CONNECTIONS:
+        await _send_json(send, 503, 503, '连接数已满，请稍后重试')
+        return
+
+    try:
+        user, count = await sync_to_async(_load_state, thread_sensitive=False)(openid)
+    except Exception as exc:
+        logger.error(f'SSE 初始化失败: openid={openid}, error={exc}', exc_info=True)
+        await _send_json(send, 500, 500, '初始化用户失败')
+        return
+
+    queue = broker.subscribe(user.id)
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': f'retry: {RETRY_MS}\n\n'.encode() + _event(count), 'more_body': True})
+        last_sent = count
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, disconnect}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                getter.cancel()
+                break
+            if getter in done:
+                count = getter.result()
+                if count != last_sent:
+                    await send({'type': 'http.response.body', 'body': _event(count), 'more_body': True})
+                    last_sent = count
+            else:
+                getter.cancel()
+                await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+    except OSError as exc:
+        logger.info('SSE 连接已断开 user=%s: %s', user.id, exc)
+    finally:
+        broker.unsubscribe(user.id, queue)
+        disconnect.cancel()
@@ -0,0 +1,23 @@
+"""测试配置：两个本地 SQLite 数据库分别充当主库与只读副本
+
+用法：python manage.py test wxcloudrun.tests --settings=wxcloudrun.tests.settings
+"""
+import os
+import tempfile
+
+from wxcloudrun.settings import *  # noqa: F401,F403
+
+# 测试库为内存库（TEST NAME 为空时的 SQLite 默认行为）；NAME 指向临时目录，避免在仓库中创建空库文件
+_TEST_DB_DIR = os.path.join(tempfile.gettempdir(), 'wxcloudrun-tests')
+os.makedirs(_TEST_DB_DIR, exist_ok=True)
+DATABASES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(_TEST_DB_DIR, 'primary.sqlite3')},
+    # 不设 TEST MIRROR：副本是独立的测试库，才能构造主从数据不一致的场景
+    'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(_TEST_DB_DIR, 'replica.sqlite3')},
+}
+# 历史迁移包含 MySQL 专用语句，测试库直接按模型建表
+MIGRATION_MODULES = {'wxcloudrun': None}
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+QUERY_INSPECTOR = False
+DB_REPLICA_PIN_SECONDS = 5
+DB_REPLICA_LAG_CHECK_INTERVAL = 0
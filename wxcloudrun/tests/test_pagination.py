@@ -0,0 +1,58 @@
+"""分页工具（wxcloudrun/utils/pagination.py）游标测试"""
+from datetime import datetime, timedelta
+
+from django.core import signing
+from django.test import TestCase, override_settings
+
+from wxcloudrun.models import Category
+from wxcloudrun.utils.pagination import build_cursor, cursor_paginate, parse_cursor
+
+
+class CursorTests(TestCase):
+    def setUp(self):
+        base = datetime(2024, 1, 1, 12, 0, 0)
+        Category.objects.bulk_create([
+            Category(name=f'c{i}', updated_at=base + timedelta(minutes=i)) for i in range(5)
+        ])
+
+    def test_signed_cursor_round_trip(self):
+        obj = Category.objects.order_by('-updated_at', '-id').first()
+        cursor = build_cursor(obj, 'updated_at')
+        self.assertEqual(parse_cursor(cursor, 'updated_at'), (obj.updated_at, obj.pk))
+
+    def test_cursor_paginate_walks_all_rows(self):
+        names = []
+        cursor = ''
+        while True:
+            objects, has_more, cursor = cursor_paginate(Category.objects.all(), cursor, 2)
+            names.extend(obj.name for obj in objects)
+            if not has_more:
+                break
+        self.assertIsNone(cursor)
+        self.assertEqual(names, ['c4', 'c3', 'c2', 'c1', 'c0'])
+
+    def test_tampered_cursor_rejected(self):
+        obj = Category.objects.first()
+        cursor = build_cursor(obj, 'updated_at')
+        tampered = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        self.assertIsNone(parse_cursor(tampered, 'updated_at'))
+        with self.assertRaises(ValueError):
+            cursor_paginate(Category.objects.all(), tampered, 2)
+
+    def test_cursor_with_other_salt_rejected(self):
+        forged = signing.dumps(['updated_at', '2024-01-01T12:03:00', 999], salt='other')
+        self.assertIsNone(parse_cursor(forged, 'updated_at'))
+
+    def test_cursor_for_other_field_rejected(self):
+        obj = Category.objects.first()
+        cursor = build_cursor(obj, 'created_at')
+        self.assertIsNone(parse_cursor(cursor, 'updated_at'))
+
+    def test_legacy_plain_cursor_rejected_by_default(self):
+        self.assertIsNone(parse_cursor('2024-01-01T12:03:00#4', 'updated_at'))
+        with self.assertRaises(ValueError):
+            cursor_paginate(Category.objects.all(), '2024-01-01T12:03:00#4', 2)
+
+    @override_settings(PAGINATION_LEGACY_CURSOR=True)
+    def test_legacy_plain_cursor_accepted_when_enabled(self):
+        self.assertEqual(parse_cursor('2024-01-01T12:03:00#4', 'updated_at'), (datetime(2024, 1, 1, 12, 3), 4))
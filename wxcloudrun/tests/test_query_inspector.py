@@ -0,0 +1,74 @@
+"""SQL 检查工具（wxcloudrun/utils/query_inspector.py）测试"""
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from wxcloudrun.exceptions import QueryBudgetExceeded
+from wxcloudrun.models import Category
+from wxcloudrun.utils.query_inspector import QueryCapture, QueryCounter, fingerprint, query_budget
+
+
+def _n_plus_one_view(request):
+    names = [Category.objects.get(pk=pk).name for pk in Category.objects.values_list('pk', flat=True)]
+    return HttpResponse(','.join(names))
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 1 AND b = 'x' AND c IN (%s, %s, %s)"),
+            fingerprint("SELECT * FROM t WHERE a = 22 AND b = 'yy' AND c IN (%s)"),
+        )
+
+
+class QueryCaptureTests(TestCase):
+    def setUp(self):
+        Category.objects.bulk_create([Category(name=f'c{i}') for i in range(4)])
+
+    def test_repeated_reports_n_plus_one_with_location(self):
+        with QueryCapture() as capture:
+            _n_plus_one_view(None)
+        repeated = capture.repeated(threshold=3)
+        self.assertEqual(len(repeated), 1)
+        fp, count, locations = repeated[0]
+        self.assertEqual(count, 4)
+        self.assertIn('FROM "Category"', fp)
+        self.assertTrue(any(loc.startswith('wxcloudrun/tests/test_query_inspector.py:') for loc in locations))
+        self.assertIn('x4', capture.report(threshold=3))
+
+    def test_below_threshold_not_reported(self):
+        with QueryCapture() as capture:
+            _n_plus_one_view(None)
+        self.assertEqual(capture.repeated(threshold=5), [])
+
+    def test_counter_only_counts(self):
+        with QueryCounter() as counter:
+            _n_plus_one_view(None)
+        self.assertEqual(counter.count, 5)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        Category.objects.bulk_create([Category(name=f'c{i}') for i in range(4)])
+        self.request = RequestFactory().get('/budget')
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True)
+    def test_exceeding_budget_fails_when_enforced(self):
+        view = query_budget(3)(_n_plus_one_view)
+        with self.assertRaises(QueryBudgetExceeded) as ctx:
+            view(self.request)
+        message = str(ctx.exception)
+        self.assertIn('执行了 5 条 SQL，超出预算 3 条', message)
+        self.assertIn('x4', message)
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True)
+    def test_within_budget_passes(self):
+        response = query_budget(5)(_n_plus_one_view)(self.request)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_ENFORCE=False)
+    def test_exceeding_budget_only_warns_when_not_enforced(self):
+        view = query_budget(3)(_n_plus_one_view)
+        with self.assertLogs('log', level='WARNING') as logs:
+            response = view(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('超出预算 3 条', logs.output[0])
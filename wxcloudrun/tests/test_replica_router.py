@@ -0,0 +1,108 @@
+"""读写分离路由（wxcloudrun/db/router.py）测试：主库与副本为两个本地 SQLite 库"""
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from wxcloudrun.db import router
+from wxcloudrun.models import Category
+
+
+def _read_view(request):
+    with router.read_replica():
+        return HttpResponse(','.join(Category.objects.order_by('name').values_list('name', flat=True)))
+
+
+def _write_then_read_view(request):
+    Category.objects.create(name='written')
+    return _read_view(request)
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # 路由禁止在副本上迁移，测试用的表手动创建
+        with connections[router.REPLICA_ALIAS].schema_editor() as editor:
+            editor.create_model(Category)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connections[router.REPLICA_ALIAS].schema_editor() as editor:
+            editor.delete_model(Category)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        router.replica_health._checked_at = None
+        router.replica_health._healthy = True
+        self.factory = RequestFactory()
+        Category.objects.using('default').create(name='primary')
+        Category.objects.using(router.REPLICA_ALIAS).create(name='replica')
+
+    def tearDown(self):
+        # 测试框架只清空允许迁移的库，副本上的数据手动清理（副本只有 Category 表，不做级联收集）
+        with connections[router.REPLICA_ALIAS].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Category._meta.db_table}')
+
+    def _call(self, view, **headers):
+        request = self.factory.get('/', **headers)
+        return router.ReplicaRoutingMiddleware(view)(request)
+
+    def test_unmarked_reads_use_primary(self):
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['primary'])
+
+    def test_marked_reads_use_replica(self):
+        self.assertEqual(self._call(_read_view).content, b'replica')
+
+    def test_reads_after_write_in_same_request_use_primary(self):
+        response = self._call(_write_then_read_view)
+        self.assertEqual(response.content, b'primary,written')
+
+    def test_write_returns_signed_pin(self):
+        response = self._call(_write_then_read_view)
+        token = response[router.PIN_HEADER]
+        self.assertEqual(response.cookies[router.PIN_COOKIE].value, token)
+        self.assertTrue(router.pin_token_valid(token))
+
+    def test_pin_cookie_routes_next_request_to_primary(self):
+        token = self._call(_write_then_read_view)[router.PIN_HEADER]
+        # 另一个 worker / 实例：进程内缓存中没有记录，仅凭客户端带回的 Cookie
+        cache.clear()
+        self.factory.cookies[router.PIN_COOKIE] = token
+        self.assertEqual(self._call(_read_view).content, b'primary,written')
+
+    def test_pin_header_routes_next_request_to_primary(self):
+        token = self._call(_write_then_read_view)[router.PIN_HEADER]
+        cache.clear()
+        self.assertEqual(self._call(_read_view, HTTP_X_DB_PIN=token).content, b'primary,written')
+
+    def test_tampered_pin_is_ignored(self):
+        token = self._call(_write_then_read_view)[router.PIN_HEADER]
+        cache.clear()
+        self.assertEqual(self._call(_read_view, HTTP_X_DB_PIN=token + 'x').content, b'replica')
+
+    def test_expired_pin_is_ignored(self):
+        token = self._call(_write_then_read_view)[router.PIN_HEADER]
+        cache.clear()
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 6):
+            self.assertEqual(self._call(_read_view, HTTP_X_DB_PIN=token).content, b'replica')
+
+    def test_same_user_pinned_via_cache(self):
+        self._call(_write_then_read_view, HTTP_X_WX_OPENID='o1')
+        self.assertEqual(self._call(_read_view, HTTP_X_WX_OPENID='o1').content, b'primary,written')
+        self.assertEqual(self._call(_read_view, HTTP_X_WX_OPENID='o2').content, b'replica')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with override_settings(DB_REPLICA_MAX_LAG=3), \
+                mock.patch.object(router.replica_health, '_measure_lag', return_value=10.0):
+            self.assertEqual(self._call(_read_view).content, b'primary')
+        with mock.patch.object(router.replica_health, '_measure_lag', return_value=None):
+            self.assertEqual(self._call(_read_view).content, b'primary')
+        with mock.patch.object(router.replica_health, '_measure_lag', return_value=0.0):
+            self.assertEqual(self._call(_read_view).content, b'replica')
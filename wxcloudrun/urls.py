@@ -26,6 +26,8 @@ from wxcloudrun.views import (
     categories_list,
     merchants_list,
     merchants_recommended,
+    merchants_map,
+    merchants_search,
     merchant_detail,
     merchant_update_banner,
     merchant_business_license,
@@ -50,11 +52,17 @@ from wxcloudrun.views import (
     notifications_list,
     notifications_unread_count,
     notification_detail,
+    notifications_read_all,
 )
 from wxcloudrun import views  # 管理员视图
 from django.urls import re_path as url
 
 urlpatterns = (
+    # 健康检查（容器探活/就绪探测）
+    url(r'^healthz/?$', views.healthz),
+    url(r'^readyz/?$', views.readyz),
+    url(r'^metrics/?$', views.admin_metrics),    # GET Prometheus 指标（管理员 Token）
+
     # ========== 小程序端接口 ==========
     
     # 用户登录与身份管理
@@ -72,6 +80,8 @@ urlpatterns = (
     # 商户信息
     url(r'^api/merchants/?$', merchants_list),
     url(r'^api/merchants/recommended/?$', merchants_recommended),
+    url(r'^api/merchants/map/?$', merchants_map),                             # GET 地图视野聚合标记点
+    url(r'^api/merchants/search/?$', merchants_search),                       # GET 商户搜索
     url(r'^api/merchants/(?P<merchant_id>[^/]+)/reviews/?$', merchant_reviews_list),
     url(r'^api/merchants/(?P<merchant_id>[^/]+)/?$', merchant_detail),
     url(r'^api/merchant/banner/?$', merchant_update_banner),                  # PUT 商户更新横幅
@@ -113,6 +123,7 @@ urlpatterns = (
     # ????
     url(r'^api/notifications/?$', notifications_list),
     url(r'^api/notifications/unread-count/?$', notifications_unread_count),
+    url(r'^api/notifications/read-all/?$', notifications_read_all),
     url(r'^api/notifications/(?P<notification_id>\d+)/?$', notification_detail),
 
     # ========== 管理员端接口 ==========
@@ -188,4 +199,7 @@ urlpatterns = (
     # ???????
     url(r'^api/admin/notifications/?$', views.admin_notifications),                         # GET
     url(r'^api/admin/notifications/(?P<notification_id>\d+)/?$', views.admin_notification_detail),
+    # 管理员-请求剖析
+    url(r'^api/admin/profiles/?$', views.admin_profiles),                                    # GET/DELETE
+    url(r'^api/admin/profiles/(?P<profile_id>[0-9a-f]{12})/?$', views.admin_profile_detail),  # GET
 )
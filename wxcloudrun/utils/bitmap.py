@@ -0,0 +1,69 @@
+"""分块压缩位图工具
+
+用户 id 按 CHUNK_BITS 分块：chunk = id >> CHUNK_BITS，块内偏移 = id & (CHUNK_SIZE - 1)。
+每块为 CHUNK_SIZE 位的定长位图，存储时 zlib 压缩（稀疏位图压缩后通常只有几十字节）。
+每块对应数据库中的一行并在写入时加行锁，块越小同一行上排队的并发写入越少；
+CHUNK_BITS 决定已存储位图的布局，上线后再调整需提供数据迁移重新分块已有数据。
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Iterable, Iterator
+
+
+CHUNK_BITS = 8
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_BYTES = CHUNK_SIZE // 8
+_OFFSET_MASK = CHUNK_SIZE - 1
+
+
+def split_id(value: int) -> tuple[int, int]:
+    """返回 (块号, 块内偏移)。"""
+    return value >> CHUNK_BITS, value & _OFFSET_MASK
+
+
+def group_by_chunk(values: Iterable[int]) -> dict[int, list[int]]:
+    groups: dict[int, list[int]] = {}
+    for value in values:
+        chunk, offset = split_id(value)
+        groups.setdefault(chunk, []).append(offset)
+    return groups
+
+
+def decode(blob) -> bytearray:
+    if not blob:
+        return bytearray(CHUNK_BYTES)
+    return bytearray(zlib.decompress(bytes(blob)))
+
+
+def encode(bits: bytearray) -> bytes:
+    return zlib.compress(bytes(bits), 6)
+
+
+def test_bit(bits: bytearray, offset: int) -> bool:
+    return bool(bits[offset >> 3] & (1 << (offset & 7)))
+
+
+def set_bits(bits: bytearray, offsets: Iterable[int]) -> int:
+    """置位并返回新增的位数。"""
+    added = 0
+    for offset in offsets:
+        mask = 1 << (offset & 7)
+        if not bits[offset >> 3] & mask:
+            bits[offset >> 3] |= mask
+            added += 1
+    return added
+
+
+def popcount(bits: bytearray) -> int:
+    return int.from_bytes(bits, 'little').bit_count()
+
+
+def iter_members(chunk: int, bits: bytearray) -> Iterator[int]:
+    """遍历块内已置位的原始 id。"""
+    base = chunk << CHUNK_BITS
+    for index, byte in enumerate(bits):
+        while byte:
+            low = byte & -byte
+            yield base + (index << 3) + low.bit_length() - 1
+            byte ^= low
@@ -0,0 +1,46 @@
+"""云文件ID提取（纯函数，供引用索引维护与数据迁移共用）"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from wxcloudrun.utils.notification_content import extract_image_file_ids
+
+
+CLOUD_PREFIX = 'cloud://'
+
+# 表名 -> 保存云文件ID的字段（字符串、字符串数组或含 <img> 的 HTML）
+REFERENCE_FIELDS = {
+    'Category': ('icon_file_id',),
+    'UserInfo': ('avatar_url',),
+    'MerchantProfile': ('banner_url', 'gallery', 'contract_file_id', 'business_license_file_id'),
+    'UserFeedback': ('images',),
+    'ContractSetting': ('contract_file_id',),
+    'UserContractSignature': ('contract_file_id', 'signature_file_id'),
+    'Notification': ('content',),
+}
+HTML_FIELDS = {('Notification', 'content')}
+
+
+def is_cloud_file(value) -> bool:
+    return isinstance(value, str) and value.startswith(CLOUD_PREFIX)
+
+
+def field_file_ids(owner_type: str, field: str, value) -> list[str]:
+    if (owner_type, field) in HTML_FIELDS:
+        candidates = extract_image_file_ids(value or '')
+    elif isinstance(value, (list, tuple)):
+        candidates = value
+    else:
+        candidates = [value]
+    return [fid for fid in dict.fromkeys(c for c in candidates if isinstance(c, str)) if is_cloud_file(fid)]
+
+
+def object_references(obj, fields: Optional[Iterable[str]] = None) -> set[tuple[str, str]]:
+    """返回对象引用的 {(字段, 云文件ID)}。"""
+    owner_type = obj._meta.db_table
+    fields = REFERENCE_FIELDS.get(owner_type, ()) if fields is None else fields
+    return {
+        (field, fid)
+        for field in fields
+        for fid in field_file_ids(owner_type, field, getattr(obj, field, None))
+    }
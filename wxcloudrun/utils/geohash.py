@@ -0,0 +1,111 @@
+"""Geohash 编码工具（用于商户地图的空间索引键）"""
+from __future__ import annotations
+
+import math
+
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# 商户表中存储的 geohash 精度（9 位约 4.8m x 4.8m）
+STORAGE_PRECISION = 9
+
+
+def encode(latitude: float, longitude: float, precision: int = STORAGE_PRECISION) -> str:
+    """把经纬度编码为指定精度的 geohash 字符串。"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash 从经度位开始交替
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def bounds(cell: str) -> tuple[float, float, float, float]:
+    """返回 geohash 格子的范围 (min_lat, min_lng, max_lat, max_lng)。"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """返回指定精度下单个格子的 (纬度高度, 经度宽度)，单位为度。"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covering_cells(min_lat: float, min_lng: float, max_lat: float, max_lng: float, precision: int) -> list[str]:
+    """返回覆盖矩形范围的全部 geohash 格子（按行列扫描，结果去重且保持顺序）。"""
+    lat_step, lng_step = cell_size(precision)
+    cells: list[str] = []
+    seen: set[str] = set()
+
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cell = encode(min(lat, 90.0), min(lng, 180.0), precision)
+            if cell not in seen:
+                seen.add(cell)
+                cells.append(cell)
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_step, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+    return cells
+
+
+def count_covering_cells(min_lat: float, min_lng: float, max_lat: float, max_lng: float, precision: int) -> int:
+    """估算覆盖矩形范围所需的格子数量（不实际编码，用于快速选择精度）。"""
+    if not all(math.isfinite(v) for v in (min_lat, min_lng, max_lat, max_lng)):
+        raise ValueError('经纬度必须为有限数值')
+    lat_step, lng_step = cell_size(precision)
+    rows = int((max_lat - min_lat) / lat_step) + 2
+    cols = int((max_lng - min_lng) / lng_step) + 2
+    return rows * cols
+
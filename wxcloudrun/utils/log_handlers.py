@@ -0,0 +1,187 @@
+"""非阻塞日志管线
+
+- configure_logging：settings.LOGGING_CONFIG 指向此函数。按 LOGGING 正常配置后，把各 logger 上的
+  文件/控制台处理器换成同一个内存队列的入队处理器，由一个后台线程取出记录交给原处理器写出，
+  请求线程只做一次消息格式化与入队，不会阻塞在磁盘 I/O 上
+- 队列有界（LOG_QUEUE_SIZE），写满时丢弃新记录并计数，不阻塞调用方
+- gunicorn 预加载后 fork：子进程中自动重建队列与后台线程；进程退出时 stop_queue_logging 写完队列中的记录
+- SampledRateLimitFilter：按调用位置（文件 + 行号）对 INFO 及以下日志采样、限速，WARNING 以上始终保留
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.config
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+
+_lock = threading.Lock()
+_queue_handlers: list['NonBlockingQueueHandler'] = []
+_listener: 'DispatchingQueueListener | None' = None
+_stats = {'dropped': 0, 'suppressed': 0, 'sampled_out': 0}
+
+
+def _incr(key: str, n: int = 1):
+    with _lock:
+        _stats[key] += n
+
+
+def log_queue_stats() -> dict:
+    """本进程日志队列指标：排队中、因队列满丢弃、被限流、被采样丢弃的记录数"""
+    with _lock:
+        stats = dict(_stats)
+        listener = _listener
+    stats['queued'] = listener.queue.qsize() if listener is not None else 0
+    return stats
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """把记录放入进程内队列，并记下该 logger 原来的处理器（由后台线程调用）"""
+
+    def __init__(self, log_queue, targets):
+        super().__init__(log_queue)
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        # 同进程队列无需序列化：只在调用线程合并参数（避免参数对象之后被修改），
+        # 异常堆栈等留给后台线程格式化
+        record.msg = record.getMessage()
+        record.args = None
+        record.log_targets = self.targets
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _incr('dropped')
+
+
+class DispatchingQueueListener(QueueListener):
+    """单个后台线程，把记录分发给其来源 logger 的原处理器"""
+
+    def handle(self, record):
+        for handler in getattr(record, 'log_targets', ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self):
+        # 队列满时等待后台线程腾出空间，保证能正常停止
+        self.queue.put(self._sentinel, timeout=5)
+
+
+def configure_logging(config):
+    """LOGGING_CONFIG 入口：dictConfig 后把 logger 的处理器迁移到队列（LOG_QUEUE=0 时保持同步写）"""
+    global _listener
+    logging.config.dictConfig(config)
+    if os.environ.get('LOG_QUEUE', '1') != '1':
+        return
+
+    stop_queue_logging()
+    log_queue = queue.Queue(maxsize=int(os.environ.get('LOG_QUEUE_SIZE', '10000')))
+    handlers = []
+    for name in (config.get('loggers') or {}):
+        logger = logging.getLogger(name)
+        targets = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+        if not targets:
+            continue
+        for handler in targets:
+            logger.removeHandler(handler)
+        queue_handler = NonBlockingQueueHandler(log_queue, targets)
+        logger.addHandler(queue_handler)
+        handlers.append(queue_handler)
+    if not handlers:
+        return
+
+    listener = DispatchingQueueListener(log_queue)
+    listener.start()
+    with _lock:
+        _queue_handlers[:] = handlers
+        _listener = listener
+
+
+def stop_queue_logging():
+    """写完队列中剩余的记录并停止后台线程（进程退出前调用；可重复调用）"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None and listener._thread is not None:
+        try:
+            listener.stop()
+        except queue.Full:
+            pass
+    for handler in {t for qh in _queue_handlers for t in qh.targets}:
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+
+def _restart_in_child():
+    # fork 后父进程的后台线程不存在，且队列内部锁可能处于持有状态：换新队列并重新启动线程
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in _queue_handlers:
+        handler.queue = log_queue
+    _listener = DispatchingQueueListener(log_queue)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(stop_queue_logging)
+
+
+class SampledRateLimitFilter(logging.Filter):
+    """对高频 INFO 日志按调用位置采样与限速（挂在 logger 上，被过滤的记录不进入队列）
+
+    - sample_rate：保留比例（0-1），1 表示不采样
+    - rate / burst：每个调用位置每秒最多 rate 条，允许突发 burst 条；rate 为 0 表示不限速。
+      被限流的条数附加在该位置下一条放行的日志后面
+    """
+
+    def __init__(self, sample_rate=1.0, rate=0, burst=None, max_level=logging.INFO):
+        super().__init__()
+        self.sample_rate = float(sample_rate)
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self.max_level = max_level
+        self._buckets: dict[tuple, list] = {}  # (pathname, lineno) -> [tokens, updated_at, suppressed]
+        self._bucket_lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            _incr('sampled_out')
+            return False
+        if self.rate <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._bucket_lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                suppressed = -1
+            else:
+                bucket[0] -= 1.0
+                suppressed, bucket[2] = bucket[2], 0
+        if suppressed < 0:
+            _incr('suppressed')
+            return False
+        if suppressed:
+            record.msg = f'{record.msg} [此前 {suppressed} 条同位置日志被限流]'
+        return True
@@ -0,0 +1,387 @@
+"""请求指标：进程内聚合 + 文件汇总 + Prometheus 文本输出
+
+- MetricsMiddleware（wxcloudrun/middleware.py）按视图名 + 方法记录：延迟直方图、状态码计数、
+  SQL 条数与耗时、微信开放接口调用次数与耗时、响应字节数
+- 每个进程在内存中聚合（一次加锁累加），后台线程每 METRICS_FLUSH_INTERVAL 秒把快照写入
+  METRICS_DIR/metrics-<pid>-<启动时间>.json；worker 退出时把计数并入 archive.json 后删除自己的文件
+- 被强制结束的 worker（如 gunicorn 超时 SIGKILL）来不及归档，其快照在新 worker 启动或 /metrics 读取时
+  按 pid + 启动时间判定为已退出并补并入 archive.json；文件名带启动时间，pid 被复用时也不会覆盖旧快照
+- /metrics 读取所有进程的快照合并输出，因此 gunicorn 多 worker 下看到的是整个实例的数据
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+
+logger = logging.getLogger('log')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/wxcloudrun-metrics')
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ARCHIVE_FILE = 'archive.json'
+# 进程级指标中的瞬时值：只取存活进程，不并入 archive
+PROCESS_GAUGES = {'db_connections_pool_idle', 'log_queue_size'}
+
+
+class RequestMetrics:
+    """单个请求的累计值（由中间件创建，SQL 包装器与开放接口调用处累加）"""
+
+    __slots__ = ('db_count', 'db_seconds', 'openapi_count', 'openapi_seconds')
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.openapi_count = 0
+        self.openapi_seconds = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_count += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+current_request_metrics: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar(
+    'request_metrics', default=None,
+)
+
+
+def record_openapi_call(seconds: float):
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        metrics.openapi_count += 1
+        metrics.openapi_seconds += seconds
+
+
+def _new_endpoint() -> dict:
+    return {
+        'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'sum': 0.0,
+        'count': 0,
+        'status': {},
+        'db_count': 0,
+        'db_seconds': 0.0,
+        'openapi_count': 0,
+        'openapi_seconds': 0.0,
+        'bytes': 0,
+    }
+
+
+def _process_metrics() -> dict:
+    from wxcloudrun.db.pool import connection_stats
+    from wxcloudrun.utils.log_handlers import log_queue_stats
+
+    db_stats = connection_stats()
+    stats = {f'db_connections_{k}_total': v for k, v in db_stats.items() if k != 'pool_idle'}
+    stats['db_connections_pool_idle'] = db_stats.get('pool_idle', 0)
+    log_stats = log_queue_stats()
+    stats['log_queue_size'] = log_stats.pop('queued', 0)
+    stats.update({f'log_records_{k}_total': v for k, v in log_stats.items()})
+    return stats
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[tuple[str, str], dict] = {}
+        self._flusher_pid = None
+        # 周期写快照与退出归档互斥，归档后不再写快照（否则计数会被重复汇总）
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+
+    def observe(self, view: str, method: str, status: int, seconds: float, request_metrics: RequestMetrics, response_bytes: int):
+        index = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        status_class = f'{status // 100}xx'
+        with self._lock:
+            ep = self._endpoints.get((view, method))
+            if ep is None:
+                ep = self._endpoints[(view, method)] = _new_endpoint()
+            ep['buckets'][index] += 1
+            ep['sum'] += seconds
+            ep['count'] += 1
+            ep['status'][status_class] = ep['status'].get(status_class, 0) + 1
+            ep['db_count'] += request_metrics.db_count
+            ep['db_seconds'] += request_metrics.db_seconds
+            ep['openapi_count'] += request_metrics.openapi_count
+            ep['openapi_seconds'] += request_metrics.openapi_seconds
+            ep['bytes'] += response_bytes
+        if self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            endpoints = {
+                f'{view}\t{method}': {**ep, 'buckets': list(ep['buckets']), 'status': dict(ep['status'])}
+                for (view, method), ep in self._endpoints.items()
+            }
+        return {'endpoints': endpoints, 'process': _process_metrics()}
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        thread = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+        thread.start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(FLUSH_INTERVAL)
+            with self._flush_lock:
+                if self._stopped:
+                    return
+                try:
+                    store.write(self.snapshot())
+                except Exception as exc:
+                    logger.warning('写入指标快照失败: %s', exc)
+
+    def archive(self):
+        """进程退出前把计数并入 archive.json，之后不再写快照"""
+        with self._flush_lock:
+            if self._stopped or self._flusher_pid != os.getpid():
+                return
+            self._stopped = True
+            try:
+                store.archive(self.snapshot())
+            except Exception as exc:
+                logger.warning('归档指标快照失败: %s', exc)
+
+
+def merge_snapshots(snapshots) -> dict:
+    merged = {'endpoints': {}, 'process': {}}
+    for snap in snapshots:
+        for key, ep in (snap.get('endpoints') or {}).items():
+            target = merged['endpoints'].get(key)
+            if target is None:
+                target = merged['endpoints'][key] = _new_endpoint()
+            for i, n in enumerate(ep.get('buckets', [])[:len(target['buckets'])]):
+                target['buckets'][i] += n
+            for field in ('sum', 'count', 'db_count', 'db_seconds', 'openapi_count', 'openapi_seconds', 'bytes'):
+                target[field] += ep.get(field, 0)
+            for status, n in (ep.get('status') or {}).items():
+                target['status'][status] = target['status'].get(status, 0) + n
+        for key, value in (snap.get('process') or {}).items():
+            merged['process'][key] = merged['process'].get(key, 0) + value
+    return merged
+
+
+def _without_gauges(snapshot: dict) -> dict:
+    return {**snapshot, 'process': {k: v for k, v in (snapshot.get('process') or {}).items() if k not in PROCESS_GAUGES}}
+
+
+def _process_start_time(pid: int) -> Optional[str]:
+    """进程启动时间（/proc/<pid>/stat 第 22 列，开机以来的时钟滴答数），进程不存在时返回 None"""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        stat = None
+    if not stat:
+        # 无 /proc 的系统只能判断进程是否存在
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except OSError:
+            pass
+        return '0'
+    # 第 2 列为括号包裹的进程名（可能含空格），从最后一个右括号之后分割
+    return stat[stat.rfind(b')') + 2:].split()[19].decode('ascii')
+
+
+class FileMetricsStore:
+    """每个进程一个快照文件（原子替换写入），退出进程的计数并入 archive.json"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f'metrics-{pid}-{_process_start_time(pid)}.json')
+
+    @staticmethod
+    def _is_alive(path: str) -> bool:
+        name = os.path.basename(path)[len('metrics-'):-len('.json')]
+        pid_str, _, started = name.partition('-')
+        try:
+            pid = int(pid_str)
+        except ValueError:
+            return False
+        return bool(started) and _process_start_time(pid) == started
+
+    def _lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, 'archive.lock'), 'w')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _fold_dead(self) -> list[str]:
+        """把已退出进程遗留的快照并入 archive.json 并删除（须持有 archive.lock），返回存活进程的快照路径"""
+        live, dead = [], []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            (live if self._is_alive(path) else dead).append(path)
+        if dead:
+            archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+            snapshots = [self._read_json(archive_path) or {}]
+            snapshots.extend(_without_gauges(self._read_json(path) or {}) for path in dead)
+            self._write_json(archive_path, merge_snapshots(snapshots))
+            for path in dead:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            logger.info('已归档 %d 个退出进程遗留的指标快照', len(dead))
+        return live
+
+    def collect_dead(self):
+        """worker 启动时调用：归档被强制结束的旧 worker 的快照"""
+        try:
+            with self._lock():
+                self._fold_dead()
+        except Exception as exc:
+            logger.warning('归档遗留指标快照失败: %s', exc)
+
+    def _write_json(self, path: str, data: dict):
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[dict]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, snapshot: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_json(self._path(os.getpid()), snapshot)
+
+    def read_all(self, exclude_pid: Optional[int] = None) -> list[dict]:
+        """读取存活进程的快照与 archive.json；与归档在同一把锁内，避免同一份计数被读到两次"""
+        snapshots = []
+        with self._lock():
+            exclude = self._path(exclude_pid) if exclude_pid is not None else None
+            for path in self._fold_dead():
+                if path == exclude:
+                    continue
+                snap = self._read_json(path)
+                if snap:
+                    snapshots.append(snap)
+            archive = self._read_json(os.path.join(self.directory, ARCHIVE_FILE))
+        if archive:
+            snapshots.append(archive)
+        return snapshots
+
+    def archive(self, snapshot: dict):
+        """把退出进程的计数并入 archive.json（文件锁保护并发退出的 worker）"""
+        archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+        with self._lock():
+            merged = merge_snapshots([self._read_json(archive_path) or {}, _without_gauges(snapshot)])
+            self._write_json(archive_path, merged)
+            try:
+                os.remove(self._path(os.getpid()))
+            except FileNotFoundError:
+                pass
+
+    def reset(self):
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+registry = MetricsRegistry()
+store = FileMetricsStore(METRICS_DIR)
+
+
+def flush_on_exit():
+    """进程退出前保存计数（gunicorn worker_exit 与 atexit 调用；未处理过请求的进程无需归档）"""
+    registry.archive()
+
+
+if hasattr(os, 'register_at_fork'):
+    # 子进程从零开始计数（父进程的计数由父进程自己上报）
+    os.register_at_fork(after_in_child=registry._reset)
+atexit.register(flush_on_exit)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound: float) -> str:
+    return f'{bound:g}'
+
+
+def render_metrics() -> str:
+    """汇总所有进程的指标，输出 Prometheus 文本格式"""
+    merged = merge_snapshots(store.read_all(exclude_pid=os.getpid()) + [registry.snapshot()])
+    endpoints = sorted(merged['endpoints'].items())
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    def labels(key, **extra):
+        view, method = key.split('\t', 1)
+        pairs = [('view', view), ('method', method), *extra.items()]
+        return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+    name = 'wxcloudrun_http_request_duration_seconds'
+    header(name, 'histogram', 'Request latency by view.')
+    for key, ep in endpoints:
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, ep['buckets']):
+            cumulative += n
+            lines.append(f'{name}_bucket{labels(key, le=_format_bound(bound))} {cumulative}')
+        lines.append(f'{name}_bucket{labels(key, le="+Inf")} {ep["count"]}')
+        lines.append(f'{name}_sum{labels(key)} {ep["sum"]:.6f}')
+        lines.append(f'{name}_count{labels(key)} {ep["count"]}')
+
+    header('wxcloudrun_http_requests_total', 'counter', 'Requests by view and status class.')
+    for key, ep in endpoints:
+        for status, n in sorted(ep['status'].items()):
+            lines.append(f'wxcloudrun_http_requests_total{labels(key, status=status)} {n}')
+
+    for field, metric, help_text, fmt in (
+        ('bytes', 'wxcloudrun_http_response_bytes_total', 'Response body bytes by view.', 'd'),
+        ('db_count', 'wxcloudrun_db_queries_total', 'SQL queries executed by view.', 'd'),
+        ('db_seconds', 'wxcloudrun_db_query_seconds_total', 'Time spent in SQL by view.', '.6f'),
+        ('openapi_count', 'wxcloudrun_openapi_calls_total', 'WeChat OpenAPI calls by view.', 'd'),
+        ('openapi_seconds', 'wxcloudrun_openapi_call_seconds_total', 'Time spent in WeChat OpenAPI calls by view.', '.6f'),
+    ):
+        header(metric, 'counter', help_text)
+        for key, ep in endpoints:
+            lines.append(f'{metric}{labels(key)} {ep[field]:{fmt}}')
+
+    for key, value in sorted(merged['process'].items()):
+        metric = f'wxcloudrun_{key}'
+        header(metric, 'gauge' if key in PROCESS_GAUGES else 'counter', 'Summed across worker processes.')
+        lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n'
@@ -1,61 +1,102 @@
 """Notification content helpers for image handling."""
 from __future__ import annotations
 
+import hashlib
+import html
 import re
 from typing import Iterable
 
+from django.utils.html import strip_tags
 
-IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
-SRC_RE = re.compile(r'\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
-DATA_FILE_RE = re.compile(r'\bdata-file-id=["\']([^"\']+)["\']', re.IGNORECASE)
-DATA_FILE_SHORT_RE = re.compile(r'\bdata-fileid=["\']([^"\']+)["\']', re.IGNORECASE)
-DATA_HREF_RE = re.compile(r'\bdata-href=["\']([^"\']+)["\']', re.IGNORECASE)
-HREF_RE = re.compile(r'\bhref=["\']([^"\']+)["\']', re.IGNORECASE)
-ALT_RE = re.compile(r'\balt=["\']([^"\']*)["\']', re.IGNORECASE)
-
-
-def _get_attr(match_re: re.Pattern, tag: str) -> str:
-    match = match_re.search(tag)
-    return match.group(1) if match else ''
-
-
-def _ensure_attr(tag: str, attr: str, value: str) -> str:
-    pattern = re.compile(rf'\b{re.escape(attr)}=["\']([^"\']+)["\']', re.IGNORECASE)
-    if pattern.search(tag):
-        return pattern.sub(f'{attr}="{value}"', tag, count=1)
-    if tag.endswith('/>'):
-        return tag[:-2] + f' {attr}="{value}" />'
-    return tag[:-1] + f' {attr}="{value}">'
 
-
-def _ensure_src(tag: str, value: str) -> str:
-    if SRC_RE.search(tag):
-        return SRC_RE.sub(f'src="{value}"', tag, count=1)
-    return _ensure_attr(tag, 'src', value)
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+# One attribute per match: (full text, name, double-quoted / single-quoted / bare value).
+ATTR_RE = re.compile(r'''(([^\s"'<>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?)''')
+
+# Attributes that may carry the cloud file id, in lookup priority order.
+FILE_ID_ATTRS = ('data-file-id', 'data-fileid', 'data-href', 'href', 'alt', 'src')
+# All cloud:// values of those attributes in one scan of the tag.
+CLOUD_ATTR_RE = re.compile(
+    r'''(?<![\w-])(data-file-id|data-fileid|data-href|href|alt|src)\s*=\s*'''
+    r'''(?:"(cloud://[^"]*)"|'(cloud://[^']*)'|(cloud://[^\s"'>]*))''',
+    re.IGNORECASE,
+)
+# Attributes written back on every rewritten tag (src is written last).
+FILE_ID_MIRROR_ATTRS = ('data-file-id', 'data-fileid', 'data-href', 'alt')
+
+SUMMARY_LENGTH = 80
+
+
+class _ImgTag:
+    """An <img> tag parsed once into an ordered attribute list.
+
+    Untouched attributes keep their original text; set() replaces the value in
+    place or appends the attribute, and render() rebuilds the tag in one go.
+    """
+
+    __slots__ = ('prefix', 'attrs', 'index', 'self_closing')
+
+    def __init__(self, tag: str):
+        self.prefix = tag[:4]
+        inner = tag[4:-1].rstrip()
+        self.self_closing = inner.endswith('/')
+        if self.self_closing:
+            inner = inner[:-1]
+        self.attrs: list[list] = []
+        self.index: dict[str, int] = {}
+        for text, name, dq, sq, bare in ATTR_RE.findall(inner):
+            key = name.lower()
+            if key not in self.index:
+                self.index[key] = len(self.attrs)
+            self.attrs.append([text, dq or sq or bare])
+
+    def get(self, name: str) -> str:
+        pos = self.index.get(name)
+        if pos is None:
+            return ''
+        return self.attrs[pos][1] or ''
+
+    def set(self, name: str, value: str) -> None:
+        item = [f'{name}="{value}"', value]
+        pos = self.index.get(name)
+        if pos is None:
+            self.index[name] = len(self.attrs)
+            self.attrs.append(item)
+        else:
+            self.attrs[pos] = item
+
+    def file_id(self) -> str:
+        for name in FILE_ID_ATTRS:
+            value = self.get(name)
+            if value.startswith('cloud://'):
+                return value
+        return ''
+
+    def render(self) -> str:
+        body = ''.join(f' {text}' for text, _ in self.attrs)
+        return f'{self.prefix}{body} />' if self.self_closing else f'{self.prefix}{body}>'
 
 
 def _pick_file_id(tag: str) -> str:
-    data_file_id = _get_attr(DATA_FILE_RE, tag)
-    if data_file_id and data_file_id.startswith('cloud://'):
-        return data_file_id
-    data_file_id = _get_attr(DATA_FILE_SHORT_RE, tag)
-    if data_file_id and data_file_id.startswith('cloud://'):
-        return data_file_id
-    data_href = _get_attr(DATA_HREF_RE, tag)
-    if data_href and data_href.startswith('cloud://'):
-        return data_href
-    href = _get_attr(HREF_RE, tag)
-    if href and href.startswith('cloud://'):
-        return href
-    alt = _get_attr(ALT_RE, tag)
-    if alt and alt.startswith('cloud://'):
-        return alt
-    src = _get_attr(SRC_RE, tag)
-    if src and src.startswith('cloud://'):
-        return src
+    """Find the file id without building the attribute list (read-only callers)."""
+    if 'cloud://' not in tag:
+        return ''
+    found: dict[str, str] = {}
+    for name, dq, sq, bare in CLOUD_ATTR_RE.findall(tag):
+        found.setdefault(name.lower(), dq or sq or bare)
+    for name in FILE_ID_ATTRS:
+        if name in found:
+            return found[name]
     return ''
 
 
+def _rewrite_tag(tag: _ImgTag, file_id: str, src: str) -> str:
+    for name in FILE_ID_MIRROR_ATTRS:
+        tag.set(name, file_id)
+    tag.set('src', src)
+    return tag.render()
+
+
 def extract_image_file_ids(content: str) -> list[str]:
     """Collect cloud file ids from <img> tags."""
     file_ids: list[str] = []
@@ -69,15 +110,13 @@ def extract_image_file_ids(content: str) -> list[str]:
 def normalize_content(content: str) -> str:
     """Replace image src with cloud file id when data-file-id is present."""
     def _replace(match: re.Match) -> str:
-        tag = match.group(0)
-        file_id = _pick_file_id(tag)
+        if 'cloud://' not in match.group(0):
+            return match.group(0)
+        tag = _ImgTag(match.group(0))
+        file_id = tag.file_id()
         if not file_id:
-            return tag
-        tag = _ensure_attr(tag, 'data-file-id', file_id)
-        tag = _ensure_attr(tag, 'data-fileid', file_id)
-        tag = _ensure_attr(tag, 'data-href', file_id)
-        tag = _ensure_attr(tag, 'alt', file_id)
-        return _ensure_src(tag, file_id)
+            return match.group(0)
+        return _rewrite_tag(tag, file_id, file_id)
 
     return IMG_TAG_RE.sub(_replace, content or '')
 
@@ -85,18 +124,14 @@ def normalize_content(content: str) -> str:
 def render_content(content: str, url_map: dict[str, str]) -> str:
     """Replace image src with temp url and keep data-file-id."""
     def _replace(match: re.Match) -> str:
-        tag = match.group(0)
-        file_id = _pick_file_id(tag)
-        if not file_id:
-            return tag
-        temp_url = url_map.get(file_id)
+        if 'cloud://' not in match.group(0):
+            return match.group(0)
+        tag = _ImgTag(match.group(0))
+        file_id = tag.file_id()
+        temp_url = url_map.get(file_id) if file_id else None
         if not temp_url:
-            return tag
-        tag = _ensure_attr(tag, 'data-file-id', file_id)
-        tag = _ensure_attr(tag, 'data-fileid', file_id)
-        tag = _ensure_attr(tag, 'data-href', file_id)
-        tag = _ensure_attr(tag, 'alt', file_id)
-        return _ensure_src(tag, temp_url)
+            return match.group(0)
+        return _rewrite_tag(tag, file_id, temp_url)
 
     return IMG_TAG_RE.sub(_replace, content or '')
 
@@ -110,3 +145,21 @@ def dedupe_file_ids(file_ids: Iterable[str]) -> list[str]:
         seen.add(fid)
         result.append(fid)
     return result
+
+
+def html_to_text(content: str) -> str:
+    """Strip tags, unescape entities and collapse whitespace."""
+    text = html.unescape(strip_tags(content or ''))
+    return ' '.join(text.split())
+
+
+def build_summary(text: str, limit: int = SUMMARY_LENGTH) -> str:
+    """Truncate plain text to a list summary."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}..."
+
+
+def content_digest(content: str) -> str:
+    """Stable hash of the stored content, used as the render cache version."""
+    return hashlib.sha1((content or '').encode('utf-8')).hexdigest()
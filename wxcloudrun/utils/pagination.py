@@ -0,0 +1,233 @@
+"""列表分页工具（后台与小程序共用）
+
+- 页码分页：current/page + size/page_size/limit（与原各接口参数一致）
+- 游标分页：按声明的排序字段 (-field, -id) 做 keyset 翻页，翻页深度不影响查询耗时；
+  游标为签名后的不透明字符串（含排序字段名，防篡改/混用）；旧的 `<时间>#<id>` 明文游标可被任意伪造，
+  默认拒绝，仅在 PAGINATION_LEGACY_CURSOR=1 时临时兼容（已弃用）
+- 后台总数：默认返回估算/缓存的总数（total_exact=false），传 exact=1 时才执行精确 COUNT
+  - 无过滤条件：大表取 information_schema 中的表行数估算，小表直接 COUNT
+  - 有过滤条件：精确 COUNT 的结果按查询语句缓存一段时间
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+logger = logging.getLogger('log')
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# 表行数低于该值时估算误差相对较大，直接精确计数
+ESTIMATE_MIN_ROWS = 50000
+COUNT_CACHE_TTL = 60
+CURSOR_SALT = 'wxcloudrun.pagination.cursor'
+
+
+def parse_pagination(request, default_size: int = DEFAULT_PAGE_SIZE, max_size: int = MAX_PAGE_SIZE):
+    """解析页码参数，返回 (page, page_size)，参数非法时抛出 ValueError。"""
+    current_param = request.GET.get('current') or request.GET.get('page')
+    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
+
+    page = 1
+    page_size = default_size
+    if current_param:
+        try:
+            page = int(current_param)
+        except (TypeError, ValueError):
+            raise ValueError('current 必须为数字')
+    if size_param:
+        try:
+            page_size = int(size_param)
+        except (TypeError, ValueError):
+            raise ValueError('size 必须为数字')
+    if page < 1:
+        page = 1
+    if page_size < 1:
+        page_size = 1
+    if page_size > max_size:
+        page_size = max_size
+    return page, page_size
+
+
+def parse_limit(request, default_size: int = DEFAULT_PAGE_SIZE, max_size: int = MAX_PAGE_SIZE) -> int:
+    """解析小程序端 limit 参数，非法时抛出 ValueError。"""
+    limit_param = request.GET.get('limit')
+    page_size = default_size
+    if limit_param:
+        try:
+            page_size = int(limit_param)
+        except (TypeError, ValueError):
+            raise ValueError('limit 必须为数字')
+    if page_size < 1:
+        page_size = 1
+    if page_size > max_size:
+        page_size = max_size
+    return page_size
+
+
+def _decode_cursor(cursor: str, field: str | None):
+    if '#' in cursor:
+        # 旧版明文游标：<ISO时间>#<id>（已弃用，默认拒绝）
+        if not getattr(settings, 'PAGINATION_LEGACY_CURSOR', False):
+            return None
+        ts_str, pk_str = cursor.split('#', 1)
+        return ts_str, pk_str
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(payload, list) or len(payload) != 3:
+        return None
+    cursor_field, ts_str, pk_val = payload
+    if field and cursor_field != field:
+        return None
+    return ts_str, pk_val
+
+
+def parse_cursor(cursor: str, field: str | None = None):
+    """解析游标，返回 (时间, id)，非法时返回 None。
+
+    field 为当前列表的排序字段，传入时会校验签名游标是否属于该排序。
+    """
+    cursor = (cursor or '').strip()
+    if not cursor:
+        return None
+    decoded = _decode_cursor(cursor, field)
+    if not decoded:
+        return None
+    ts_str, pk_str = decoded
+    if not isinstance(ts_str, str):
+        return None
+    dt = parse_datetime(ts_str)
+    if not dt:
+        try:
+            dt = datetime.fromisoformat(ts_str)
+        except ValueError:
+            return None
+    try:
+        pk_val = int(pk_str)
+    except (TypeError, ValueError):
+        return None
+    return dt, pk_val
+
+
+def build_cursor(obj, field: str) -> str:
+    """生成签名游标（内容为排序字段名、排序值与主键）。"""
+    return signing.dumps([field, getattr(obj, field).isoformat(), obj.pk], salt=CURSOR_SALT, compress=True)
+
+
+def _after_cursor(field: str, cursor_dt, cursor_pk) -> Q:
+    return Q(**{f'{field}__lt': cursor_dt}) | Q(**{field: cursor_dt, 'id__lt': cursor_pk})
+
+
+def cursor_paginate(qs, cursor: str, page_size: int, field: str = 'updated_at'):
+    """按 (-field, -id) 游标分页，返回 (对象列表, has_more, next_cursor)。
+
+    排序由本函数声明，调用方无需再 order_by；对应模型需有 (field, id) 联合索引。
+    游标非法时抛出 ValueError。
+    """
+    qs = qs.order_by(f'-{field}', '-id')
+    cursor = (cursor or '').strip()
+    if cursor:
+        cursor_value = parse_cursor(cursor, field)
+        if not cursor_value:
+            raise ValueError('cursor 无效')
+        qs = qs.filter(_after_cursor(field, *cursor_value))
+    rows = list(qs[: page_size + 1])
+    has_more = len(rows) > page_size
+    objects = rows[:page_size]
+    next_cursor = build_cursor(objects[-1], field) if has_more and objects else None
+    return objects, has_more, next_cursor
+
+
+def _table_row_estimate(model) -> int | None:
+    """读取数据库统计信息中的表行数（仅 MySQL），失败时返回 None。"""
+    connection = connections[model.objects.db]
+    if connection.vendor != 'mysql':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except Exception as exc:
+        logger.warning(f'读取表行数估算失败 table={model._meta.db_table}: {exc}')
+        return None
+    if not row or row[0] is None:
+        return None
+    return int(row[0])
+
+
+def _cached_count(qs) -> int:
+    sql, params = qs.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    key = f'admin_count:{qs.model._meta.db_table}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = qs.count()
+        cache.set(key, total, COUNT_CACHE_TTL)
+    return total
+
+
+def estimate_count(qs) -> int:
+    """返回查询集的估算总数（见模块说明）。"""
+    if not qs.query.where:
+        estimate = _table_row_estimate(qs.model)
+        if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+            return estimate
+    return _cached_count(qs)
+
+
+def paginate(request, qs, cursor_field: str = 'created_at', pagination: tuple[int, int] | None = None):
+    """分页查询，返回 (对象列表, 分页信息)。
+
+    统一按 (-cursor_field, -id) 排序。传 cursor 时按游标翻页（忽略页码），
+    否则按页码分页；两种方式都会返回 next_cursor，便于前端切换到游标翻页。
+    pagination 为调用方已用 parse_pagination 解析的 (page, page_size)，不传时在此解析。
+    参数非法时抛出 ValueError。
+    """
+    page, page_size = pagination or parse_pagination(request)
+    cursor_param = (request.GET.get('cursor') or '').strip()
+    exact = (request.GET.get('exact') or '').strip().lower() in ('1', 'true', 'yes')
+
+    base_qs = qs
+    qs = qs.order_by(f'-{cursor_field}', '-id')
+    if cursor_param:
+        cursor_value = parse_cursor(cursor_param, cursor_field)
+        if not cursor_value:
+            raise ValueError('cursor 无效')
+        qs = qs.filter(_after_cursor(cursor_field, *cursor_value))
+        start = None
+        rows = list(qs[: page_size + 1])
+    else:
+        start = (page - 1) * page_size
+        rows = list(qs[start : start + page_size + 1])
+
+    has_more = len(rows) > page_size
+    objects = rows[:page_size]
+
+    if exact:
+        total, total_exact = base_qs.count(), True
+    elif start is not None and not has_more and (objects or start == 0):
+        # 已到最后一页，总数可直接推算
+        total, total_exact = start + len(objects), True
+    else:
+        total, total_exact = estimate_count(base_qs), False
+
+    return objects, {
+        'total': total,
+        'total_exact': total_exact,
+        'has_more': has_more,
+        'next_cursor': build_cursor(objects[-1], cursor_field) if has_more and objects else None,
+    }
@@ -0,0 +1,24 @@
+"""手机号规范化工具"""
+from __future__ import annotations
+
+import re
+
+
+_NON_DIGIT_RE = re.compile(r'\D+')
+
+
+def normalize_phone(raw: str) -> str:
+    """去掉空格/横线/+86 等格式字符，返回纯数字手机号。"""
+    if not raw:
+        return ''
+    digits = _NON_DIGIT_RE.sub('', str(raw))
+    if len(digits) == 13 and digits.startswith('86'):
+        digits = digits[2:]
+    elif len(digits) == 15 and digits.startswith('0086'):
+        digits = digits[4:]
+    return digits
+
+
+def is_phone_keyword(keyword: str) -> bool:
+    """关键词是否按手机号检索（允许空格、横线与 + 号）。"""
+    return bool(keyword) and bool(normalize_phone(keyword)) and not re.search(r'[^\d\s\-+]', keyword)
@@ -0,0 +1,332 @@
+"""请求剖析（线上慢请求定位）
+
+- 管理员请求带 X-Profile 头时剖析该请求：X-Profile: sample（默认，统计采样）或 cprofile（确定性剖析）；
+  响应头 X-Profile-Id 为剖析结果编号
+- PROFILING_SAMPLE_RATE > 0 时按比例对普通流量做统计采样（持续剖析），每个进程同时最多采样一个请求
+- 结果包含总耗时、CPU 时间、SQL 时间线（语句模板，不含参数）、开放接口调用与调用栈统计，
+  写入 PROFILING_DIR，只保留最近 PROFILING_BUFFER_SIZE 条（多 worker 共享），由 /api/admin/profiles 查看
+- 统计采样：后台线程每 PROFILING_INTERVAL_MS 毫秒读取一次请求线程的调用栈，按函数汇总，
+  同时输出折叠栈（flamegraph.pl / speedscope 可直接导入）；等待 SQL、网络的时间同样计入。
+  采样线程要等 GIL，CPU 密集代码处实际间隔会变长，因此每个样本按距上次采样的实际耗时加权
+"""
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+
+MODE_SAMPLE = 'sample'
+MODE_CPROFILE = 'cprofile'
+
+MAX_STACK_DEPTH = 64
+MAX_TIMELINE_EVENTS = 500
+MAX_SQL_LENGTH = 1000
+TOP_FUNCTIONS = 40
+TOP_STACKS = 200
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_LIB_DIRS = tuple(sorted({p for p in (sysconfig.get_paths().get('purelib'), sysconfig.get_paths().get('stdlib')) if p},
+                         key=len, reverse=True))
+_PROFILE_ID_RE = re.compile(r'^[0-9a-f]{12}$')
+
+
+def _short_path(filename: str) -> str:
+    for prefix in (*_LIB_DIRS, _PROJECT_DIR):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _function_label(code) -> str:
+    return f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """后台线程定时读取目标线程的调用栈（只记录 root_frame 以下的部分），样本按实际间隔（微秒）加权"""
+
+    def __init__(self, thread_id: int, root_frame, interval: float):
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.lines: Counter = Counter()
+        self.samples = 0
+        self.sampled_us = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = int((now - last) * 1_000_000), now
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            leaf = frame
+            stack = []
+            while frame is not None and frame is not self.root_frame and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_function_label(frame.f_code))
+                frame = frame.f_back
+            del frame
+            if not stack:
+                continue
+            stack.reverse()
+            self.stacks[tuple(stack)] += weight
+            self.lines[f'{_short_path(leaf.f_code.co_filename)}:{leaf.f_lineno} in {leaf.f_code.co_name}'] += weight
+            del leaf
+            self.samples += 1
+            self.sampled_us += weight
+
+    def result(self) -> dict:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for label in set(stack):
+                total[label] += n
+        sampled = self.sampled_us or 1
+        functions = [
+            {
+                'function': label,
+                'self_ms': round(own[label] / 1000, 3),
+                'total_ms': round(us / 1000, 3),
+                'self_pct': round(own[label] * 100 / sampled, 1),
+                'total_pct': round(us * 100 / sampled, 1),
+            }
+            for label, us in sorted(total.items(), key=lambda item: (own[item[0]], item[1]), reverse=True)[:TOP_FUNCTIONS]
+        ]
+        return {
+            'mode': MODE_SAMPLE,
+            'interval_ms': round(self.interval * 1000, 3),
+            'samples': self.samples,
+            'sampled_ms': round(self.sampled_us / 1000, 3),
+            'functions': functions,
+            'hot_lines': [{'line': line, 'ms': round(us / 1000, 3)} for line, us in self.lines.most_common(15)],
+            # 折叠栈：每行 "栈帧;...;栈帧 微秒数"
+            'stacks': [f"{';'.join(stack)} {us}" for stack, us in self.stacks.most_common(TOP_STACKS)],
+        }
+
+
+class DeterministicProfiler:
+    """cProfile 剖析请求线程（开销较大，只用于管理员手动触发）"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def result(self) -> dict:
+        stats = pstats.Stats(self.profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        functions = [
+            {
+                'function': f'{func} ({_short_path(filename)}:{lineno})',
+                'calls': nc,
+                'primitive_calls': cc,
+                'self_ms': round(tt * 1000, 3),
+                'total_ms': round(ct * 1000, 3),
+            }
+            for (filename, lineno, func), (cc, nc, tt, ct, _callers) in rows
+        ]
+        return {'mode': MODE_CPROFILE, 'functions': functions}
+
+
+class RequestProfile:
+    """单个请求的剖析过程：调用栈剖析 + SQL / 开放接口时间线"""
+
+    def __init__(self, mode: str, trigger: str, interval: float, root_frame):
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.created_at = datetime.now()
+        self.sql: list[dict] = []
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.openapi: list[dict] = []
+        self.profiler = None
+        if mode == MODE_CPROFILE:
+            self.profiler = DeterministicProfiler()
+            try:
+                self.profiler.start()
+            except ValueError:
+                # 同一进程已有其他剖析器在运行（Python 3.12+ 的 cProfile 全局唯一），退回统计采样
+                self.profiler = None
+        if self.profiler is None:
+            self.profiler = StackSampler(threading.get_ident(), root_frame, interval)
+            self.profiler.start()
+        self.mode = MODE_CPROFILE if isinstance(self.profiler, DeterministicProfiler) else MODE_SAMPLE
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def offset_ms(self, at: float) -> float:
+        return round((at - self._started) * 1000, 3)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_count += 1
+            self.sql_seconds += elapsed
+            if len(self.sql) < MAX_TIMELINE_EVENTS:
+                self.sql.append({
+                    'start_ms': self.offset_ms(started),
+                    'ms': round(elapsed * 1000, 3),
+                    'alias': context['connection'].alias,
+                    'many': many,
+                    'sql': sql[:MAX_SQL_LENGTH],
+                })
+
+    def add_openapi(self, path: str, started: float, seconds: float, ok: bool):
+        if len(self.openapi) < MAX_TIMELINE_EVENTS:
+            self.openapi.append({
+                'start_ms': self.offset_ms(started),
+                'ms': round(seconds * 1000, 3),
+                'path': path,
+                'ok': ok,
+            })
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._started
+        self.cpu_seconds = time.thread_time() - self._cpu_started
+        self.profiler.stop()
+
+    def to_dict(self, request, view: str, status: int, admin=None) -> dict:
+        return {
+            'id': self.id,
+            'created_at': self.created_at.isoformat(timespec='milliseconds'),
+            'pid': os.getpid(),
+            'trigger': self.trigger,
+            'mode': self.mode,
+            'requested_by': admin.get_username() if admin is not None else '',
+            'method': request.method,
+            'path': request.path,
+            'query_string': request.META.get('QUERY_STRING', ''),
+            'view': view,
+            'status': status,
+            'wall_ms': round(self.wall_seconds * 1000, 3),
+            'cpu_ms': round(self.cpu_seconds * 1000, 3),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_seconds * 1000, 3),
+            'openapi_count': len(self.openapi),
+            'openapi_ms': round(sum(e['ms'] for e in self.openapi), 3),
+            'sql': self.sql,
+            'openapi': self.openapi,
+            'profile': self.profiler.result(),
+        }
+
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    'request_profile', default=None,
+)
+
+
+def record_openapi_event(path: str, started: float, seconds: float, ok: bool = True):
+    """开放接口调用处调用：当前请求正在剖析时记入时间线"""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_openapi(path, started, seconds, ok)
+
+
+SUMMARY_FIELDS = (
+    'id', 'created_at', 'pid', 'trigger', 'mode', 'requested_by', 'method', 'path', 'query_string', 'view',
+    'status', 'wall_ms', 'cpu_ms', 'sql_count', 'sql_ms', 'openapi_count', 'openapi_ms',
+)
+
+
+class ProfileStore:
+    """剖析结果环形缓冲：每条结果一个文件（<毫秒时间戳>-<编号>.json），超过容量时删除最旧的"""
+
+    def __init__(self, directory: str, capacity: int):
+        self.directory = directory
+        self.capacity = max(1, capacity)
+
+    def _files(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((n for n in names if n.endswith('.json')), reverse=True)
+
+    def save(self, profile: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(time.time() * 1000):013d}-{profile['id']}.json"
+        tmp_path = os.path.join(self.directory, f'.{name}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        for stale in self._files()[self.capacity:]:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except FileNotFoundError:
+                pass
+
+    def _load(self, name: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def list(self) -> list[dict]:
+        """最近的剖析结果概要（新的在前）"""
+        summaries = []
+        for name in self._files()[:self.capacity]:
+            data = self._load(name)
+            if data is not None:
+                summaries.append({key: data.get(key) for key in SUMMARY_FIELDS})
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if not _PROFILE_ID_RE.match(profile_id or ''):
+            return None
+        suffix = f'-{profile_id}.json'
+        for name in self._files():
+            if name.endswith(suffix):
+                return self._load(name)
+        return None
+
+    def clear(self):
+        for name in self._files():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        from django.conf import settings
+
+        _store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_BUFFER_SIZE)
+    return _store
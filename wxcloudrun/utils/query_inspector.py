@@ -0,0 +1,175 @@
+"""SQL 检查工具（开发/测试环境发现 N+1 与查询数回归）
+
+- fingerprint(sql)：把字面量替换为 ?、折叠 IN 列表与多行 VALUES，同一语句模板得到相同指纹
+- QueryCapture：上下文管理器，记录其中在所有数据库连接上执行的 SQL（可选记录发起查询的代码位置），
+  指纹在用到时才计算；QueryCounter 只计数，供生产环境的 query_budget 使用
+- QueryInspectorMiddleware（wxcloudrun/middleware.py，settings.QUERY_INSPECTOR 开启时生效）：
+  同一请求内同一指纹出现不少于 QUERY_INSPECTOR_N1_THRESHOLD 次时按 N+1 记录告警，并附代码位置
+- query_budget(n)：视图装饰器，视图内 SQL 超过 n 条时，QUERY_BUDGET_ENFORCE 开启（开发、manage.py test）
+  抛出 QueryBudgetExceeded 让测试失败，否则只计数并在超出时记录告警
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+
+from wxcloudrun.exceptions import QueryBudgetExceeded
+
+
+logger = logging.getLogger('log')
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 这些模块只是转发查询，定位时跳过
+_SKIP_FILES = (
+    os.path.join(_PACKAGE_DIR, 'utils', 'query_inspector.py'),
+    os.path.join(_PACKAGE_DIR, 'middleware.py'),
+    os.path.join(_PACKAGE_DIR, 'decorators.py'),
+    os.path.join(_PACKAGE_DIR, 'db') + os.sep,
+    os.path.join(_PACKAGE_DIR, 'utils', 'metrics.py'),
+)
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+# 事务控制语句不参与重复检测
+_TRANSACTION_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'SET ')
+
+
+def fingerprint(sql: str) -> str:
+    """归一化 SQL：字面量、参数占位符统一为 ?，IN (...) 与批量 VALUES 折叠"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_RE.sub(r'VALUES \1, ...', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def caller_location() -> str:
+    """发起查询的项目代码位置（跳过 Django 与本模块等转发层）"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PACKAGE_DIR) and not filename.startswith(_SKIP_FILES):
+            return f'{os.path.relpath(filename, os.path.dirname(_PACKAGE_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return '<unknown>'
+
+
+class CapturedQuery:
+    __slots__ = ('sql', '_fingerprint', 'seconds', 'location')
+
+    def __init__(self, sql, seconds, location):
+        self.sql = sql
+        self._fingerprint = None
+        self.seconds = seconds
+        self.location = location
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.sql)
+        return self._fingerprint
+
+
+class _ConnectionWrapper:
+    """在代码块内给所有数据库连接挂上 execute_wrapper"""
+
+    _stack: Optional[ExitStack] = None
+
+    def _wrapper(self, execute, sql, params, many, context):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._wrapper))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+        return False
+
+
+class QueryCounter(_ConnectionWrapper):
+    """只统计代码块内执行的 SQL 条数（不保存语句、不计算指纹）"""
+
+    def __init__(self):
+        self.count = 0
+
+    def _wrapper(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryCapture(_ConnectionWrapper):
+    """记录代码块内执行的 SQL（with QueryCapture() as capture: ...）"""
+
+    def __init__(self, with_locations: bool = True):
+        self.with_locations = with_locations
+        self.queries: list[CapturedQuery] = []
+
+    def _wrapper(self, execute, sql, params, many, context):
+        location = caller_location() if self.with_locations else ''
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(CapturedQuery(sql, time.perf_counter() - started, location))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int, list[str]]]:
+        """出现不少于 threshold 次的指纹：[(指纹, 次数, 代码位置)]，按次数降序"""
+        counts = Counter(q.fingerprint for q in self.queries if not q.fingerprint.upper().startswith(_TRANSACTION_PREFIXES))
+        result = []
+        for fp, n in counts.most_common():
+            if n < threshold:
+                break
+            locations = sorted({q.location for q in self.queries if q.fingerprint == fp and q.location})
+            result.append((fp, n, locations))
+        return result
+
+    def report(self, threshold: int, limit: int = 5) -> str:
+        lines = []
+        for fp, n, locations in self.repeated(threshold)[:limit]:
+            lines.append(f'  x{n} {fp[:300]}')
+            for location in locations[:3]:
+                lines.append(f'      at {location}')
+        return '\n'.join(lines)
+
+
+def query_budget(limit: int):
+    """视图 SQL 条数预算（放在鉴权装饰器之内、紧贴视图函数）
+
+    超出预算时：QUERY_BUDGET_ENFORCE 开启则抛出 QueryBudgetExceeded（附重复 SQL 与代码位置），
+    否则只计数并记录告警，不保存 SQL、不计算指纹。
+    """
+    def decorator(view_func):
+        def _wrapped(request, *args, **kwargs):
+            enforce = getattr(settings, 'QUERY_BUDGET_ENFORCE', False)
+            with (QueryCapture() if enforce else QueryCounter()) as capture:
+                response = view_func(request, *args, **kwargs)
+            if capture.count > limit:
+                message = f'{view_func.__name__} 执行了 {capture.count} 条 SQL，超出预算 {limit} 条'
+                if enforce:
+                    raise QueryBudgetExceeded(f'{message}\n{capture.report(threshold=2)}')
+                logger.warning('%s: %s', message, request.path)
+            return response
+        _wrapped.query_budget = limit
+        return _wrapped
+    return decorator
@@ -0,0 +1,70 @@
+"""搜索分词工具（不依赖外部分词库/搜索服务）
+
+- 中日韩文字：按连续片段切分为单字 + 相邻二元组（bigram）
+- 字母/数字：按单词切分，并额外生成前缀词，支持输入过程中的前缀匹配
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+
+
+# 单个词元最大长度（与 MerchantSearchToken.token 字段长度一致）
+MAX_TOKEN_LENGTH = 32
+# 字母/数字词生成前缀的最大长度，查询词超过该长度时按前缀截断
+MAX_PREFIX_LENGTH = 12
+MIN_PREFIX_LENGTH = 2
+
+_CJK_RANGES = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK_RANGES}]+|[0-9a-z]+')
+_CJK_RE = re.compile(rf'[{_CJK_RANGES}]')
+
+
+def normalize(text: str) -> str:
+    """全角转半角并转小写。"""
+    if not text:
+        return ''
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def _runs(text: str):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def index_terms(text: str) -> Counter:
+    """返回文本的索引词元及出现次数。"""
+    terms: Counter = Counter()
+    for run in _runs(text):
+        if _CJK_RE.match(run):
+            terms.update(run)
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            word = run[:MAX_TOKEN_LENGTH]
+            terms[word] += 1
+            for size in range(MIN_PREFIX_LENGTH, min(len(word), MAX_PREFIX_LENGTH + 1)):
+                terms[word[:size]] += 1
+    return terms
+
+
+def query_terms(text: str) -> list[str]:
+    """返回查询词元（去重且保持顺序）。
+
+    中文片段只取二元组（单字片段取单字），字母/数字词取前缀词；
+    单个字母/数字不参与检索。
+    """
+    terms: list[str] = []
+    for run in _runs(text):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                candidates = [run]
+            else:
+                candidates = [run[i:i + 2] for i in range(len(run) - 1)]
+        else:
+            if len(run) < MIN_PREFIX_LENGTH:
+                continue
+            candidates = [run[:MAX_PREFIX_LENGTH]]
+        for term in candidates:
+            if term not in terms:
+                terms.append(term)
+    return terms
@@ -13,6 +13,8 @@ from wxcloudrun.views.miniapp import (
     categories_list,
     merchants_list,
     merchants_recommended,
+    merchants_map,
+    merchants_search,
     merchant_detail,
     merchant_update_banner,
     merchant_business_license,
@@ -35,6 +37,7 @@ from wxcloudrun.views.miniapp import (
     notifications_list,
     notifications_unread_count,
     notification_detail,
+    notifications_read_all,
 )
 
 # 管理员视图
@@ -77,5 +80,11 @@ from wxcloudrun.views.admin import (
     admin_review_delete,
     admin_notifications,
     admin_notification_detail,
+    admin_metrics,
+    admin_profiles,
+    admin_profile_detail,
 )
+
+# 健康检查
+from wxcloudrun.views.health import healthz, readyz
 
@@ -25,6 +25,8 @@ from wxcloudrun.views.admin.feedbacks import admin_feedbacks
 from wxcloudrun.views.admin.recommended_merchants import admin_recommended_merchants
 from wxcloudrun.views.admin.orders import admin_orders, admin_reviews, admin_review_delete
 from wxcloudrun.views.admin.notifications import admin_notifications, admin_notification_detail
+from wxcloudrun.views.admin.metrics import admin_metrics
+from wxcloudrun.views.admin.profiles import admin_profiles, admin_profile_detail
 
 __all__ = [
     'admin_login',
@@ -65,4 +67,7 @@ __all__ = [
     'admin_review_delete',
     'admin_notifications',
     'admin_notification_detail',
+    'admin_metrics',
+    'admin_profiles',
+    'admin_profile_detail',
 ]
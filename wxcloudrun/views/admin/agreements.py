@@ -1,17 +1,15 @@
 """管理员协议合同管理视图"""
 import json
 import logging
-from datetime import datetime
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q
-from django.utils.dateparse import parse_datetime
 from django.core.exceptions import ObjectDoesNotExist
 
 from wxcloudrun.decorators import admin_token_required
 from wxcloudrun.utils.responses import json_ok, json_err
-from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.utils.pagination import cursor_paginate, parse_limit
 from wxcloudrun.models import ContractSetting
-from wxcloudrun.services.storage_service import get_temp_file_urls, resolve_icon_url, delete_cloud_files
+from wxcloudrun.services.storage_service import get_temp_file_urls, resolve_icon_url, delete_cloud_files_later
 from wxcloudrun.models import UserInfo, UserContractSignature
 
 
@@ -41,11 +39,8 @@ def admin_contract_image(request, admin):
     old_file_id = setting.contract_file_id or ''
 
     # 若替换为不同云ID，删除旧云文件
-    if new_file_id != old_file_id and old_file_id.startswith('cloud://'):
-        try:
-            delete_cloud_files([old_file_id])
-        except WxOpenApiError as exc:
-            logger.warning(f"删除旧协议合同图片失败: {old_file_id}, error={exc}")
+    if new_file_id != old_file_id:
+        delete_cloud_files_later([old_file_id])
 
     setting.contract_file_id = new_file_id
     setting.save()
@@ -64,46 +59,14 @@ def admin_contract_signature(request, admin):
     setting = ContractSetting.get_solo()
     default_contract_id = setting.contract_file_id or ''
     
-    limit_param = request.GET.get('limit')
-    page_size = 20
-    if limit_param:
-        try:
-            page_size = int(limit_param)
-        except (TypeError, ValueError):
-            return json_err('limit 必须为数字', status=400)
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
-    cursor_param = (request.GET.get('cursor') or '').strip()
-    cursor_filter = None
-    if cursor_param:
-        parts = cursor_param.split('#', 1)
-        if len(parts) == 2:
-            ts_str, pk_str = parts
-            dt = parse_datetime(ts_str)
-            if not dt:
-                try:
-                    dt = datetime.fromisoformat(ts_str)
-                except ValueError:
-                    dt = None
-            try:
-                pk_val = int(pk_str)
-            except (TypeError, ValueError):
-                pk_val = None
-            if dt and pk_val is not None:
-                cursor_filter = (dt, pk_val)
-        if not cursor_filter:
-            return json_err('cursor 无效', status=400)
-
     users_qs = UserInfo.objects.select_related('merchant_profile', 'property_profile').filter(
         Q(merchant_profile__isnull=False) | Q(property_profile__isnull=False)
-    ).order_by('-updated_at', '-id')
-    if cursor_filter:
-        cursor_dt, cursor_pk = cursor_filter
-        users_qs = users_qs.filter(Q(updated_at__lt=cursor_dt) | Q(updated_at=cursor_dt, id__lt=cursor_pk))
-    users = list(users_qs[: page_size + 1])
+    )
+    try:
+        page_size = parse_limit(request)
+        users, has_more, next_cursor = cursor_paginate(users_qs, request.GET.get('cursor'), page_size, field='updated_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     user_ids = [u.id for u in users]
     user_current_contract_map = {}
@@ -141,10 +104,8 @@ def admin_contract_signature(request, admin):
             file_ids.append(fid)
     temp_urls = get_temp_file_urls(file_ids) if file_ids else {}
 
-    has_more = len(users) > page_size
-    sliced = users[:page_size]
     items = []
-    for u in sliced:
+    for u in users:
         current_contract_id = user_current_contract_map.get(u.id) or ''
         record = signature_map.get((u.id, current_contract_id))
         signed = bool(record)
@@ -180,5 +141,4 @@ def admin_contract_signature(request, admin):
             'contract_signed': contract_signed,
             'contract_current': contract_current,
         })
-    next_cursor = f"{sliced[-1].updated_at.isoformat()}#{sliced[-1].id}" if has_more and sliced else None
     return json_ok({'list': items, 'has_more': has_more, 'next_cursor': next_cursor})
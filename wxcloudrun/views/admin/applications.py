@@ -5,8 +5,9 @@ from datetime import datetime
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate
 from wxcloudrun.models import UserInfo, MerchantProfile, PropertyProfile, IdentityApplication
 
 
@@ -15,37 +16,16 @@ logger = logging.getLogger('log')
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_applications_list(request, admin):
     status_filter = request.GET.get('status')
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
     qs = IdentityApplication.objects.select_related('user').all().order_by('-created_at', '-id')
     if status_filter and status_filter in ['PENDING', 'APPROVED', 'REJECTED']:
         qs = qs.filter(status=status_filter)
-    total = qs.count()
-    start = (page - 1) * page_size
-    apps = list(qs[start : start + page_size])
+    try:
+        apps, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
     items = []
     for app in apps:
         items.append({
@@ -67,7 +47,7 @@ def admin_applications_list(request, admin):
             'reject_reason': app.reject_reason,
             'created_at': app.created_at.strftime('%Y-%m-%d %H:%M:%S'),
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
@@ -5,12 +5,12 @@ from django.views.decorators.http import require_http_methods
 
 from wxcloudrun.decorators import admin_token_required
 from wxcloudrun.utils.responses import json_ok, json_err
-from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.utils.pagination import paginate
 from wxcloudrun.models import Category
 from wxcloudrun.services.storage_service import (
     get_temp_file_urls,
     resolve_icon_url,
-    delete_cloud_files,
+    delete_cloud_files_later,
 )
 
 
@@ -22,33 +22,11 @@ logger = logging.getLogger('log')
 def admin_categories(request, admin):
     """分类管理 - GET列表 / POST创建"""
     if request.method == 'GET':
-        current_param = request.GET.get('current') or request.GET.get('page')
-        size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-        page = 1
-        page_size = 20
-
-        if current_param:
-            try:
-                page = int(current_param)
-            except (TypeError, ValueError):
-                return json_err('current 必须为数字', status=400)
-        if size_param:
-            try:
-                page_size = int(size_param)
-            except (TypeError, ValueError):
-                return json_err('size 必须为数字', status=400)
-        if page < 1:
-            page = 1
-        if page_size < 1:
-            page_size = 1
-        if page_size > 100:
-            page_size = 100
-
         qs = Category.objects.all().order_by('-updated_at', '-id')
-        total = qs.count()
-        start = (page - 1) * page_size
-        categories = list(qs[start : start + page_size])
+        try:
+            categories, page_info = paginate(request, qs, cursor_field='updated_at')
+        except ValueError as exc:
+            return json_err(str(exc), status=400)
         icon_file_ids = [c.icon_file_id for c in categories if c.icon_file_id and c.icon_file_id.startswith('cloud://')]
         temp_urls = get_temp_file_urls(icon_file_ids)
         items = []
@@ -61,7 +39,7 @@ def admin_categories(request, admin):
                 'icon_file_id': icon_file_id,
                 'icon_url': icon_url,
             })
-        return json_ok({'list': items, 'total': total})
+        return json_ok({'list': items, **page_info})
     
     # POST 创建
     try:
@@ -115,12 +93,8 @@ def admin_categories_detail(request, admin, category_id):
         category.name = body['name']
     if 'icon_file_id' in body:
         new_icon_file_id = body.get('icon_file_id') or ''
-        if new_icon_file_id != old_icon_file_id and old_icon_file_id.startswith('cloud://'):
-            try:
-                delete_cloud_files([old_icon_file_id])
-            except WxOpenApiError as exc:
-                logger.error(f'删除旧分类图标失败: {str(exc)}', exc_info=True)
-                return json_err(f'删除旧图标失败: {str(exc)}', status=500)
+        if new_icon_file_id != old_icon_file_id:
+            delete_cloud_files_later([old_icon_file_id])
         category.icon_file_id = new_icon_file_id
     
     try:
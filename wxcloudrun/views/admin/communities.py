@@ -8,6 +8,7 @@ from django.views.decorators.http import require_http_methods
 from wxcloudrun.decorators import admin_token_required
 from wxcloudrun.models import Community, PropertyProfile
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate
 
 
 logger = logging.getLogger('log')
@@ -18,33 +19,11 @@ logger = logging.getLogger('log')
 def admin_communities(request, admin):
     """小区管理 - GET列表 / POST创建"""
     if request.method == 'GET':
-        current_param = request.GET.get('current') or request.GET.get('page')
-        size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-        page = 1
-        page_size = 20
-
-        if current_param:
-            try:
-                page = int(current_param)
-            except (TypeError, ValueError):
-                return json_err('current 必须为数字', status=400)
-        if size_param:
-            try:
-                page_size = int(size_param)
-            except (TypeError, ValueError):
-                return json_err('size 必须为数字', status=400)
-        if page < 1:
-            page = 1
-        if page_size < 1:
-            page_size = 1
-        if page_size > 100:
-            page_size = 100
-
         qs = Community.objects.select_related('property').all().order_by('-updated_at', '-id')
-        total = qs.count()
-        start = (page - 1) * page_size
-        communities = list(qs[start : start + page_size])
+        try:
+            communities, page_info = paginate(request, qs, cursor_field='updated_at')
+        except ValueError as exc:
+            return json_err(str(exc), status=400)
 
         items = []
         for c in communities:
@@ -55,7 +34,7 @@ def admin_communities(request, admin):
                 'property_name': c.property.property_name if c.property else None,
                 'updated_at': c.updated_at.strftime('%Y-%m-%d %H:%M:%S') if c.updated_at else None,
             })
-        return json_ok({'list': items, 'total': total})
+        return json_ok({'list': items, **page_info})
 
     # POST 创建
     try:
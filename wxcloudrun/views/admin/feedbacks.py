@@ -3,39 +3,18 @@
 from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.models import UserFeedback
 from wxcloudrun.services.storage_service import get_temp_file_urls
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate
 
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_feedbacks(request, admin):
     """意见反馈 - GET列表（管理员）"""
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
     keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
     openid = (request.GET.get('openid') or '').strip()
 
@@ -50,9 +29,10 @@ def admin_feedbacks(request, admin):
             | Q(user__nickname__icontains=keyword)
         )
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    feedbacks = list(qs[start : start + page_size])
+    try:
+        feedbacks, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     cloud_file_ids = []
     for f in feedbacks:
@@ -94,5 +74,5 @@ def admin_feedbacks(request, admin):
             'updated_at': f.updated_at.strftime('%Y-%m-%d %H:%M:%S') if f.updated_at else None,
         })
 
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
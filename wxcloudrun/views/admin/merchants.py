@@ -2,14 +2,17 @@
 import json
 import logging
 from decimal import Decimal
+from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
-from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.utils.pagination import paginate
 from wxcloudrun.models import Category, UserInfo, MerchantProfile, UserAssignedIdentity
 from wxcloudrun.services.points_service import get_points_account
-from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files
+from wxcloudrun.services.merchant_search_service import matching_merchant_pks
+from wxcloudrun.services.cloud_file_service import resolve_entity_urls
+from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files_later
 
 
 logger = logging.getLogger('log')
@@ -24,38 +27,7 @@ def _normalize_merchant_type(value: str):
     return None
 
 
-def _parse_pagination(request):
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            raise ValueError('current 必须为数字')
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            raise ValueError('size 必须为数字')
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-    return page, page_size
-
-
 def _admin_merchants_list(request, merchant_type_filter=None):
-    try:
-        page, page_size = _parse_pagination(request)
-    except ValueError as exc:
-        return json_err(str(exc), status=400)
-
     merchant_type = (
         merchant_type_filter
         or _normalize_merchant_type(request.GET.get('merchant_type') or request.GET.get('type') or '')
@@ -64,19 +36,20 @@ def _admin_merchants_list(request, merchant_type_filter=None):
     qs = MerchantProfile.objects.select_related('user', 'category').all().order_by('-updated_at', '-id')
     if merchant_type:
         qs = qs.filter(merchant_type=merchant_type)
-    total = qs.count()
-    start = (page - 1) * page_size
-    merchants = list(qs[start : start + page_size])
+    keyword = (request.GET.get('keyword') or '').strip()
+    if keyword:
+        # 商户ID精确匹配，其余走搜索索引（名称/标题/地址/简介）
+        matched = matching_merchant_pks(keyword)
+        if matched is None:
+            qs = qs.filter(merchant_id=keyword)
+        else:
+            qs = qs.filter(Q(merchant_id=keyword) | Q(id__in=matched))
+    try:
+        merchants, page_info = paginate(request, qs, cursor_field='updated_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
-    all_file_ids = []
-    for m in merchants:
-        if m.banner_url and m.banner_url.startswith('cloud://'):
-            all_file_ids.append(m.banner_url)
-        if m.contract_file_id and m.contract_file_id.startswith('cloud://'):
-            all_file_ids.append(m.contract_file_id)
-        if m.business_license_file_id and m.business_license_file_id.startswith('cloud://'):
-            all_file_ids.append(m.business_license_file_id)
-    temp_urls = get_temp_file_urls(all_file_ids) if all_file_ids else {}
+    temp_urls = resolve_entity_urls(merchants, fields=('banner_url', 'contract_file_id', 'business_license_file_id'))
     items = []
     for m in merchants:
         banner_data = None
@@ -121,17 +94,19 @@ def _admin_merchants_list(request, merchant_type_filter=None):
             'daily_points': get_points_account(m.user, 'MERCHANT').daily_points if m.user else 0,
             'total_points': get_points_account(m.user, 'MERCHANT').total_points if m.user else 0,
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_merchants(request, admin):
     return _admin_merchants_list(request, merchant_type_filter=None)
 
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_discount_stores(request, admin):
     """折扣店列表（后台控制中心）"""
     return _admin_merchants_list(request, merchant_type_filter='DISCOUNT_STORE')
@@ -152,22 +127,8 @@ def admin_merchants_detail(request, admin, openid):
         return json_err('商户不存在', status=404)
     
     if request.method == 'DELETE':
-        # 删除关联的横幅图云文件
-        if merchant.banner_url and merchant.banner_url.startswith('cloud://'):
-            try:
-                delete_cloud_files([merchant.banner_url])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除商户横幅图失败: {merchant.banner_url}, error={exc}")
-        if merchant.contract_file_id and merchant.contract_file_id.startswith('cloud://'):
-            try:
-                delete_cloud_files([merchant.contract_file_id])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除商户合同文件失败: {merchant.contract_file_id}, error={exc}")
-        if merchant.business_license_file_id and merchant.business_license_file_id.startswith('cloud://'):
-            try:
-                delete_cloud_files([merchant.business_license_file_id])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除商户营业执照文件失败: {merchant.business_license_file_id}, error={exc}")
+        # 删除关联的横幅图、合同、营业执照云文件（后台任务执行）
+        delete_cloud_files_later([merchant.banner_url, merchant.contract_file_id, merchant.business_license_file_id])
         merchant.delete()
         # 撤销商户身份，避免仍可切换为商户
         try:
@@ -203,11 +164,8 @@ def admin_merchants_detail(request, admin, openid):
         old_file_id = merchant.banner_url
         
         # 如果新旧文件不同，删除旧文件
-        if old_file_id and old_file_id.startswith('cloud://') and old_file_id != new_file_id:
-            try:
-                delete_cloud_files([old_file_id])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除旧商户横幅图失败: {old_file_id}, error={exc}")
+        if old_file_id != new_file_id:
+            delete_cloud_files_later([old_file_id])
         
         merchant.banner_url = new_file_id if new_file_id else ''
     if 'category_id' in body:
@@ -224,11 +182,8 @@ def admin_merchants_detail(request, admin, openid):
     if 'contract_file_id' in body:
         new_file_id = body.get('contract_file_id') or ''
         old_file_id = merchant.contract_file_id or ''
-        if old_file_id and old_file_id.startswith('cloud://') and old_file_id != new_file_id:
-            try:
-                delete_cloud_files([old_file_id])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除旧商户合同文件失败: {old_file_id}, error={exc}")
+        if old_file_id != new_file_id:
+            delete_cloud_files_later([old_file_id])
         merchant.contract_file_id = new_file_id
     if 'address' in body:
         merchant.address = body.get('address', '')
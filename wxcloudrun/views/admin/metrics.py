@@ -0,0 +1,16 @@
+"""管理员指标视图"""
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.utils.metrics import CONTENT_TYPE, render_metrics
+
+
+@admin_token_required
+@require_http_methods(["GET"])
+def admin_metrics(request, admin):
+    """Prometheus 文本格式的请求指标（汇总本实例所有 worker 进程）
+
+    抓取配置使用管理员 Token：Authorization: Bearer <token>
+    """
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
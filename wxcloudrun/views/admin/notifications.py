@@ -1,33 +1,26 @@
 """管理员通知发布与列表"""
 
-import html
 import json
 import re
 from datetime import datetime
 
+from django.db import transaction
 from django.db.models import Q
-from django.utils.html import strip_tags
 from django.views.decorators.http import require_http_methods
 
 from wxcloudrun.decorators import admin_token_required
-from wxcloudrun.models import Notification
-from wxcloudrun.services.storage_service import get_temp_file_urls
-from wxcloudrun.utils.notification_content import (
-    dedupe_file_ids,
-    extract_image_file_ids,
-    normalize_content,
-    render_content,
+from wxcloudrun.models import IDENTITY_CHOICES, Community, Notification, PropertyProfile
+from wxcloudrun.services.notification_read_store import get_read_store
+from wxcloudrun.services.notification_service import (
+    SEGMENT_TYPES,
+    get_audience,
+    render_notification,
+    render_notifications,
+    set_audience,
 )
+from wxcloudrun.utils.notification_content import html_to_text, normalize_content
 from wxcloudrun.utils.responses import json_ok, json_err
-
-
-def _build_summary(raw: str, limit: int = 80) -> str:
-    text = strip_tags(raw or '')
-    text = html.unescape(text)
-    text = ' '.join(text.split())
-    if len(text) <= limit:
-        return text
-    return f"{text[:limit]}..."
+from wxcloudrun.utils.pagination import paginate
 
 
 def _format_dt(value):
@@ -41,8 +34,7 @@ def _extract_payload(body):
     if not title:
         return None, None, '标题不能为空'
 
-    content_text = strip_tags(content or '')
-    content_text = html.unescape(content_text).strip()
+    content_text = html_to_text(content)
     has_image = bool(re.search(r'<img\\b', content or '', re.IGNORECASE))
     if not content_text and not has_image:
         return None, None, '内容不能为空'
@@ -50,6 +42,49 @@ def _extract_payload(body):
     return title, content, None
 
 
+def _extract_audience(body):
+    """解析受众：[{"type": "IDENTITY|PROPERTY|COMMUNITY|ALL", "value": "..."}]，未传返回 None（不修改）。"""
+    if 'audience' not in body:
+        return None, None
+    raw = body.get('audience') or []
+    if not isinstance(raw, list):
+        return None, 'audience 必须为数组'
+
+    segments = []
+    for item in raw:
+        if not isinstance(item, dict):
+            return None, 'audience 格式错误'
+        segment_type = str(item.get('type') or '').strip().upper()
+        segment_value = str(item.get('value') or '').strip()
+        if segment_type not in SEGMENT_TYPES:
+            return None, f'不支持的受众类型: {segment_type}'
+        if segment_type == 'ALL':
+            segment_value = ''
+        elif not segment_value:
+            return None, f'受众 {segment_type} 缺少 value'
+        segments.append((segment_type, segment_value))
+
+    identities = {value for value, _ in IDENTITY_CHOICES}
+    property_ids = {v for t, v in segments if t == 'PROPERTY'}
+    community_ids = {v for t, v in segments if t == 'COMMUNITY'}
+    invalid = [v for t, v in segments if t == 'IDENTITY' and v not in identities]
+    if property_ids:
+        invalid += property_ids - set(
+            PropertyProfile.objects.filter(property_id__in=property_ids).values_list('property_id', flat=True)
+        )
+    if community_ids:
+        invalid += community_ids - set(
+            Community.objects.filter(community_id__in=community_ids).values_list('community_id', flat=True)
+        )
+    if invalid:
+        return None, f'受众不存在: {", ".join(sorted(invalid))}'
+    return segments, None
+
+
+def _format_audience(segments):
+    return [{'type': segment_type, 'value': segment_value} for segment_type, segment_value in segments]
+
+
 @admin_token_required
 @require_http_methods(["GET", "POST"])
 def admin_notifications(request, admin):
@@ -61,79 +96,61 @@ def admin_notifications(request, admin):
             return json_err('请求体格式错误', status=400)
 
         title, content, error = _extract_payload(body)
+        if error:
+            return json_err(error, status=400)
+        segments, error = _extract_audience(body)
         if error:
             return json_err(error, status=400)
 
         normalized_content = normalize_content(content)
 
-        notice = Notification.objects.create(
-            title=title,
-            content=normalized_content,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-
-        file_ids = dedupe_file_ids(extract_image_file_ids(notice.content))
-        temp_urls = get_temp_file_urls(file_ids) if file_ids else {}
+        with transaction.atomic():
+            notice = Notification.objects.create(
+                title=title,
+                content=normalized_content,
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+            )
+            segments = set_audience(notice, segments or [])
 
         return json_ok({
             'id': notice.id,
             'title': notice.title,
-            'summary': _build_summary(notice.content),
-            'content': render_content(notice.content, temp_urls),
+            'summary': notice.summary,
+            'content': render_notification(notice),
+            'audience': _format_audience(segments),
             'created_at': _format_dt(notice.created_at),
             'updated_at': _format_dt(notice.updated_at),
         }, status=201)
 
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
     keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
 
-    qs = Notification.objects.all().order_by('-created_at', '-id')
+    qs = Notification.objects.defer('plain_text').prefetch_related('audiences').order_by('-created_at', '-id')
     if keyword:
-        qs = qs.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword))
+        qs = qs.filter(Q(title__icontains=keyword) | Q(plain_text__icontains=keyword))
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    notices = list(qs[start : start + page_size])
+    try:
+        notices, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
-    file_ids = []
-    for n in notices:
-        file_ids.extend(extract_image_file_ids(n.content))
-    temp_urls = get_temp_file_urls(dedupe_file_ids(file_ids)) if file_ids else {}
+    rendered = render_notifications(notices)
+    read_counts = get_read_store().reader_counts([n.id for n in notices])
 
     items = []
     for n in notices:
         items.append({
             'id': n.id,
             'title': n.title,
-            'summary': _build_summary(n.content),
-            'content': render_content(n.content, temp_urls),
+            'summary': n.summary,
+            'content': rendered[n.id],
+            'read_count': read_counts.get(n.id, 0),
+            'audience': _format_audience((a.segment_type, a.segment_value) for a in n.audiences.all()),
             'created_at': _format_dt(n.created_at),
             'updated_at': _format_dt(n.updated_at),
         })
 
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
@@ -160,23 +177,26 @@ def admin_notification_detail(request, admin, notification_id):
         return json_err('请求体格式错误', status=400)
 
     title, content, error = _extract_payload(body)
+    if error:
+        return json_err(error, status=400)
+    segments, error = _extract_audience(body)
     if error:
         return json_err(error, status=400)
 
     normalized_content = normalize_content(content)
-    notice.title = title
-    notice.content = normalized_content
-    notice.updated_at = datetime.now()
-    notice.save(update_fields=['title', 'content', 'updated_at'])
-
-    file_ids = dedupe_file_ids(extract_image_file_ids(notice.content))
-    temp_urls = get_temp_file_urls(file_ids) if file_ids else {}
+    with transaction.atomic():
+        notice.title = title
+        notice.content = normalized_content
+        notice.updated_at = datetime.now()
+        notice.save(update_fields=['title', 'content', 'updated_at'])
+        segments = set_audience(notice, segments) if segments is not None else get_audience(notice)
 
     return json_ok({
         'id': notice.id,
         'title': notice.title,
-        'summary': _build_summary(notice.content),
-        'content': render_content(notice.content, temp_urls),
+        'summary': notice.summary,
+        'content': render_notification(notice),
+        'audience': _format_audience(segments),
         'created_at': _format_dt(notice.created_at),
         'updated_at': _format_dt(notice.updated_at),
     })
@@ -5,40 +5,17 @@ from django.db import transaction
 from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import admin_token_required
-from wxcloudrun.models import MerchantProfile, MerchantReview, SettlementOrder
-from wxcloudrun.services.order_service import refresh_merchant_rating
+from wxcloudrun.decorators import admin_token_required, replica_reads
+from wxcloudrun.models import MerchantReview, SettlementOrder
+from wxcloudrun.services.order_service import schedule_merchant_rating_refresh
+from wxcloudrun.services.order_search_service import matching_order_pks
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate
 
 
 logger = logging.getLogger('log')
 
 
-def _parse_pagination(request):
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            raise ValueError('current 必须为数字')
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            raise ValueError('size 必须为数字')
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-    return page, page_size
-
-
 def _normalize_order_status(value: str):
     v = (value or '').strip().upper()
     if v in {'PENDING_REVIEW', 'REVIEWED'}:
@@ -54,13 +31,9 @@ def _normalize_order_status(value: str):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_orders(request, admin):
     """订单记录列表（后台控制中心）"""
-    try:
-        page, page_size = _parse_pagination(request)
-    except ValueError as exc:
-        return json_err(str(exc), status=400)
-
     keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
     merchant_id = (request.GET.get('merchant_id') or '').strip()
     owner_openid = (request.GET.get('openid') or request.GET.get('owner_openid') or '').strip()
@@ -79,19 +52,13 @@ def admin_orders(request, admin):
     if status:
         qs = qs.filter(status=status)
     if keyword:
-        qs = qs.filter(
-            Q(order_id__icontains=keyword)
-            | Q(owner__openid__icontains=keyword)
-            | Q(owner__system_id__icontains=keyword)
-            | Q(owner__phone_number__icontains=keyword)
-            | Q(owner__nickname__icontains=keyword)
-            | Q(merchant__merchant_id__icontains=keyword)
-            | Q(merchant__merchant_name__icontains=keyword)
-        )
+        # 订单号/业主/商户信息统一走订单搜索投影（OrderSearch）
+        qs = qs.filter(id__in=matching_order_pks(keyword))
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    orders = list(qs[start : start + page_size])
+    try:
+        orders, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     items = []
     for order in orders:
@@ -127,18 +94,14 @@ def admin_orders(request, admin):
             'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else None,
             'updated_at': order.updated_at.strftime('%Y-%m-%d %H:%M:%S') if order.updated_at else None,
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_reviews(request, admin):
     """评价记录列表（后台控制中心）"""
-    try:
-        page, page_size = _parse_pagination(request)
-    except ValueError as exc:
-        return json_err(str(exc), status=400)
-
     keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
     merchant_id = (request.GET.get('merchant_id') or '').strip()
     owner_openid = (request.GET.get('openid') or request.GET.get('owner_openid') or '').strip()
@@ -164,20 +127,16 @@ def admin_reviews(request, admin):
     if rating is not None:
         qs = qs.filter(rating=rating)
     if keyword:
+        # 评价的业主/商户与所属订单一致，订单侧信息复用订单搜索投影
         qs = qs.filter(
-            Q(order__order_id__icontains=keyword)
-            | Q(owner__openid__icontains=keyword)
-            | Q(owner__system_id__icontains=keyword)
-            | Q(owner__phone_number__icontains=keyword)
-            | Q(owner__nickname__icontains=keyword)
-            | Q(merchant__merchant_id__icontains=keyword)
-            | Q(merchant__merchant_name__icontains=keyword)
+            Q(order_id__in=matching_order_pks(keyword))
             | Q(content__icontains=keyword)
         )
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    reviews = list(qs[start : start + page_size])
+    try:
+        reviews, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     items = []
     for review in reviews:
@@ -201,7 +160,7 @@ def admin_reviews(request, admin):
             } if owner else None,
             'created_at': review.created_at.strftime('%Y-%m-%d %H:%M:%S') if review.created_at else None,
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
@@ -235,8 +194,7 @@ def admin_review_delete(request, admin, review_id):
         review.delete()
 
         if merchant:
-            merchant_locked = MerchantProfile.objects.select_for_update().get(id=merchant.id)
-            refresh_merchant_rating(merchant_locked)
+            schedule_merchant_rating_refresh(merchant.id)
 
     return json_ok({
         'review_id': rid,
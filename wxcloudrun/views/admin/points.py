@@ -5,8 +5,9 @@ from datetime import datetime, date, time
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q, Sum
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate, parse_pagination
 from wxcloudrun.models import UserInfo, PointsRecord, DiscountRedeemRecord
 from wxcloudrun.services.points_service import get_points_share_setting
 
@@ -62,6 +63,7 @@ def admin_share_setting(request, admin):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_points_records(request, admin):
     def parse_datetime_param(value: str, *, is_end: bool = False):
         if not value:
@@ -144,8 +146,6 @@ def admin_points_records(request, admin):
 
         return source_type or '-'
 
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
     openid = (request.GET.get('openid') or '').strip()
     system_id = (request.GET.get('system_id') or '').strip()
     keyword = (request.GET.get('keyword') or '').strip()
@@ -154,24 +154,10 @@ def admin_points_records(request, admin):
     start_date_raw = request.GET.get('start_date') or request.GET.get('start_time') or request.GET.get('start')
     end_date_raw = request.GET.get('end_date') or request.GET.get('end_time') or request.GET.get('end')
 
-    page = 1
-    page_size = 20
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
+    try:
+        page, page_size = parse_pagination(request)
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     qs = PointsRecord.objects.select_related('user').all().order_by('-created_at', '-id')
     if openid:
@@ -254,9 +240,10 @@ def admin_points_records(request, admin):
         'owner_settlement_year': owner_settlement_year,
     }
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    records = list(qs[start : start + page_size])
+    try:
+        records, page_info = paginate(request, qs, cursor_field='created_at', pagination=(page, page_size))
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
     items = []
     for record in records:
         user = record.user
@@ -277,7 +264,7 @@ def admin_points_records(request, admin):
         })
     return json_ok({
         'list': items,
-        'total': int(total),
+        **page_info,
         'current': page,
         'size': page_size,
         'summary': summary,
@@ -304,30 +291,9 @@ def admin_points_record_delete(request, admin, record_id):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_discount_redeem_records(request, admin):
     """折扣店积分兑换记录（后台控制中心）"""
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
     keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
     merchant_id = (request.GET.get('merchant_id') or '').strip()
     merchant_openid = (request.GET.get('merchant_openid') or '').strip()
@@ -359,9 +325,10 @@ def admin_discount_redeem_records(request, admin):
             | Q(merchant__merchant_name__icontains=keyword)
         )
 
-    total = qs.count()
-    start = (page - 1) * page_size
-    records = list(qs[start : start + page_size])
+    try:
+        records, page_info = paginate(request, qs, cursor_field='created_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     items = []
     for record in records:
@@ -387,4 +354,4 @@ def admin_discount_redeem_records(request, admin):
             'created_at': record.created_at.strftime('%Y-%m-%d %H:%M:%S') if record.created_at else None,
             'updated_at': record.updated_at.strftime('%Y-%m-%d %H:%M:%S') if record.updated_at else None,
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
@@ -0,0 +1,39 @@
+"""管理员请求剖析视图"""
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.utils.profiler import MODE_SAMPLE, get_profile_store
+from wxcloudrun.utils.responses import json_ok, json_err
+
+
+@admin_token_required
+@require_http_methods(["GET", "DELETE"])
+def admin_profiles(request, admin):
+    """请求剖析结果 - GET 最近结果概要（新的在前）；DELETE 清空
+
+    剖析单个请求：管理员 Token 请求加请求头 X-Profile: sample（统计采样）或 X-Profile: cprofile，
+    响应头 X-Profile-Id 即结果编号
+    """
+    store = get_profile_store()
+    if request.method == 'DELETE':
+        store.clear()
+        return json_ok()
+    return json_ok({'list': store.list(), 'capacity': store.capacity})
+
+
+@admin_token_required
+@require_http_methods(["GET"])
+def admin_profile_detail(request, admin, profile_id):
+    """请求剖析结果详情：SQL / 开放接口时间线与调用栈统计
+
+    - format=folded：统计采样结果以折叠栈文本返回（可导入 speedscope 或 flamegraph.pl 生成火焰图）
+    """
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        return json_err('剖析结果不存在或已被淘汰', status=404)
+    if request.GET.get('format') == 'folded':
+        if profile['profile'].get('mode') != MODE_SAMPLE:
+            return json_err('仅统计采样结果支持 folded 格式', status=400)
+        return HttpResponse('\n'.join(profile['profile']['stacks']) + '\n', content_type='text/plain; charset=utf-8')
+    return json_ok(profile)
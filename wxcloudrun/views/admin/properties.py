@@ -3,8 +3,9 @@ import json
 import logging
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
+from wxcloudrun.utils.pagination import paginate
 from wxcloudrun.models import UserInfo, PropertyProfile, PointsThreshold
 from wxcloudrun.services.points_service import get_points_account
 
@@ -14,34 +15,13 @@ logger = logging.getLogger('log')
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_properties(request, admin):
-    current_param = request.GET.get('current') or request.GET.get('page')
-    size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
-
-    page = 1
-    page_size = 20
-
-    if current_param:
-        try:
-            page = int(current_param)
-        except (TypeError, ValueError):
-            return json_err('current 必须为数字', status=400)
-    if size_param:
-        try:
-            page_size = int(size_param)
-        except (TypeError, ValueError):
-            return json_err('size 必须为数字', status=400)
-    if page < 1:
-        page = 1
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
     qs = PropertyProfile.objects.select_related('user').all().order_by('-updated_at', '-id')
-    total = qs.count()
-    start = (page - 1) * page_size
-    properties = list(qs[start : start + page_size])
+    try:
+        properties, page_info = paginate(request, qs, cursor_field='updated_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
     property_ids = [p.id for p in properties]
     thresholds = {th.property.id: th.min_points for th in PointsThreshold.objects.select_related('property').filter(property_id__in=property_ids)}
     items = []
@@ -56,7 +36,7 @@ def admin_properties(request, admin):
             'total_points': get_points_account(p.user, 'PROPERTY').total_points if p.user else 0,
             'min_points': min_points,
         })
-    return json_ok({'list': items, 'total': total})
+    return json_ok({'list': items, **page_info})
 
 
 @admin_token_required
@@ -1,6 +1,7 @@
 """管理员-推荐商户配置"""
 import json
 import logging
+from datetime import datetime
 from django.db import transaction
 from django.views.decorators.http import require_http_methods
 
@@ -9,6 +10,7 @@ from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.models import MerchantProfile, RecommendedMerchant
 from wxcloudrun.services.storage_service import get_temp_file_urls
 from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.utils.query_inspector import query_budget
 
 
 logger = logging.getLogger('log')
@@ -56,6 +58,7 @@ def _build_items(records: list[RecommendedMerchant]) -> list[dict]:
 
 @admin_token_required
 @require_http_methods(["GET", "PUT"])
+@query_budget(8)
 def admin_recommended_merchants(request, admin):
     """配置首页推荐商户（最多 4 个，按顺序展示）"""
     if request.method == 'GET':
@@ -108,12 +111,22 @@ def admin_recommended_merchants(request, admin):
 
     with transaction.atomic():
         RecommendedMerchant.objects.exclude(merchant__merchant_id__in=normalized).delete()
+        existing = {r.merchant_id: r for r in RecommendedMerchant.objects.filter(merchant__in=merchants)}
+        now = datetime.now()
+        to_update, to_create = [], []
         for idx, mid in enumerate(normalized):
             merchant = merchant_map[mid]
-            RecommendedMerchant.objects.update_or_create(
-                merchant=merchant,
-                defaults={'sort_order': idx + 1},
-            )
+            record = existing.get(merchant.id)
+            if record is None:
+                to_create.append(RecommendedMerchant(merchant=merchant, sort_order=idx + 1, created_at=now, updated_at=now))
+            else:
+                record.sort_order = idx + 1
+                record.updated_at = now
+                to_update.append(record)
+        if to_update:
+            RecommendedMerchant.objects.bulk_update(to_update, ['sort_order', 'updated_at'])
+        if to_create:
+            RecommendedMerchant.objects.bulk_create(to_create)
 
     records = list(
         RecommendedMerchant.objects.select_related('merchant__category')
@@ -6,7 +6,7 @@ from datetime import timedelta
 from django.views.decorators.http import require_http_methods
 from django.db.models import Sum
 
-from wxcloudrun.decorators import admin_token_required
+from wxcloudrun.decorators import admin_token_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.models import UserInfo, PointsRecord, AccessLog
 
@@ -32,6 +32,7 @@ def _stats_between(sd, ed):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_statistics_overview(request, admin):
     """管理员统计概览：总用户数、今日新增、今日交易额、总交易额"""
     today = date.today()
@@ -85,6 +86,7 @@ def admin_statistics_overview(request, admin):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_statistics_by_time(request, admin):
     """按时间维度统计：支持按年月、按周统计用户数和交易额
     
@@ -233,6 +235,7 @@ def admin_statistics_by_time(request, admin):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_statistics_by_range(request, admin):
     from datetime import datetime
     today = date.today()
@@ -291,6 +294,7 @@ def admin_statistics_by_range(request, admin):
 
 @admin_token_required
 @require_http_methods(["GET"])
+@replica_reads
 def admin_statistics_last_week(request, admin):
     today = date.today()
     # ISO: Monday=0. Last week Monday = today - (weekday+7) days
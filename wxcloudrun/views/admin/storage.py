@@ -7,6 +7,8 @@ from django.views.decorators.http import require_http_methods
 from wxcloudrun.decorators import admin_token_required
 from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.models import CloudFile
+from wxcloudrun.services.cloud_file_service import register_files
 from wxcloudrun.services.storage_service import wx_openapi_post, generate_storage_path
 
 
@@ -44,6 +46,9 @@ def admin_storage_upload_credential(request, admin):
     except WxOpenApiError as exc:
         return json_err(str(exc) or '获取上传凭证失败', status=500)
 
+    # 登记文件，未被任何实体引用时由 gc_cloud_files 回收
+    register_files([data.get('file_id')])
+
     return json_ok({
         'file_id': data.get('file_id'),
         'upload_url': data.get('url'),
@@ -79,6 +84,10 @@ def admin_storage_delete_files(request, admin):
     except WxOpenApiError as exc:
         return json_err(str(exc) or '删除文件失败', status=500)
 
+    CloudFile.objects.filter(
+        file_id__in=[item.get('fileid') for item in data.get('delete_list', []) if item.get('status') == 0]
+    ).delete()
+
     return json_ok({
         'deleted': file_ids,
         'result': data.get('delete_list', []),
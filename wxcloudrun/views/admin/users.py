@@ -3,11 +3,10 @@ import json
 import logging
 from datetime import date
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
 
 from wxcloudrun.decorators import admin_token_required
 from wxcloudrun.utils.responses import json_ok, json_err
-from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.utils.pagination import paginate
 from wxcloudrun.models import (
     Category,
     UserInfo,
@@ -18,7 +17,8 @@ from wxcloudrun.models import (
     UserPointsAccount,
 )
 from wxcloudrun.services.points_service import get_points_account
-from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files
+from wxcloudrun.services.user_service import user_keyword_q
+from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files_later
 
 
 logger = logging.getLogger('log')
@@ -129,30 +129,8 @@ def _update_points_accounts(user: UserInfo, payload, *, admin=None, source_type:
 def admin_users(request, admin):
     """用户管理 - GET列表 / POST创建"""
     if request.method == 'GET':
-        current_param = request.GET.get('current') or request.GET.get('page')
-        size_param = request.GET.get('size') or request.GET.get('page_size') or request.GET.get('limit')
         keyword = (request.GET.get('keyword') or request.GET.get('q') or '').strip()
 
-        page = 1
-        page_size = 20
-
-        if current_param:
-            try:
-                page = int(current_param)
-            except (TypeError, ValueError):
-                return json_err('current 必须为数字', status=400)
-        if size_param:
-            try:
-                page_size = int(size_param)
-            except (TypeError, ValueError):
-                return json_err('size 必须为数字', status=400)
-        if page < 1:
-            page = 1
-        if page_size < 1:
-            page_size = 1
-        if page_size > 100:
-            page_size = 100
-
         qs = (
             UserInfo.objects.select_related('owner_property')
             .prefetch_related('points_accounts')
@@ -160,13 +138,12 @@ def admin_users(request, admin):
             .order_by('-updated_at', '-id')
         )
         if keyword:
-            qs = qs.filter(
-                Q(phone_number__icontains=keyword)
-                | Q(nickname__icontains=keyword)
-            )
-        total = qs.count()
-        start = (page - 1) * page_size
-        users = list(qs[start : start + page_size])
+            # 手机号前缀/尾号、昵称前缀（走索引，不再 icontains 全表扫描）
+            qs = qs.filter(user_keyword_q(keyword))
+        try:
+            users, page_info = paginate(request, qs, cursor_field='updated_at')
+        except ValueError as exc:
+            return json_err(str(exc), status=400)
         avatar_file_ids = [u.avatar_url for u in users if u.avatar_url and u.avatar_url.startswith('cloud://')]
         temp_urls = get_temp_file_urls(avatar_file_ids) if avatar_file_ids else {}
         user_ids = [u.id for u in users]
@@ -215,7 +192,7 @@ def admin_users(request, admin):
                 'created_at': u.created_at.strftime('%Y-%m-%d %H:%M:%S') if u.created_at else None,
                 'updated_at': u.updated_at.strftime('%Y-%m-%d %H:%M:%S') if u.updated_at else None,
             })
-        return json_ok({'list': items, 'total': total})
+        return json_ok({'list': items, **page_info})
 
     # POST 创建
     try:
@@ -377,12 +354,8 @@ def admin_users_detail(request, admin, system_id):
         return json_err('用户不存在', status=404)
     
     if request.method == 'DELETE':
-        # 删除用户头像云文件
-        if user.avatar_url and user.avatar_url.startswith('cloud://'):
-            try:
-                delete_cloud_files([user.avatar_url])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除用户头像失败: {user.avatar_url}, error={exc}")
+        # 删除用户头像云文件（后台任务执行）
+        delete_cloud_files_later([user.avatar_url])
         user.delete()
         return json_ok({'system_id': system_id, 'deleted': True})
     
@@ -403,11 +376,8 @@ def admin_users_detail(request, admin, system_id):
         new_avatar = body.get('avatar_file_id', '')
         
         # 如果新旧头像不同，且旧头像是云文件，则删除
-        if new_avatar != old_avatar and old_avatar and old_avatar.startswith('cloud://'):
-            try:
-                delete_cloud_files([old_avatar])
-            except WxOpenApiError as exc:
-                logger.warning(f"删除旧用户头像失败: {old_avatar}, error={exc}")
+        if new_avatar != old_avatar:
+            delete_cloud_files_later([old_avatar])
         
         user.avatar_url = new_avatar
     if 'phone_number' in body:
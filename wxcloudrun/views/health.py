@@ -0,0 +1,48 @@
+"""健康检查（供容器平台探活/就绪探测，无需鉴权）
+
+- /healthz：进程存活即返回 200，不访问外部依赖
+- /readyz：数据库与缓存可用时返回 200，否则 503（实例不接收流量，等待依赖恢复）
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.views.decorators.http import require_http_methods
+
+from wxcloudrun.db.pool import connection_stats
+from wxcloudrun.utils.responses import json_ok, json_err
+
+
+logger = logging.getLogger('log')
+
+
+@require_http_methods(["GET", "HEAD"])
+def healthz(request):
+    return json_ok({'status': 'ok'})
+
+
+def _check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def _check_cache():
+    cache.set('readyz:ping', 1, 10)
+    if cache.get('readyz:ping') != 1:
+        raise RuntimeError('缓存读写不一致')
+
+
+@require_http_methods(["GET", "HEAD"])
+def readyz(request):
+    checks = {}
+    for name, check in (('database', _check_database), ('cache', _check_cache)):
+        started = time.monotonic()
+        try:
+            check()
+        except Exception as exc:
+            logger.error(f'就绪检查失败: {name}, error={exc}')
+            return json_err(f'{name} 不可用: {exc}', status=503)
+        checks[name] = round((time.monotonic() - started) * 1000, 2)
+    return json_ok({'status': 'ready', 'checks_ms': checks, 'db_connections': connection_stats()})
@@ -11,6 +11,8 @@ from wxcloudrun.views.miniapp.category import categories_list
 from wxcloudrun.views.miniapp.merchant import (
     merchants_list,
     merchants_recommended,
+    merchants_map,
+    merchants_search,
     merchant_detail,
     merchant_update_banner,
     merchant_business_license,
@@ -35,6 +37,7 @@ from wxcloudrun.views.miniapp.notifications import (
     notifications_list,
     notifications_unread_count,
     notification_detail,
+    notifications_read_all,
 )
 
 __all__ = [
@@ -47,6 +50,8 @@ __all__ = [
     'categories_list',
     'merchants_list',
     'merchants_recommended',
+    'merchants_map',
+    'merchants_search',
     'merchant_detail',
     'merchant_update_banner',
     'merchant_business_license',
@@ -72,4 +77,5 @@ __all__ = [
     'notifications_list',
     'notifications_unread_count',
     'notification_detail',
+    'notifications_read_all',
 ]
@@ -3,39 +3,15 @@
 import json
 from datetime import datetime
 
-from django.db.models import Q
-from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_http_methods
 
 from wxcloudrun.decorators import openid_required
 from wxcloudrun.models import UserFeedback, UserInfo
 from wxcloudrun.services.storage_service import get_temp_file_urls
 from wxcloudrun.utils.auth import get_openid
+from wxcloudrun.utils.pagination import cursor_paginate, parse_limit
 from wxcloudrun.utils.responses import json_ok, json_err
 
-def _parse_cursor(cursor_param: str):
-    cursor_param = (cursor_param or '').strip()
-    if not cursor_param:
-        return None
-    parts = cursor_param.split('#', 1)
-    if len(parts) != 2:
-        return None
-    ts_str, pk_str = parts
-    dt = parse_datetime(ts_str)
-    if not dt:
-        try:
-            dt = datetime.fromisoformat(ts_str)
-        except ValueError:
-            dt = None
-    try:
-        pk_val = int(pk_str)
-    except (TypeError, ValueError):
-        pk_val = None
-    if not dt or pk_val is None:
-        return None
-    return dt, pk_val
-
-
 def _normalize_images(images):
     if not images:
         return []
@@ -103,31 +79,13 @@ def feedback_handler(request):
         })
 
     # GET：我的反馈记录
-    limit_param = request.GET.get('limit')
-    page_size = 20
-    if limit_param:
-        try:
-            page_size = int(limit_param)
-        except (TypeError, ValueError):
-            return json_err('limit 必须为数字', status=400)
-    if page_size < 1:
-        page_size = 1
-    if page_size > 100:
-        page_size = 100
-
-    cursor_param = request.GET.get('cursor') or ''
-    cursor_filter = _parse_cursor(cursor_param)
-    if cursor_param and not cursor_filter:
-        return json_err('cursor 无效', status=400)
-
-    qs = UserFeedback.objects.filter(user=user).all().order_by('-created_at', '-id')
-    if cursor_filter:
-        cursor_dt, cursor_pk = cursor_filter
-        qs = qs.filter(Q(created_at__lt=cursor_dt) | Q(created_at=cursor_dt, id__lt=cursor_pk))
-
-    feedbacks = list(qs[: page_size + 1])
-    has_more = len(feedbacks) > page_size
-    sliced = feedbacks[:page_size]
+    try:
+        page_size = parse_limit(request)
+        sliced, has_more, next_cursor = cursor_paginate(
+            UserFeedback.objects.filter(user=user), request.GET.get('cursor'), page_size, field='created_at'
+        )
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
 
     cloud_file_ids = []
     for f in sliced:
@@ -162,5 +120,4 @@ def feedback_handler(request):
             'created_at': f.created_at.strftime('%Y-%m-%d %H:%M:%S') if f.created_at else None,
         })
 
-    next_cursor = f"{sliced[-1].created_at.isoformat()}#{sliced[-1].id}" if has_more and sliced else None
     return json_ok({'list': items, 'has_more': has_more, 'next_cursor': next_cursor})
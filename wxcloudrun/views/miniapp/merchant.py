@@ -1,22 +1,26 @@
 """小程序端商户相关视图"""
 import json
 import logging
-from datetime import datetime
+import math
 from decimal import Decimal
 
-from django.db.models import Q
-from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import openid_required
+from wxcloudrun.decorators import openid_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.utils.auth import get_openid
+from wxcloudrun.utils.pagination import cursor_paginate, parse_limit
 from wxcloudrun.models import MerchantProfile, UserInfo, RecommendedMerchant, Category
-from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files
+from wxcloudrun.services.cloud_file_service import resolve_entity_urls
+from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files_later
+from wxcloudrun.services.merchant_map_service import get_map_clusters
+from wxcloudrun.services.merchant_search_service import search_merchants
 from wxcloudrun.exceptions import WxOpenApiError
 
 
 logger = logging.getLogger('log')
+# 每次列表请求都会输出的日志走采样限速的子 logger
+hot_logger = logging.getLogger('log.hot')
 
 MAX_PAGE_SIZE = 10
 DEFAULT_PAGE_SIZE = 10
@@ -46,39 +50,15 @@ def _resolve_gallery(gallery, temp_urls):
     return resolved
 
 
-def _parse_cursor(cursor: str):
-    if not cursor:
-        return None
-    parts = cursor.split('#', 1)
-    if len(parts) != 2:
-        return None
-    ts_str, pk_str = parts
-    dt = parse_datetime(ts_str)
-    if not dt:
-        try:
-            dt = datetime.fromisoformat(ts_str)
-        except ValueError:
-            return None
-    try:
-        pk_val = int(pk_str)
-    except (TypeError, ValueError):
-        return None
-    return dt, pk_val
-
-
-def _build_cursor(obj: MerchantProfile):
-    return f"{obj.updated_at.isoformat()}#{obj.id}"
-
-
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def merchants_list(request):
     """获取商户列表"""
     qs = (
         MerchantProfile.objects.select_related('user', 'category')
         .exclude(merchant_type='DISCOUNT_STORE')
         .all()
-        .order_by('-updated_at', '-id')
     )
     category_param = request.GET.get('categoryId') or request.GET.get('category_id')
     category_value = None
@@ -89,36 +69,16 @@ def merchants_list(request):
             return json_err('categoryId 必须为数字', status=400)
         qs = qs.filter(category_id=category_value)
 
-    limit_param = request.GET.get('limit')
-    page_size = DEFAULT_PAGE_SIZE
-    if limit_param:
-        try:
-            page_size = int(limit_param)
-        except (TypeError, ValueError):
-            return json_err('limit 必须为数字', status=400)
-    if page_size < 1:
-        page_size = 1
-    if page_size > MAX_PAGE_SIZE:
-        page_size = MAX_PAGE_SIZE
-
     cursor_param = request.GET.get('cursor', '').strip()
-    cursor_filter = _parse_cursor(cursor_param) if cursor_param else None
-    if cursor_param and not cursor_filter:
-        return json_err('cursor 无效', status=400)
-    if cursor_filter:
-        cursor_dt, cursor_pk = cursor_filter
-        qs = qs.filter(
-            Q(updated_at__lt=cursor_dt)
-            | Q(updated_at=cursor_dt, id__lt=cursor_pk)
-        )
-
-    merchants = list(qs[: page_size + 1])
     try:
-        all_file_ids = [m.banner_url for m in merchants if m.banner_url and m.banner_url.startswith('cloud://')]
-        temp_urls = _collect_temp_urls(all_file_ids)
+        page_size = parse_limit(request, default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE)
+        sliced, has_more, next_cursor = cursor_paginate(qs, cursor_param, page_size, field='updated_at')
+    except ValueError as exc:
+        return json_err(str(exc), status=400)
+
+    try:
+        temp_urls = resolve_entity_urls(sliced, fields=('banner_url',))
 
-        has_more = len(merchants) > page_size
-        sliced = merchants[:page_size]
         items = []
         for m in sliced:
             banner_url = _resolve_file_id(m.banner_url, temp_urls)
@@ -140,8 +100,7 @@ def merchants_list(request):
                 'rating_count': m.rating_count,
                 'avg_score': float(m.avg_score),
             })
-        logger.info(f'查询商户列表，共 {len(items)} 条 category={category_value} cursor={cursor_param}')
-        next_cursor = _build_cursor(sliced[-1]) if has_more and sliced else None
+        hot_logger.info('查询商户列表，共 %d 条 category=%s cursor=%s', len(items), category_value, cursor_param)
         return json_ok({
             'list': items,
             'has_more': has_more,
@@ -149,8 +108,6 @@ def merchants_list(request):
         })
     except WxOpenApiError as e:
         logger.error(f"获取商户横幅图临时URL失败: {e}")
-        has_more = len(merchants) > page_size
-        sliced = merchants[:page_size]
         items = []
         for m in sliced:
             items.append({
@@ -171,7 +128,6 @@ def merchants_list(request):
                 'rating_count': m.rating_count,
                 'avg_score': float(m.avg_score),
             })
-        next_cursor = _build_cursor(sliced[-1]) if has_more and sliced else None
         return json_ok({
             'list': items,
             'has_more': has_more,
@@ -184,6 +140,7 @@ def merchants_list(request):
 
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def merchants_recommended(request):
     """获取首页推荐商户（最多 4 个，按后台配置顺序返回）"""
     limit_param = request.GET.get('limit')
@@ -269,6 +226,129 @@ def merchants_recommended(request):
         return json_err(f'查询失败: {str(exc)}', status=500)
 
 
+@openid_required
+@require_http_methods(["GET"])
+@replica_reads
+def merchants_search(request):
+    """商户搜索（名称/标题/地址/简介，按相关度排序）
+
+    - 参数：q（或 keyword）、categoryId（可选）、offset、limit
+    - 不返回优惠商店（与商户列表一致）
+    """
+    keyword = (request.GET.get('q') or request.GET.get('keyword') or '').strip()
+    if not keyword:
+        return json_err('缺少参数 q', status=400)
+
+    category_param = request.GET.get('categoryId') or request.GET.get('category_id')
+    category_value = None
+    if category_param:
+        try:
+            category_value = int(category_param)
+        except (TypeError, ValueError):
+            return json_err('categoryId 必须为数字', status=400)
+
+    try:
+        offset = int(request.GET.get('offset') or 0)
+        page_size = int(request.GET.get('limit') or DEFAULT_PAGE_SIZE)
+    except (TypeError, ValueError):
+        return json_err('offset/limit 必须为数字', status=400)
+    offset = max(offset, 0)
+    page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    results = search_merchants(
+        keyword,
+        category_id=category_value,
+        exclude_merchant_types=['DISCOUNT_STORE'],
+        offset=offset,
+        limit=page_size + 1,
+    )
+    has_more = len(results) > page_size
+    results = results[:page_size]
+    try:
+        temp_urls = _collect_temp_urls([m.banner_url for m, _ in results])
+    except WxOpenApiError as e:
+        logger.error(f"获取商户横幅图临时URL失败: {e}")
+        temp_urls = {}
+
+    items = []
+    for m, score in results:
+        items.append({
+            'merchant_id': m.merchant_id,
+            'merchant_name': m.merchant_name,
+            'title': m.title,
+            'description': m.description,
+            'banner_url': _resolve_file_id(m.banner_url, temp_urls),
+            'category': m.category.name if m.category else None,
+            'category_id': m.category.id if m.category else None,
+            'contact_phone': m.contact_phone,
+            'address': m.address,
+            'latitude': float(m.latitude) if m.latitude is not None else None,
+            'longitude': float(m.longitude) if m.longitude is not None else None,
+            'positive_rating_percent': m.positive_rating_percent,
+            'open_hours': m.open_hours,
+            'gallery': m.gallery or [],
+            'rating_count': m.rating_count,
+            'avg_score': float(m.avg_score),
+            'score': score,
+        })
+    logger.info('商户搜索 q=%s category=%s，返回 %d 条', keyword, category_value, len(items))
+    return json_ok({
+        'list': items,
+        'has_more': has_more,
+        'next_offset': offset + len(items) if has_more else None,
+    })
+
+
+@openid_required
+@require_http_methods(["GET"])
+@replica_reads
+def merchants_map(request):
+    """地图视野内的商户聚合标记点
+
+    - 参数：min_lat/min_lng/max_lat/max_lng（视野矩形）、zoom（或 scale，地图缩放级别 3-20）、categoryId（可选）
+    - 返回格子中心点、商户数量与代表商户ID，返回数据量与视野内商户数量无关
+    """
+    bounds = {}
+    for name, low, high in (
+        ('min_lat', -90, 90),
+        ('min_lng', -180, 180),
+        ('max_lat', -90, 90),
+        ('max_lng', -180, 180),
+    ):
+        raw = request.GET.get(name)
+        if raw in (None, ''):
+            return json_err(f'缺少参数 {name}', status=400)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            return json_err(f'{name} 必须为数值', status=400)
+        if not math.isfinite(value) or value < low or value > high:
+            return json_err(f'{name} 超出范围（{low}~{high}）', status=400)
+        bounds[name] = value
+    if bounds['min_lat'] > bounds['max_lat'] or bounds['min_lng'] > bounds['max_lng']:
+        return json_err('视野范围无效', status=400)
+
+    zoom_param = request.GET.get('zoom') or request.GET.get('scale') or '16'
+    try:
+        zoom_value = float(zoom_param)
+    except (TypeError, ValueError):
+        return json_err('zoom 必须为数字', status=400)
+    if not math.isfinite(zoom_value):
+        return json_err('zoom 必须为数字', status=400)
+    zoom = int(zoom_value)
+
+    category_param = request.GET.get('categoryId') or request.GET.get('category_id')
+    category_value = None
+    if category_param:
+        try:
+            category_value = int(category_param)
+        except (TypeError, ValueError):
+            return json_err('categoryId 必须为数字', status=400)
+
+    data = get_map_clusters(zoom=zoom, category_id=category_value, **bounds)
+    return json_ok(data)
+
+
 @openid_required
 @require_http_methods(["PUT"])
 def merchant_update_profile(request):
@@ -331,6 +411,7 @@ def merchant_update_profile(request):
 
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def merchant_detail(request, merchant_id):
     """获取商户详情"""
     try:
@@ -429,14 +510,9 @@ def merchant_update_banner(request):
                 status=400
             )
     
-    # 如果新旧横幅不同，删除旧横幅
+    # 如果新旧横幅不同，删除旧横幅（后台任务执行）
     if new_banner != old_banner:
-        if old_banner and old_banner.startswith('cloud://'):
-            try:
-                delete_cloud_files([old_banner])
-                logger.info(f"已删除旧商户横幅: {old_banner}")
-            except WxOpenApiError as exc:
-                logger.warning(f"删除旧商户横幅失败: {old_banner}, error={exc}")
+        delete_cloud_files_later([old_banner])
     
     merchant.banner_url = new_banner
     
@@ -527,12 +603,8 @@ def merchant_business_license(request):
             logger.warning(f"无效的营业执照文件ID: {new_license}")
             return json_err('营业执照文件ID格式不正确，必须是云存储文件ID（cloud:// 开头）', status=400)
 
-    if new_license != old_license and old_license.startswith('cloud://'):
-        try:
-            delete_cloud_files([old_license])
-            logger.info(f"已删除旧营业执照: {old_license}")
-        except WxOpenApiError as exc:
-            logger.warning(f"删除旧营业执照失败: {old_license}, error={exc}")
+    if new_license != old_license:
+        delete_cloud_files_later([old_license])
 
     merchant.business_license_file_id = new_license
     try:
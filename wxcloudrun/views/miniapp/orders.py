@@ -4,7 +4,7 @@ import logging
 
 from django.views.decorators.http import require_http_methods
 
-from wxcloudrun.decorators import openid_required
+from wxcloudrun.decorators import openid_required, replica_reads
 from wxcloudrun.utils.auth import get_openid
 from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.models import MerchantProfile, MerchantReview, SettlementOrder, UserInfo
@@ -60,6 +60,7 @@ def _normalize_order_status_filter(status: str):
 
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def orders_list(request):
     """我的订单列表
 
@@ -186,6 +187,7 @@ def order_review_create(request, order_id):
 
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def merchant_reviews_list(request, merchant_id):
     """获取商户评价列表（用于商户详情页展示）"""
     try:
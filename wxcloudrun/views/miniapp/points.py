@@ -15,6 +15,7 @@ from wxcloudrun.services.points_service import (
     get_points_share_setting,
 )
 from wxcloudrun.services.order_service import create_settlement_order
+from wxcloudrun.services.user_service import find_user_by_phone
 
 
 logger = logging.getLogger('log')
@@ -286,7 +287,7 @@ def merchant_points_add(request):
     if delta <= 0:
         return json_err('amount 必须不小于 1', status=400)
 
-    target_user = UserInfo.objects.select_related('owner_property__user').filter(phone_number=phone_number).order_by('-id').first()
+    target_user = find_user_by_phone(phone_number, UserInfo.objects.select_related('owner_property__user'))
     if not target_user:
         return json_err('找不到该手机号用户', status=404)
 
@@ -415,7 +416,7 @@ def discount_store_redeem(request):
     if points_int <= 0:
         return json_err('points 必须为正整数', status=400)
 
-    target_user = UserInfo.objects.filter(phone_number=phone_number).order_by('-id').first()
+    target_user = find_user_by_phone(phone_number)
     if not target_user:
         return json_err('找不到该手机号用户', status=404)
 
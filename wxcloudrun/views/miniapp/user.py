@@ -7,13 +7,12 @@ from datetime import datetime
 from django.db.models import Q
 from django.utils.dateparse import parse_datetime
 
-from wxcloudrun.decorators import openid_required
+from wxcloudrun.decorators import openid_required, replica_reads
 from wxcloudrun.utils.responses import json_ok, json_err
 from wxcloudrun.utils.auth import get_openid
 from wxcloudrun.models import UserInfo, PropertyProfile, Community, IdentityApplication, AccessLog, MerchantProfile
 from wxcloudrun.services.points_service import get_points_account
-from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files, get_phone_number_by_code
-from wxcloudrun.exceptions import WxOpenApiError
+from wxcloudrun.services.storage_service import get_temp_file_urls, delete_cloud_files_later, get_phone_number_by_code
 
 
 logger = logging.getLogger('log')
@@ -150,12 +149,7 @@ def user_update_profile(request):
         
         # 如果新旧头像不同，且旧头像是云文件，则删除旧头像
         if new_avatar != old_avatar:
-            if old_avatar and old_avatar.startswith('cloud://'):
-                try:
-                    delete_cloud_files([old_avatar])
-                    logger.info(f"已删除旧用户头像: {old_avatar}")
-                except WxOpenApiError as exc:
-                    logger.warning(f"删除旧用户头像失败: {old_avatar}, error={exc}")
+            delete_cloud_files_later([old_avatar])
         
         user.avatar_url = new_avatar
     
@@ -423,6 +417,7 @@ def user_set_active_identity(request):
 
 @openid_required
 @require_http_methods(["GET"])
+@replica_reads
 def user_profile(request):
     """获取用户详细信息（包含积分信息）
     - 所有身份都返回积分信息和所在物业信息